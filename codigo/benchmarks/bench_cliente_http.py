@@ -0,0 +1,80 @@
+"""
+Benchmark do cliente HTTP compartilhado contra um servidor local.
+
+Compara a latência por requisição de chamadas avulsas (requests.get, uma
+conexão nova a cada chamada) com a sessão de cliente_http, que reaproveita as
+conexões. O servidor responde na hora, então a diferença medida é o custo de
+abrir a conexão. Contra api.github.com, com TLS, a economia por requisição é maior.
+
+Uso: python bench_cliente_http.py [--requisicoes 500]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from cliente_http import criar_sessao
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 para que o servidor mantenha a conexão aberta entre requisições.
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo são escritos separadamente; sem isso o Nagle atrasa a resposta em ~40 ms.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        corpo = json.dumps({'total_count': 1, 'items': []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def _medir(get, url, n):
+    latencias = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        get(url).json()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+
+def _resumo(nome, latencias):
+    latencias = sorted(latencias)
+    p50 = statistics.median(latencias)
+    p99 = latencias[int(len(latencias) * 0.99) - 1]
+    print(f"{nome:<22} média {statistics.mean(latencias):7.3f} ms   p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+    return statistics.mean(latencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requisicoes', type=int, default=500)
+    args = parser.parse_args()
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}/search/repositories"
+
+    try:
+        print(f"{args.requisicoes} requisições sequenciais em {url}\n")
+        sem_pool = _resumo('requests.get', _medir(requests.get, url, args.requisicoes))
+        com_pool = _resumo('sessão compartilhada', _medir(criar_sessao().get, url, args.requisicoes))
+        print(f"\nEconomia por requisição: {sem_pool - com_pool:.3f} ms ({(1 - com_pool / sem_pool) * 100:.0f}%)")
+    finally:
+        servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark de vazão dos dois coletores contra o servidor simulado da API do GitHub.
+
+Para cada cenário, sobe servidor_github.py em um subprocesso e roda, cada um em
+um diretório temporário, sprint1/GetData.py e codigo/src/consulta_repositorios.py
+com GITHUB_API_URL apontando para o servidor e o cache HTTP desligado. Mede o
+tempo total, as requisições por segundo, a latência p50/p99 vista pelo servidor
+e quantos repositórios cada coletor salvou; do resumo que o próprio coletor grava
+com --metricas-execucao (ver instrumentacao.py) vêm as repetições e o tempo esperando.
+
+Cenários:
+- normal: latência de 50 ms, nenhuma falha e os limites do GitHub (30 buscas por minuto);
+- instavel: 5% de respostas 502/504, rajadas de 5xx e 2% de 403 de limite secundário;
+- rate-limit: 30 buscas e 200 requisições core/graphql por janela de 10 s, para medir a espera.
+
+Com --saida o resultado vai para um JSON; com --comparar BASE.json, o resultado é
+comparado a uma execução anterior e o script termina com código 1 se algum
+coletor ficou mais lento que a tolerância (útil para comparar commits).
+
+Uso: python bench_coletores.py [--total 100] [--cenarios normal instavel] [--saida atual.json] [--comparar base.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.abspath(os.path.join(DIRETORIO, '..', '..'))
+SERVIDOR = os.path.join(DIRETORIO, 'servidor_github.py')
+
+CENARIOS = {
+    'normal': [],
+    'instavel': ['--taxa-erro', '0.05', '--rajada-5xx-a-cada', '10', '--rajada-5xx-duracao', '0.5',
+                 '--taxa-rate-limit', '0.02'],
+    'rate-limit': ['--limite-busca', '30', '--limite-core', '200', '--limite-graphql', '200', '--janela', '10'],
+}
+
+COLETORES = {
+    'rest': lambda total: [os.path.join(RAIZ, 'sprint1', 'GetData.py'), '--total', str(total)],
+    'graphql': lambda total: [os.path.join(RAIZ, 'codigo', 'src', 'consulta_repositorios.py'),
+                              '--total', str(total), '--saida', 'saida.parquet'],
+}
+METRICAS_EXECUCAO = 'metricas_execucao'
+
+
+def iniciar_servidor(opcoes, repositorios):
+    processo = subprocess.Popen(
+        [sys.executable, SERVIDOR, '--porta', '0', '--repositorios', str(repositorios), *opcoes],
+        stdout=subprocess.PIPE, text=True,
+    )
+    # A primeira linha é "PORTA <n>".
+    porta = int(processo.stdout.readline().split()[1])
+    return processo, f'http://127.0.0.1:{porta}'
+
+
+def linhas_salvas(coletor, diretorio):
+    import pandas as pd
+
+    if coletor == 'graphql':
+        caminho = os.path.join(diretorio, 'saida.parquet')
+        return len(pd.read_parquet(caminho, columns=['repository'])) if os.path.exists(caminho) else 0
+    resultado = os.path.join(diretorio, 'result')
+    csvs = [nome for nome in os.listdir(resultado) if nome.endswith('.csv')] if os.path.isdir(resultado) else []
+    return sum(len(pd.read_csv(os.path.join(resultado, nome), usecols=[0])) for nome in csvs)
+
+
+def executar(coletor, url, total, tempo_limite):
+    """Roda um coletor contra o servidor em `url` e devolve as medidas."""
+    ambiente = dict(os.environ, GITHUB_API_URL=url, GITHUB_TOKEN='token-benchmark', GITHUB_TOKENS='', CACHE_HTTP='0')
+    requests.post(f'{url}/__zerar')
+    with tempfile.TemporaryDirectory() as diretorio:
+        inicio = time.perf_counter()
+        try:
+            processo = subprocess.run([sys.executable, *COLETORES[coletor](total),
+                                       '--metricas-execucao', METRICAS_EXECUCAO], cwd=diretorio, env=ambiente,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                      timeout=tempo_limite)
+            codigo = processo.returncode
+        except subprocess.TimeoutExpired:
+            codigo = 'timeout'
+        duracao = time.perf_counter() - inicio
+        linhas = linhas_salvas(coletor, diretorio)
+        caminho = os.path.join(diretorio, METRICAS_EXECUCAO + '.json')
+        resumo = {}
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as f:
+                resumo = json.load(f)
+
+    servidor = requests.get(f'{url}/__estatisticas').json()
+    return {
+        'codigo_saida': codigo,
+        'segundos': round(duracao, 2),
+        'requisicoes': servidor['requisicoes'],
+        'requisicoes_por_segundo': round(servidor['requisicoes'] / duracao, 1),
+        'p50_ms': round(servidor['p50_ms'], 1),
+        'p99_ms': round(servidor['p99_ms'], 1),
+        'status': servidor['status'],
+        'linhas': linhas,
+        'novas_tentativas': sum(endpoint['novas_tentativas'] for endpoint in resumo.get('endpoints', {}).values()),
+        'esperando_s': round(resumo.get('tempo_esperando_s', 0.0), 2),
+    }
+
+
+def comparar(atual, base, tolerancia):
+    """Lista as execuções que ficaram mais lentas que `tolerancia` ou salvaram menos linhas que na base."""
+    regressoes = []
+    for chave, medida in atual.items():
+        anterior = base.get(chave)
+        if anterior is None:
+            continue
+        if medida['segundos'] > anterior['segundos'] * (1 + tolerancia):
+            regressoes.append(f"{chave}: {anterior['segundos']}s -> {medida['segundos']}s")
+        if medida['linhas'] < anterior['linhas']:
+            regressoes.append(f"{chave}: {anterior['linhas']} -> {medida['linhas']} linhas")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--total', type=int, default=100, help='Repositórios pedidos a cada coletor.')
+    parser.add_argument('--repositorios', type=int, default=5000, help='Repositórios no servidor simulado.')
+    parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument('--coletores', nargs='+', choices=list(COLETORES), default=list(COLETORES))
+    parser.add_argument('--tempo-limite', type=float, default=600, help='Segundos até uma execução ser interrompida.')
+    parser.add_argument('--saida', help='Grava o resultado neste arquivo JSON.')
+    parser.add_argument('--comparar', metavar='BASE_JSON', help='Compara com o resultado de uma execução anterior.')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Aumento de tempo aceito na comparação (0.2 = 20%%).')
+    args = parser.parse_args()
+
+    resultados = {}
+    print(f"{'execução':<22}{'saída':>8}{'tempo':>10}{'req':>7}{'req/s':>8}{'p50':>9}{'p99':>9}{'linhas':>8}{'retry':>7}{'espera':>9}")
+    for cenario in args.cenarios:
+        servidor, url = iniciar_servidor(CENARIOS[cenario], args.repositorios)
+        try:
+            for coletor in args.coletores:
+                medida = executar(coletor, url, args.total, args.tempo_limite)
+                chave = f'{cenario}/{coletor}'
+                resultados[chave] = medida
+                print(f"{chave:<22}{medida['codigo_saida']!s:>8}{medida['segundos']:>9.1f}s{medida['requisicoes']:>7}"
+                      f"{medida['requisicoes_por_segundo']:>8.1f}{medida['p50_ms']:>7.1f}ms{medida['p99_ms']:>7.1f}ms"
+                      f"{medida['linhas']:>8}{medida['novas_tentativas']:>7}{medida['esperando_s']:>8.1f}s")
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regressoes = comparar(resultados, json.load(f), args.tolerancia)
+        if regressoes:
+            print("\nRegressões em relação a", args.comparar)
+            for regressao in regressoes:
+                print(f"  {regressao}")
+            sys.exit(1)
+        print(f"\nSem regressões em relação a {args.comparar}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark do cubo de agregados por linguagem (cubo_agregados) contra os agrupamentos refeitos a cada relatório.
+
+Gera um conjunto sintético e calcula o que as RQ02, RQ05 e RQ07 pedem (linguagens
+mais comuns, medianas de PRs e o painel de medianas por linguagem) das duas
+formas: refazendo value_counts, isin e groupby a cada pedido, como os
+relatórios faziam, e montando o cubo uma vez e consultando-o. Confere que os
+resultados são iguais e mede também fatias arbitrárias (linguagens x faixas de estrelas).
+
+Uso: python bench_cubo.py [--linhas 1000000] [--repeticoes 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from cubo_agregados import CuboAgregados
+from formato_colunar import tipar
+from metricas import adicionar_metricas
+
+COLUNAS_RQ07 = ['accepted_pull_requests', 'releases_per_year', 'days_since_last_update']
+
+
+def gerar(linhas, semente=42):
+    rng = np.random.default_rng(semente)
+    linguagens = np.array([f'Linguagem{i}' for i in range(300)])
+    total_issues = rng.geometric(0.001, linhas) - 1
+    df = pd.DataFrame({
+        'stars': rng.integers(100, 400000, linhas),
+        # Poucas linguagens dominam, como no conjunto real.
+        'primary_language': linguagens[np.minimum(rng.zipf(1.5, linhas) - 1, len(linguagens) - 1)],
+        'total_releases': rng.geometric(0.01, linhas) - 1,
+        'accepted_pull_requests': rng.geometric(0.0005, linhas) - 1,
+        'total_issues': total_issues,
+        'closed_issues': (total_issues * rng.random(linhas)).astype('int64'),
+        'repository_age_days': rng.integers(0, 6000, linhas),
+        'days_since_last_update': rng.integers(0, 1000, linhas),
+    })
+    return adicionar_metricas(tipar(df))
+
+
+def por_linhas(df):
+    comuns = df['primary_language'].value_counts().head(10)
+    top = df[df['primary_language'].isin(comuns.index)].copy()
+    top['primary_language'] = top['primary_language'].cat.remove_unused_categories()
+    rq02 = top.groupby('primary_language', observed=True)[['accepted_pull_requests']].median()
+    rq07 = top.groupby('primary_language', observed=True)[COLUNAS_RQ07].median()
+    return comuns, rq02, rq07
+
+
+def pelo_cubo(cubo):
+    return (cubo.linguagens_comuns(10), cubo.medianas_por_linguagem(['accepted_pull_requests']),
+            cubo.medianas_por_linguagem(COLUNAS_RQ07))
+
+
+def _tempo(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return resultado, (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    df = gerar(args.linhas)
+    print(f"{args.linhas} linhas, {df['primary_language'].nunique()} linguagens\n")
+
+    antes, t_linhas = _tempo(lambda: por_linhas(df), args.repeticoes)
+    cubo, t_montagem = _tempo(lambda: CuboAgregados(df), 1)
+    depois, t_cubo = _tempo(lambda: pelo_cubo(cubo), args.repeticoes)
+    print(f"{'RQ02+RQ05+RQ07 refazendo groupby':<40} {t_linhas * 1000:9.1f} ms por relatório")
+    print(f"{'montagem do cubo (uma vez)':<40} {t_montagem * 1000:9.1f} ms")
+    print(f"{'RQ02+RQ05+RQ07 pelo cubo':<40} {t_cubo * 1000:9.1f} ms por relatório")
+
+    pd.testing.assert_series_equal(antes[0], depois[0])
+    for antigo, novo in zip(antes[1:], depois[1:]):
+        pd.testing.assert_frame_equal(antigo, novo, check_index_type=False, check_categorical=False)
+    print("Resultados iguais.\n")
+
+    cubo_faixas = CuboAgregados(df, 'faixa_estrelas')
+    linguagens = list(cubo.linguagens_comuns(3).index)
+
+    def filtrando():
+        filtro = df['primary_language'].isin(linguagens) & (df['stars'] >= 50_000)
+        return df.loc[filtro, COLUNAS_RQ07].median()
+
+    exata, t_linhas = _tempo(filtrando, args.repeticoes)
+    fatia, t_fatia = _tempo(lambda: cubo_faixas.fatia(primary_language=linguagens,
+                                                      faixa_estrelas=['50k-100k', '100k+']), args.repeticoes)
+    print(f"Fatia {linguagens} com 50k+ estrelas ({int(fatia['repositorios'])} repositórios):")
+    print(f"{'  mediana filtrando as linhas':<40} {t_linhas * 1000:9.1f} ms")
+    print(f"{'  mediana pelo cubo (esboços)':<40} {t_fatia * 1000:9.1f} ms")
+    print(pd.DataFrame({'exata': exata, 'cubo': fatia[COLUNAS_RQ07]}).to_string())
+
+
+if __name__ == '__main__':
+    main()
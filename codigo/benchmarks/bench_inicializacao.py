@@ -0,0 +1,90 @@
+"""
+Benchmark do tempo de inicialização da linha de comando (cli.py).
+
+Mede, em processos novos, o tempo de parede até o fim de:
+- python -c pass (o próprio interpretador);
+- cli.py --help;
+- cli.py metricas sobre um conjunto pequeno;
+- o mesmo cli.py metricas com as importações que metricas_relatorio.py fazia ao
+  ser carregado: matplotlib.pyplot, seaborn e sklearn.preprocessing (quando instalado).
+
+A última linha reproduz o custo que as métricas em texto pagavam antes. O benchmark
+também confere que cli.py metricas não carrega matplotlib, seaborn, scipy nem sklearn.
+Cada medida é a mediana de --repeticoes execuções; a primeira execução, com os caches
+do sistema de arquivos frios, é descartada.
+
+Uso: python bench_inicializacao.py [--linhas 10000] [--repeticoes 7]
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.abspath(os.path.join(DIRETORIO, '..', 'src'))
+CLI = os.path.join(SRC, 'cli.py')
+PESADOS = ['matplotlib', 'seaborn', 'scipy', 'sklearn']
+
+sys.path.insert(0, SRC)
+
+
+def _executar_cli(argumentos, antes=''):
+    """Código Python que faz `antes` e roda cli.py com `argumentos`, como na linha de comando."""
+    return (f"{antes}import runpy, sys; sys.path.insert(0, {SRC!r}); sys.argv = [{CLI!r}] + {argumentos!r}; "
+            f"runpy.run_path({CLI!r}, run_name='__main__')")
+
+
+def _tempo(comando, repeticoes, diretorio):
+    tempos = []
+    for _ in range(repeticoes + 1):
+        inicio = time.perf_counter()
+        subprocess.run(comando, cwd=diretorio, stdout=subprocess.DEVNULL, check=True)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=10_000)
+    parser.add_argument('--repeticoes', type=int, default=7)
+    args = parser.parse_args()
+
+    from bench_metricas import gerar_csv
+    from formato_colunar import converter
+
+    antigas = ['matplotlib.pyplot', 'seaborn'] + (['sklearn.preprocessing'] if importlib.util.find_spec('sklearn') else [])
+    metricas = ['metricas', '--entrada', 'dados.parquet']
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerar_csv(os.path.join(diretorio, 'dados.csv'), args.linhas)
+        converter(os.path.join(diretorio, 'dados.csv'), os.path.join(diretorio, 'dados.parquet'))
+
+        verificacao = subprocess.run(
+            [sys.executable, '-c', _executar_cli(metricas) + f"; print([m for m in {PESADOS!r} if m in sys.modules], file=sys.stderr)"],
+            cwd=diretorio, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+        carregados = verificacao.stderr.strip().splitlines()[-1]
+        print(f"Módulos pesados carregados por cli.py metricas: {carregados}\n")
+
+        comandos = [
+            ('python -c pass', [sys.executable, '-c', 'pass']),
+            ('cli.py --help', [sys.executable, CLI, '--help']),
+            ('cli.py metricas', [sys.executable, CLI, *metricas]),
+            ('metricas + importações antigas',
+             [sys.executable, '-c', _executar_cli(metricas, antes=''.join(f'import {m}; ' for m in antigas))]),
+        ]
+        resultados = {}
+        for nome, comando in comandos:
+            resultados[nome] = _tempo(comando, args.repeticoes, diretorio)
+            print(f"{nome:<34}{resultados[nome] * 1000:9.0f} ms")
+
+    atual, antes = resultados['cli.py metricas'], resultados['metricas + importações antigas']
+    print(f"\ncli.py metricas leva {atual / antes:.0%} do tempo com as importações antigas "
+          f"({', '.join(antigas)}).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark das colunas derivadas: df.apply por linha contra o módulo metricas.
+
+Gera um CSV sintético no formato de repositorios_populares.csv, lê o arquivo e
+calcula a razão de issues fechadas e releases por ano das duas formas: com o
+df.apply(axis=1) usado antes no coletor e no relatório, e com
+metricas.adicionar_metricas. Confere se os resultados são iguais e mostra o tempo de cada uma.
+
+Uso: python bench_metricas.py [--linhas 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from metricas import adicionar_metricas
+
+
+def gerar_csv(caminho, linhas, semente=42):
+    rng = np.random.default_rng(semente)
+    total_issues = rng.geometric(0.001, linhas) - 1
+    total_issues[rng.random(linhas) < 0.1] = 0
+    df = pd.DataFrame({
+        'repository': [f"dono{i}/repo{i}" for i in range(linhas)],
+        'stars': rng.integers(1000, 400000, linhas),
+        'primary_language': rng.choice(['Python', 'JavaScript', 'TypeScript', 'Go', 'Rust', 'Java'], linhas),
+        'total_releases': rng.geometric(0.01, linhas) - 1,
+        'accepted_pull_requests': rng.geometric(0.0005, linhas) - 1,
+        'total_issues': total_issues,
+        'closed_issues': (total_issues * rng.random(linhas)).astype('int64'),
+        'repository_age_days': rng.integers(0, 6000, linhas),
+        'days_since_last_update': rng.integers(0, 1000, linhas),
+    })
+    df.to_csv(caminho, index=False)
+
+
+def por_linha(df):
+    df['closed_issues_ratio'] = df.apply(
+        lambda row: row['closed_issues'] / row['total_issues'] if row['total_issues'] > 0 else 0,
+        axis=1
+    )
+    df['releases_per_year'] = df.apply(
+        lambda row: row['total_releases'] / (row['repository_age_days'] / 365.25) if row['repository_age_days'] > 0 else 0,
+        axis=1
+    )
+    return df
+
+
+def _medir(nome, funcao, df):
+    inicio = time.perf_counter()
+    resultado = funcao(df.copy())
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<22} {duracao:8.3f} s")
+    return resultado, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'sintetico.csv')
+        gerar_csv(caminho, args.linhas)
+        inicio = time.perf_counter()
+        df = pd.read_csv(caminho)
+        print(f"{args.linhas} linhas lidas em {time.perf_counter() - inicio:.3f} s\n")
+
+    antes, t_antes = _medir('df.apply por linha', por_linha, df)
+    depois, t_depois = _medir('metricas vetorizadas', adicionar_metricas, df)
+
+    for coluna in ('closed_issues_ratio', 'releases_per_year'):
+        np.testing.assert_allclose(antes[coluna], depois[coluna])
+    print(f"\nResultados iguais; {t_antes / t_depois:.0f}x mais rápido.")
+
+
+if __name__ == '__main__':
+    main()
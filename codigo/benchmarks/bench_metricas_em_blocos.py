@@ -0,0 +1,92 @@
+"""
+Benchmark das métricas em blocos (metricas_em_blocos) contra a leitura completa.
+
+Gera um conjunto sintético em Parquet e calcula as medianas e contagens das RQ01
+a RQ06 das duas formas: carregando tudo em uma SessaoAnalise e lendo em blocos
+com esboços KLL. Mostra o tempo, o pico de memória (alocações do NumPy e do
+pandas, medidas pelo tracemalloc) e o erro de rank de cada mediana aproximada,
+que deve ficar abaixo de erro_rank(k). Também divide o conjunto em partes,
+calcula cada uma separadamente e confere que a mescla dá as mesmas contagens.
+
+Uso: python bench_metricas_em_blocos.py [--linhas 1000000] [--linhas-por-bloco 100000] [--partes 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from bench_metricas import gerar_csv
+from formato_colunar import converter
+from metricas_em_blocos import COLUNAS_ESBOCO, COLUNAS_LIDAS, MetricasEmBlocos
+from sessao_analise import SessaoAnalise
+
+
+def _medir(nome, funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{nome:<22} {duracao:8.3f} s   pico {pico / 2 ** 20:8.1f} MiB")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--linhas-por-bloco', type=int, default=100_000)
+    parser.add_argument('--partes', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        csv = os.path.join(diretorio, 'sintetico.csv')
+        caminho = os.path.join(diretorio, 'sintetico.parquet')
+        gerar_csv(csv, args.linhas)
+        converter(csv, caminho)
+        print(f"{args.linhas} linhas em Parquet\n")
+
+        def exato():
+            sessao = SessaoAnalise.de_arquivo(caminho, COLUNAS_LIDAS)
+            medianas = {coluna: sessao.mediana(coluna) for coluna in COLUNAS_ESBOCO}
+            return sessao, medianas
+
+        sessao, medianas = _medir('leitura completa', exato)
+        metricas = _medir('em blocos', lambda: MetricasEmBlocos.de_arquivo(caminho, args.linhas_por_bloco))
+
+        print(f"\n{'coluna':<26}{'exata':>12}{'aproximada':>12}{'erro de rank':>14}")
+        for coluna in COLUNAS_ESBOCO:
+            valores = np.sort(sessao.df[coluna].to_numpy(dtype='float64'))
+            aproximada = metricas.mediana(coluna)
+            # Com valores repetidos, qualquer rank entre o primeiro e o último do valor serve.
+            primeiro = np.searchsorted(valores, aproximada, side='left') / len(valores)
+            ultimo = np.searchsorted(valores, aproximada, side='right') / len(valores)
+            erro = 0.0 if primeiro <= 0.5 <= ultimo else min(abs(primeiro - 0.5), abs(ultimo - 0.5))
+            print(f"{coluna:<26}{medianas[coluna]:>12.3f}{aproximada:>12.3f}{erro:>13.2%}")
+        print(f"Erro de rank máximo esperado (k={metricas.k}): {metricas.erro_rank:.2%}")
+
+        assert metricas.repositorios == len(sessao.df)
+        assert metricas.total_pull_requests == sessao.df['accepted_pull_requests'].sum()
+        assert metricas.linguagens_comuns(10).to_dict() == sessao.linguagens_comuns(10).to_dict()
+
+        # Partes calculadas separadamente, como em snapshots ou processos diferentes, e mescladas.
+        limites = np.linspace(0, len(sessao.df), args.partes + 1).astype(int)
+        mescladas = MetricasEmBlocos()
+        for inicio, fim in zip(limites, limites[1:]):
+            parte = MetricasEmBlocos()
+            parte.adicionar_bloco(sessao.df.iloc[inicio:fim].copy())
+            mescladas.mesclar(MetricasEmBlocos.de_dict(parte.para_dict()))
+        assert mescladas.repositorios == metricas.repositorios
+        assert mescladas.total_pull_requests == metricas.total_pull_requests
+        assert mescladas.linguagens == metricas.linguagens
+        print(f"\nContagens exatas conferem; {args.partes} partes mescladas dão as mesmas contagens "
+              f"(mediana da idade: {mescladas.mediana('repository_age_days'):.0f} dias).")
+
+
+if __name__ == '__main__':
+    main()
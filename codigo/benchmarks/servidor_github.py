@@ -0,0 +1,420 @@
+"""
+Servidor local que imita a API do GitHub, para medir os coletores sem gastar cota.
+
+Atende os endpoints usados pelos coletores:
+- GET /search/repositories (q com stars:>=N, stars:>N, stars:A..B, stars:N e created:X..Y; 1000 resultados no máximo);
+- GET /search/issues (total_count de repo:DONO/NOME is:pr is:merged, is:issue is:open, is:issue is:closed);
+- GET /repos/{dono}/{nome}/pulls|releases|issues (uma página, com o total no cabeçalho Link);
+- GET /rate_limit;
+- POST /graphql (as consultas de consulta_repositorios.py e a contagem de sprint1/GetData.py).
+
+Os repositórios são gerados de forma determinística a partir de --semente. Toda
+resposta traz os cabeçalhos X-RateLimit-* do recurso (core, search, graphql) e
+do token; como no GitHub, a janela de --janela segundos começa na primeira
+requisição, o orçamento esgotado devolve 403 e cada consulta GraphQL desconta
+o seu custo em pontos (ver custo_graphql), informado em rateLimit { cost }. Falhas podem ser injetadas: latência, erros 5xx aleatórios, rajadas de 5xx e 403 de limite secundário.
+
+GET /__estatisticas devolve o que o servidor atendeu (requisições, status e
+latência por endpoint); POST /__zerar zera as estatísticas.
+
+Uso: python servidor_github.py [--porta 8765] [--repositorios 5000] [--latencia-ms 50] [--taxa-erro 0.01] ...
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+LINGUAGENS = ['JavaScript', 'Python', 'TypeScript', 'Go', 'Java', 'C++', 'Rust', 'C', 'Shell', None]
+LIMITE_RESULTADOS_BUSCA = 1000
+
+
+def gerar_repositorios(quantidade, semente=42):
+    """Repositórios sintéticos, do mais estrelado para o menos."""
+    rng = random.Random(semente)
+    agora = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    repos = []
+    for i in range(quantidade):
+        criado = agora - timedelta(days=rng.randint(30, 6000))
+        issues_fechadas = rng.randint(0, 20000)
+        repos.append({
+            'id': f'R_{i}',
+            'full_name': f'dono{i}/repo{i}',
+            'stars': int(400000 / (i + 1) ** 0.9) + 1,
+            'language': rng.choice(LINGUAGENS),
+            'created_at': criado,
+            'pushed_at': agora - timedelta(days=rng.randint(0, 400), seconds=rng.randint(0, 86400)),
+            'forks': rng.randint(0, 50000),
+            'size': rng.randint(10, 500000),
+            'releases': rng.randint(0, 500),
+            'merged_pulls': rng.randint(0, 30000),
+            'issues_abertas': rng.randint(0, 5000),
+            'issues_fechadas': issues_fechadas,
+        })
+    return repos
+
+
+def _iso(data):
+    return data.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def filtrar(repos, consulta):
+    """Aplica os qualificadores stars: e created: de uma consulta da busca."""
+    resultado = repos
+    for termo in consulta.split():
+        if termo.startswith('stars:'):
+            valor = termo[len('stars:'):]
+            if valor.startswith('>='):
+                minimo, maximo = int(valor[2:]), float('inf')
+            elif valor.startswith('>'):
+                minimo, maximo = int(valor[1:]) + 1, float('inf')
+            elif '..' in valor:
+                a, b = valor.split('..')
+                minimo, maximo = int(a), int(b)
+            else:
+                minimo = maximo = int(valor)
+            resultado = [repo for repo in resultado if minimo <= repo['stars'] <= maximo]
+        elif termo.startswith('created:') and '..' in termo:
+            a, b = termo[len('created:'):].split('..')
+            inicio = datetime.fromisoformat(a).replace(tzinfo=timezone.utc)
+            fim = datetime.fromisoformat(b).replace(tzinfo=timezone.utc) + timedelta(days=1)
+            resultado = [repo for repo in resultado if inicio <= repo['created_at'] < fim]
+    return resultado
+
+
+def item_busca(repo):
+    return {
+        'full_name': repo['full_name'],
+        'stargazers_count': repo['stars'],
+        'language': repo['language'],
+        'created_at': _iso(repo['created_at']),
+        'pushed_at': _iso(repo['pushed_at']),
+        'updated_at': _iso(repo['pushed_at']),
+        'open_issues_count': repo['issues_abertas'],
+        'forks_count': repo['forks'],
+        'size': repo['size'],
+    }
+
+
+def no_graphql(repo):
+    """Nó Repository com todos os campos pedidos pelos coletores; campos a mais são ignorados por eles."""
+    return {
+        'id': repo['id'],
+        'nameWithOwner': repo['full_name'],
+        'stargazers': {'totalCount': repo['stars']},
+        'stargazerCount': repo['stars'],
+        'createdAt': _iso(repo['created_at']),
+        'pushedAt': _iso(repo['pushed_at']),
+        'primaryLanguage': {'name': repo['language']} if repo['language'] else None,
+        'releases': {'totalCount': repo['releases']},
+        'issues_total': {'totalCount': repo['issues_abertas'] + repo['issues_fechadas']},
+        'pullRequests': {'totalCount': repo['merged_pulls']},
+        'issues_closed': {'totalCount': repo['issues_fechadas']},
+        'issues_abertas': {'totalCount': repo['issues_abertas']},
+        'issues_fechadas': {'totalCount': repo['issues_fechadas']},
+    }
+
+
+def custo_graphql(consulta, variaveis):
+    """
+    Custo em pontos de uma consulta GraphQL, aproximando a regra do GitHub: cada conexão
+    pedida em cada um dos N nós da lista conta uma requisição, e o custo é o total de
+    requisições dividido por 100, no mínimo 1.
+    """
+    nos = (variaveis.get('first') or len(variaveis.get('ids') or [])
+           or sum(chave.startswith('o') for chave in variaveis) or 1)
+    conexoes = consulta.count('totalCount')
+    return max(1, round((1 + nos * conexoes) / 100))
+
+
+class EstadoServidor:
+    """Dados, orçamentos de rate limit por (token, recurso) e estatísticas do servidor."""
+
+    def __init__(self, args):
+        self.args = args
+        self.repos = gerar_repositorios(args.repositorios, args.semente)
+        self.por_nome = {repo['full_name']: repo for repo in self.repos}
+        self.por_id = {repo['id']: repo for repo in self.repos}
+        self.limites = {'core': args.limite_core, 'search': args.limite_busca, 'graphql': args.limite_graphql}
+        self.inicio = time.time()
+        self.rng = random.Random(args.semente)
+        self._lock = threading.Lock()
+        self._consumo = {}
+        self.zerar()
+
+    def zerar(self):
+        with self._lock:
+            self._latencias = {}
+            self._status = {}
+
+    def registrar(self, rota, status, duracao):
+        with self._lock:
+            self._latencias.setdefault(rota, []).append(duracao)
+            self._status[str(status)] = self._status.get(str(status), 0) + 1
+
+    def estatisticas(self):
+        with self._lock:
+            por_rota = {}
+            for rota, latencias in self._latencias.items():
+                ordenadas = sorted(latencias)
+                por_rota[rota] = {
+                    'requisicoes': len(ordenadas),
+                    'p50_ms': statistics.median(ordenadas) * 1000,
+                    'p99_ms': ordenadas[max(0, int(len(ordenadas) * 0.99) - 1)] * 1000,
+                }
+            todas = sorted(latencia for latencias in self._latencias.values() for latencia in latencias)
+            return {
+                'requisicoes': len(todas),
+                'p50_ms': statistics.median(todas) * 1000 if todas else 0,
+                'p99_ms': todas[max(0, int(len(todas) * 0.99) - 1)] * 1000 if todas else 0,
+                'status': dict(self._status),
+                'por_rota': por_rota,
+            }
+
+    def consumir(self, token, recurso, custo=1):
+        """
+        Desconta `custo` do orçamento e devolve (limite, restante, reset); restante < 0 se esgotado.
+        Como no GitHub, a janela de cada (token, recurso) começa na primeira requisição depois do último reset.
+        """
+        with self._lock:
+            agora = time.time()
+            reset, usados = self._consumo.get((token, recurso), (0, 0))
+            if agora >= reset:
+                reset, usados = int(agora) + self.args.janela, 0
+            usados += custo
+            self._consumo[(token, recurso)] = (reset, usados)
+        return self.limites[recurso], self.limites[recurso] - usados, reset
+
+    def sortear(self):
+        with self._lock:
+            return self.rng.random()
+
+    def em_rajada(self):
+        a_cada = self.args.rajada_5xx_a_cada
+        return a_cada > 0 and (time.time() - self.inicio) % a_cada < self.args.rajada_5xx_duracao
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    estado = None
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo, cabecalhos=None):
+        dados = json.dumps(corpo).encode() if not isinstance(corpo, bytes) else corpo
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, str(valor))
+        self.end_headers()
+        self.wfile.write(dados)
+        return status
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def _atender(self, metodo):
+        url = urlparse(self.path)
+        corpo = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+
+        if url.path == '/__estatisticas':
+            return self._responder(200, self.estado.estatisticas())
+        if url.path == '/__zerar':
+            self.estado.zerar()
+            return self._responder(200, {'ok': True})
+
+        inicio = time.perf_counter()
+        rota, recurso = self._classificar(metodo, url.path)
+        status = self._processar(metodo, url, corpo, rota, recurso)
+        self.estado.registrar(rota, status, time.perf_counter() - inicio)
+
+    @staticmethod
+    def _classificar(metodo, caminho):
+        if caminho == '/rate_limit':
+            return 'rate_limit', None
+        if caminho == '/graphql':
+            return 'graphql', 'graphql'
+        if caminho.startswith('/search/'):
+            return caminho, 'search'
+        partes = caminho.strip('/').split('/')
+        if len(partes) == 4 and partes[0] == 'repos':
+            return f'/repos/{{dono}}/{{nome}}/{partes[3]}', 'core'
+        return caminho, 'core'
+
+    def _processar(self, metodo, url, corpo, rota, recurso):
+        args = self.estado.args
+        if rota == 'rate_limit':
+            return self._responder(200, self._rate_limit())
+
+        latencia = max(0.0, random.gauss(args.latencia_ms, args.jitter_ms)) / 1000
+        time.sleep(latencia)
+
+        if self.estado.em_rajada() or self.estado.sortear() < args.taxa_erro:
+            return self._responder(self.estado.rng.choice(args.status_erro), {'message': 'Server Error'})
+        if self.estado.sortear() < args.taxa_rate_limit:
+            return self._responder(403, {'message': 'You have exceeded a secondary rate limit.'}, {'Retry-After': 1})
+
+        pedido, custo = None, 1
+        if rota == 'graphql':
+            pedido = json.loads(corpo or b'{}')
+            custo = custo_graphql(pedido.get('query', ''), pedido.get('variables') or {})
+
+        token = self.headers.get('Authorization', '')
+        limite, restante, reset = self.estado.consumir(token, recurso, custo)
+        cabecalhos = {
+            'X-RateLimit-Limit': limite,
+            'X-RateLimit-Remaining': max(restante, 0),
+            'X-RateLimit-Reset': reset,
+            'X-RateLimit-Resource': recurso,
+        }
+        if restante < 0:
+            return self._responder(403, {'message': 'API rate limit exceeded.'}, cabecalhos)
+
+        if rota == 'graphql':
+            return self._graphql(pedido, custo, cabecalhos)
+        if rota == '/search/repositories':
+            return self._busca_repositorios(parse_qs(url.query), cabecalhos)
+        if rota == '/search/issues':
+            return self._busca_issues(parse_qs(url.query), cabecalhos)
+        if rota.startswith('/repos/'):
+            return self._listagem(url, cabecalhos)
+        return self._responder(404, {'message': 'Not Found'}, cabecalhos)
+
+    def _rate_limit(self):
+        token = self.headers.get('Authorization', '')
+        recursos = {}
+        for recurso, limite in self.estado.limites.items():
+            # Consultar /rate_limit não desconta do orçamento.
+            _, restante, reset = self.estado.consumir(token, recurso, custo=0)
+            recursos[recurso] = {'limit': limite, 'remaining': restante, 'reset': reset, 'used': limite - restante}
+        return {'resources': recursos}
+
+    def _busca_repositorios(self, params, cabecalhos):
+        consulta = params.get('q', [''])[0]
+        por_pagina = min(int(params.get('per_page', ['30'])[0]), 100)
+        pagina = int(params.get('page', ['1'])[0])
+        if pagina * por_pagina > LIMITE_RESULTADOS_BUSCA:
+            return self._responder(422, {'message': 'Only the first 1000 search results are available'}, cabecalhos)
+
+        encontrados = filtrar(self.estado.repos, consulta)
+        itens = encontrados[(pagina - 1) * por_pagina:pagina * por_pagina]
+        return self._responder(200, {
+            'total_count': len(encontrados),
+            'incomplete_results': False,
+            'items': [item_busca(repo) for repo in itens],
+        }, cabecalhos)
+
+    def _busca_issues(self, params, cabecalhos):
+        consulta = params.get('q', [''])[0]
+        nome = re.search(r'repo:(\S+)', consulta)
+        repo = self.estado.por_nome.get(nome.group(1)) if nome else None
+        if repo is None:
+            return self._responder(422, {'message': 'Validation Failed'}, cabecalhos)
+        if 'is:pr' in consulta:
+            total = repo['merged_pulls']
+        elif 'is:open' in consulta:
+            total = repo['issues_abertas']
+        else:
+            total = repo['issues_fechadas']
+        return self._responder(200, {'total_count': total, 'incomplete_results': False, 'items': []}, cabecalhos)
+
+    def _listagem(self, url, cabecalhos):
+        _, dono, nome, tipo = url.path.strip('/').split('/')
+        repo = self.estado.por_nome.get(f'{dono}/{nome}')
+        if repo is None:
+            return self._responder(404, {'message': 'Not Found'}, cabecalhos)
+        total = {'releases': repo['releases'], 'pulls': repo['merged_pulls'],
+                 'issues': repo['issues_abertas']}.get(tipo, 0)
+        if total > 1:
+            # Com per_page=1, a página 'last' é o total de itens, como na API real.
+            params = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+            params.update(per_page=1, page=total)
+            ultima = f'http://{self.headers.get("Host")}{url.path}?{urlencode(params)}'
+            cabecalhos = dict(cabecalhos, Link=f'<{ultima}>; rel="last"')
+        return self._responder(200, [{'id': 1}] if total else [], cabecalhos)
+
+    def _graphql(self, pedido, custo, cabecalhos):
+        consulta = pedido.get('query', '')
+        variaveis = pedido.get('variables') or {}
+        operacao = re.search(r'query\s+(\w+)', consulta)
+        operacao = operacao.group(1) if operacao else ''
+
+        if operacao in ('TopStarredRepositories', 'TotalBusca'):
+            encontrados = filtrar(self.estado.repos, variaveis.get('consulta', ''))
+            if operacao == 'TotalBusca':
+                dados = {'search': {'repositoryCount': len(encontrados)}}
+            else:
+                encontrados = encontrados[:LIMITE_RESULTADOS_BUSCA]
+                inicio = int(variaveis.get('cursor') or 0)
+                fim = inicio + variaveis.get('first', 10)
+                dados = {'search': {
+                    'pageInfo': {'endCursor': str(min(fim, len(encontrados))), 'hasNextPage': fim < len(encontrados)},
+                    'nodes': [no_graphql(repo) for repo in encontrados[inicio:fim]],
+                }}
+        elif operacao == 'MaisEstrelas':
+            dados = {'search': {'nodes': [no_graphql(self.estado.repos[0])]}}
+        elif operacao == 'ContagensRepositorios':
+            dados = {'nodes': [no_graphql(self.estado.por_id[i]) if i in self.estado.por_id else None
+                               for i in variaveis.get('ids', [])]}
+        elif operacao == 'AtualizacaoEmLote':
+            dados = {}
+            for chave, dono in variaveis.items():
+                if chave.startswith('o'):
+                    repo = self.estado.por_nome.get(f"{dono}/{variaveis['n' + chave[1:]]}")
+                    dados['r' + chave[1:]] = no_graphql(repo) if repo else None
+        elif operacao == 'Contagens':
+            repo = self.estado.por_nome.get(f"{variaveis.get('owner')}/{variaveis.get('name')}")
+            dados = {'repository': no_graphql(repo) if repo else None}
+        else:
+            return self._responder(200, {'errors': [{'message': f"operação '{operacao}' não simulada"}]}, cabecalhos)
+
+        if 'rateLimit' in consulta:
+            dados['rateLimit'] = {'cost': custo, 'remaining': int(cabecalhos['X-RateLimit-Remaining']),
+                                  'resetAt': _iso(datetime.fromtimestamp(cabecalhos['X-RateLimit-Reset'], timezone.utc))}
+        return self._responder(200, {'data': dados}, cabecalhos)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--porta', type=int, default=8765, help='0 escolhe uma porta livre.')
+    parser.add_argument('--repositorios', type=int, default=5000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--latencia-ms', type=float, default=50, help='Latência média de cada resposta.')
+    parser.add_argument('--jitter-ms', type=float, default=10, help='Desvio padrão da latência.')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração das respostas com erro 5xx.')
+    parser.add_argument('--status-erro', type=int, nargs='+', default=[502, 504], help='Status dos erros 5xx.')
+    parser.add_argument('--taxa-rate-limit', type=float, default=0.0, help='Fração das respostas com 403 de limite secundário.')
+    parser.add_argument('--rajada-5xx-a-cada', type=float, default=0, help='Segundos entre rajadas de 5xx (0 desliga).')
+    parser.add_argument('--rajada-5xx-duracao', type=float, default=1, help='Duração de cada rajada, em segundos.')
+    parser.add_argument('--limite-core', type=int, default=5000)
+    parser.add_argument('--limite-busca', type=int, default=30)
+    parser.add_argument('--limite-graphql', type=int, default=5000)
+    parser.add_argument('--janela', type=int, default=60, help='Duração da janela de rate limit, em segundos.')
+    return parser
+
+
+def iniciar(args):
+    """Cria o servidor (ainda sem atender) com as opções de criar_parser()."""
+    Handler.estado = EstadoServidor(args)
+    return ThreadingHTTPServer(('127.0.0.1', args.porta), Handler)
+
+
+if __name__ == '__main__':
+    servidor = iniciar(criar_parser().parse_args())
+    # A primeira linha da saída é lida pelo bench_coletores.py para descobrir a porta.
+    print(f"PORTA {servidor.server_port}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,131 @@
+"""
+Cache em disco de respostas REST com requisições condicionais (ETag / Last-Modified).
+
+Cada resposta 200 que traz ETag ou Last-Modified é guardada com o corpo. Na
+próxima coleta a requisição leva If-None-Match / If-Modified-Since; se nada
+mudou o GitHub responde 304 Not Modified, que não consome rate limit, e o corpo
+é servido do cache. Quando o diretório passa do tamanho máximo, as entradas
+usadas há mais tempo são removidas.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DIRETORIO_CACHE = os.getenv('CACHE_HTTP_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'coleta-github'))
+TAMANHO_MAXIMO_CACHE = int(os.getenv('CACHE_HTTP_MAX_MB', '200')) * 1024 * 1024
+
+# Cabeçalhos guardados junto com o corpo; Link é usado nas contagens por paginação.
+CABECALHOS_GUARDADOS = ('ETag', 'Last-Modified', 'Link', 'Content-Type')
+
+
+class CacheRespostas:
+    """Cache de respostas em disco, com um arquivo JSON por URL+parâmetros."""
+
+    def __init__(self, diretorio=DIRETORIO_CACHE, tamanho_maximo=TAMANHO_MAXIMO_CACHE):
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+        self._tamanho_atual = sum(entrada.stat().st_size for entrada in os.scandir(diretorio) if entrada.is_file())
+
+    def _caminho(self, url, params):
+        chave = url + '?' + json.dumps(params or {}, sort_keys=True)
+        return os.path.join(self.diretorio, hashlib.sha256(chave.encode()).hexdigest() + '.json')
+
+    def _ler(self, url, params):
+        caminho = self._caminho(url, params)
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Atualiza o horário de acesso usado na remoção das entradas mais antigas.
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        return entrada
+
+    def cabecalhos_condicionais(self, url, params=None):
+        """Cabeçalhos If-None-Match / If-Modified-Since para a URL, se ela estiver no cache."""
+        entrada = self._ler(url, params)
+        if not entrada:
+            return {}
+
+        cabecalhos = {}
+        if entrada['headers'].get('ETag'):
+            cabecalhos['If-None-Match'] = entrada['headers']['ETag']
+        if entrada['headers'].get('Last-Modified'):
+            cabecalhos['If-Modified-Since'] = entrada['headers']['Last-Modified']
+        return cabecalhos
+
+    def resposta(self, url, params=None):
+        """Reconstrói a resposta guardada como um requests.Response com status 200, ou None."""
+        entrada = self._ler(url, params)
+        if not entrada:
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = 'utf-8'
+        response.headers = CaseInsensitiveDict(entrada['headers'])
+        response._content = entrada['corpo'].encode('utf-8')
+        return response
+
+    def salvar(self, url, params, response):
+        """Guarda uma resposta 200 que tenha ETag ou Last-Modified."""
+        if 'ETag' not in response.headers and 'Last-Modified' not in response.headers:
+            return
+
+        entrada = {
+            'headers': {nome: response.headers[nome] for nome in CABECALHOS_GUARDADOS if nome in response.headers},
+            'corpo': response.text,
+        }
+        caminho = self._caminho(url, params)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f)
+        tamanho_novo = os.path.getsize(temporario)
+
+        with self._lock:
+            tamanho_antigo = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+            os.replace(temporario, caminho)
+            self._tamanho_atual += tamanho_novo - tamanho_antigo
+            if self._tamanho_atual > self.tamanho_maximo:
+                self._remover_antigas()
+
+    def _remover_antigas(self):
+        """Remove as entradas acessadas há mais tempo até o cache ficar em 90% do tamanho máximo."""
+        entradas = sorted(
+            (entrada for entrada in os.scandir(self.diretorio) if entrada.name.endswith('.json')),
+            key=lambda entrada: entrada.stat().st_mtime
+        )
+        for entrada in entradas:
+            if self._tamanho_atual <= self.tamanho_maximo * 0.9:
+                break
+            try:
+                tamanho = entrada.stat().st_size
+                os.remove(entrada.path)
+                self._tamanho_atual -= tamanho
+            except OSError:
+                pass
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def obter_cache():
+    """Devolve o cache compartilhado pelo processo, ou None se CACHE_HTTP=0."""
+    global _cache
+    if os.getenv('CACHE_HTTP', '1') == '0':
+        return None
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheRespostas()
+    return _cache
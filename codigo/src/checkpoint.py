@@ -0,0 +1,92 @@
+"""
+Checkpoint de coletas longas, para retomar uma execução interrompida.
+
+Cada registro concluído é acrescentado a um diário (arquivo JSON Lines) e
+gravado em disco na hora (flush + fsync). A posição da paginação (endCursor do
+GraphQL ou número da página da busca REST) fica em estado.json, que é
+substituído de forma atômica. Com retomar=True a coleta lê o que já foi feito
+e continua dali; ao final, finalizar() apaga o checkpoint.
+"""
+import json
+import os
+import shutil
+import threading
+
+
+class Checkpoint:
+    """Diários de registros concluídos e estado da paginação em um diretório."""
+
+    def __init__(self, diretorio, retomar=False):
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        self._arquivos = {}
+
+        if os.path.isdir(diretorio) and not retomar:
+            print(f"Checkpoint anterior em '{diretorio}' descartado (use --retomar para continuar de onde parou).")
+            shutil.rmtree(diretorio)
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho_diario(self, diario):
+        return os.path.join(self.diretorio, f"{diario}.jsonl")
+
+    def registros(self, diario):
+        """Lê os registros já gravados em um diário."""
+        registros = []
+        try:
+            with open(self._caminho_diario(diario), encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registros.append(json.loads(linha))
+                    except ValueError:
+                        # Última linha incompleta de uma execução interrompida no meio da escrita.
+                        break
+        except FileNotFoundError:
+            pass
+        return registros
+
+    def registrar(self, diario, registro, manter_aberto=True):
+        """
+        Acrescenta um registro ao diário e garante que ele foi gravado em disco. Com
+        `manter_aberto` False o arquivo é fechado logo depois, para diários de um registro só.
+        """
+        linha = json.dumps(registro, ensure_ascii=False) + '\n'
+        with self._lock:
+            arquivo = self._arquivos.get(diario)
+            if arquivo is None:
+                arquivo = self._arquivos[diario] = open(self._caminho_diario(diario), 'a', encoding='utf-8')
+            arquivo.write(linha)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+            if not manter_aberto:
+                del self._arquivos[diario]
+                arquivo.close()
+
+    def estado(self):
+        """Devolve o último estado salvo (ex.: {'cursor': ...} ou {'pagina': ...})."""
+        try:
+            with open(os.path.join(self.diretorio, 'estado.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def salvar_estado(self, **estado):
+        """Grava o estado de forma atômica: ou o estado antigo ou o novo, nunca um arquivo pela metade."""
+        caminho = os.path.join(self.diretorio, 'estado.json')
+        temporario = caminho + '.tmp'
+        with self._lock:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(estado, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, caminho)
+
+    def fechar(self):
+        with self._lock:
+            for arquivo in self._arquivos.values():
+                arquivo.close()
+            self._arquivos.clear()
+
+    def finalizar(self):
+        """Apaga o checkpoint depois que a coleta terminou com sucesso."""
+        self.fechar()
+        shutil.rmtree(self.diretorio, ignore_errors=True)
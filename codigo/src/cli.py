@@ -0,0 +1,96 @@
+"""
+Linha de comando única para a coleta, as métricas e os gráficos.
+
+Cada subcomando só importa o que usa. `metricas` imprime as RQ01 a RQ06 com
+pandas, sem carregar matplotlib nem seaborn. Antes, metricas_relatorio.py
+importava matplotlib, seaborn e scikit-learn ao ser carregado, o que levava
+segundos na primeira execução de cada contêiner (ver benchmarks/bench_inicializacao.py).
+
+Subcomandos (com os nomes em inglês como alternativa):
+- coletar (collect): roda consulta_repositorios.py, ou sprint1/GetData.py com --rest;
+  as demais opções vão para o coletor (--total, --retomar, --perfil...);
+- metricas (metrics): mostra as métricas das RQ01 a RQ06 em texto;
+- graficos (plots): roda metricas_relatorio.py; as demais opções vão para ele
+  (--graficos, --refazer, --processos...).
+
+Uso: python cli.py coletar [--rest] [OPÇÕES DO COLETOR]
+     python cli.py metricas [--entrada ARQUIVO] [--em-blocos [LINHAS]]
+     python cli.py graficos [OPÇÕES DO RELATÓRIO]
+"""
+import argparse
+import os
+import runpy
+import sys
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+COLETOR_GRAPHQL = os.path.join(DIRETORIO, 'consulta_repositorios.py')
+COLETOR_REST = os.path.join(DIRETORIO, '..', '..', 'sprint1', 'GetData.py')
+RELATORIO = os.path.join(DIRETORIO, 'metricas_relatorio.py')
+
+
+def executar_script(caminho, argumentos):
+    """Roda `caminho` como se fosse chamado direto da linha de comando com `argumentos`."""
+    sys.argv = [caminho] + list(argumentos)
+    runpy.run_path(caminho, run_name='__main__')
+
+
+def coletar(args, resto):
+    executar_script(COLETOR_REST if args.rest else COLETOR_GRAPHQL, resto)
+
+
+def metricas(args, resto):
+    from metricas_relatorio import COLUNAS_RQ01_RQ06, abrir_sessao, arquivo_de_dados, metricas_repositorios_populares
+
+    arquivo = arquivo_de_dados(args.entrada)
+    if args.em_blocos is not False:
+        from metricas_em_blocos import LINHAS_POR_BLOCO, calcular
+
+        if not os.path.exists(arquivo):
+            print(f"\nErro: O arquivo '{arquivo}' não foi encontrado.")
+            return
+        calcular([arquivo], args.em_blocos or LINHAS_POR_BLOCO).imprimir()
+        return
+
+    # abrir_sessao() já avisa quando o arquivo não existe.
+    sessao = abrir_sessao(arquivo, COLUNAS_RQ01_RQ06)
+    if sessao is None:
+        return
+    metricas_repositorios_populares(sessao)
+
+
+def graficos(args, resto):
+    executar_script(RELATORIO, resto)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Coleta e análise dos repositórios mais populares do GitHub.')
+    subcomandos = parser.add_subparsers(dest='comando', required=True, metavar='{coletar,metricas,graficos}')
+
+    sub = subcomandos.add_parser('coletar', aliases=['collect'],
+                                 help='Coleta os repositórios; as demais opções vão para o coletor.')
+    sub.add_argument('--rest', action='store_true',
+                     help='Usa o coletor REST (sprint1/GetData.py) em vez do GraphQL (consulta_repositorios.py).')
+    sub.set_defaults(executar=coletar, repassa=True)
+
+    sub = subcomandos.add_parser('metricas', aliases=['metrics'],
+                                 help='Mostra as métricas das RQ01 a RQ06, sem gerar gráficos.')
+    sub.add_argument('--entrada',
+                     help='Conjunto de repositórios (.parquet, .feather ou .csv). Padrão: o mesmo de metricas_relatorio.py.')
+    # Sem LINHAS fica None e vale LINHAS_POR_BLOCO; metricas_em_blocos não é importado só para montar as opções.
+    sub.add_argument('--em-blocos', nargs='?', type=int, default=False, const=None, metavar='LINHAS',
+                     help='Lê o conjunto em blocos de LINHAS linhas (padrão: LINHAS_POR_BLOCO de metricas_em_blocos), '
+                          'com memória limitada.')
+    sub.set_defaults(executar=metricas, repassa=False)
+
+    sub = subcomandos.add_parser('graficos', aliases=['plots'],
+                                 help='Gera os gráficos das RQ01 a RQ07; as demais opções vão para metricas_relatorio.py.')
+    sub.set_defaults(executar=graficos, repassa=True)
+
+    args, resto = parser.parse_known_args(argv)
+    if resto and not args.repassa:
+        parser.error(f"opções não reconhecidas: {' '.join(resto)}")
+    args.executar(args, resto)
+
+
+if __name__ == '__main__':
+    main()
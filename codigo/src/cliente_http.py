@@ -0,0 +1,80 @@
+"""
+Cliente HTTP compartilhado pelos coletores REST (sprint1/GetData.py) e GraphQL
+(consulta_repositorios.py).
+
+Todas as requisições passam por uma única requests.Session, que mantém as
+conexões abertas (keep-alive) e as reaproveita entre chamadas. Isso evita um
+novo handshake TCP+TLS para cada uma das milhares de requisições de uma coleta.
+requisitar() também escolhe o token (pool_tokens), passa pelo agendador de rate limit (limite_taxa)
+e registra a requisição e a espera pela vez na instrumentação (instrumentacao).
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentacao import obter_instrumentacao
+from limite_taxa import recurso_da_url
+from pool_tokens import obter_pool
+
+# Conexões mantidas por host. Deve ser pelo menos o número de requisições
+# simultâneas dos coletores (MAX_CONCORRENCIA), senão as threads esperam por uma conexão livre.
+TAMANHO_POOL = int(os.getenv('TAMANHO_POOL_HTTP', '32'))
+
+_sessao = None
+_lock = threading.Lock()
+
+
+def criar_sessao(tamanho_pool=TAMANHO_POOL):
+    """Cria uma sessão com pool de conexões persistentes e respostas comprimidas."""
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamanho_pool, pool_block=True)
+    sessao.mount('https://', adaptador)
+    sessao.mount('http://', adaptador)
+    sessao.headers.update({'Accept-Encoding': 'gzip, deflate'})
+    return sessao
+
+
+def obter_sessao():
+    """Devolve a sessão compartilhada pelo processo, criando-a na primeira chamada."""
+    global _sessao
+    with _lock:
+        if _sessao is None:
+            _sessao = criar_sessao()
+    return _sessao
+
+
+def requisitar(metodo, url, recurso=None, custo=1, tentativa=1, **kwargs):
+    """
+    Envia uma requisição pela sessão compartilhada com o token do pool que tem mais
+    orçamento no recurso, esperando antes a vez no rate limit desse token e
+    atualizando-o com os cabeçalhos da resposta. `tentativa` (1 na primeira vez)
+    só vai para a instrumentação, que conta as repetições.
+    """
+    recurso = recurso or recurso_da_url(url)
+    pool = obter_pool()
+    token = pool.escolher(recurso)
+    agendador = pool.agendador(token)
+    instrumentacao = obter_instrumentacao()
+    instrumentacao.registrar_espera('rate_limit', agendador.adquirir(recurso, custo))
+
+    headers = dict(kwargs.pop('headers', None) or {})
+    if token:
+        headers['Authorization'] = f'bearer {token}'
+
+    inicio = time.perf_counter()
+    try:
+        response = obter_sessao().request(metodo, url, headers=headers, **kwargs)
+    except requests.exceptions.RequestException as e:
+        instrumentacao.registrar_requisicao(url, type(e).__name__, time.perf_counter() - inicio, tentativa, custo=custo)
+        raise
+    if response.status_code == 304:
+        # Respostas 304 não são descontadas do rate limit.
+        agendador.devolver(recurso, custo)
+        custo = 0
+    instrumentacao.registrar_requisicao(url, response.status_code, time.perf_counter() - inicio, tentativa,
+                                        len(response.content), custo)
+    pool.registrar(token, recurso, response)
+    return response
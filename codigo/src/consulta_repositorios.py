@@ -1,29 +1,36 @@
+import hashlib
+import os
+import random
+import time
+import argparse
 import requests
 import pandas as pd
 from datetime import datetime
 
-GITHUB_TOKEN = ' Insira o token '
-API_URL = 'https://api.github.com/graphql'
+from cliente_http import requisitar
+from checkpoint import Checkpoint
+from escrita_incremental import EscritorIncremental
+from formato_colunar import carregar, converter, esquema, formato, salvar, tipar
+from historico import ARQUIVO_HISTORICO, HistoricoRepositorios
+from instrumentacao import imprimir_resumo, obter_instrumentacao
+from metricas import adicionar_metricas
+from perfilamento import etapa, perfilar
+from planejador_busca import LIMITE_BUSCA, percorrer_faixas, planejar_top_repositorios
+
+# Vários tokens podem ser informados em GITHUB_TOKENS (separados por vírgula); ver pool_tokens.
+GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '')
+# GITHUB_API_URL aponta o coletor para outro servidor, como o simulador de codigo/benchmarks.
+API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/') + '/graphql'
 HEADERS = {
     'Authorization': f'bearer {GITHUB_TOKEN}',
 }
 
-# Na consulta GraphQL, configurei para buscar apenas 1 repositório por página. 
-# Quando tenei valores maiores, a api do github apresentou erro de timeout.
-query_consolidada = """
-  query TopStarredRepositories($cursor: String) {
-    search(
-      query: "stars:>1"
-      type: REPOSITORY
-      first: 1
-      after: $cursor
-    ) {
-      pageInfo {
-        endCursor
-        hasNextPage
-      }
-      nodes {
-        ... on Repository {
+# Antes a consulta buscava apenas 1 repositório por página, pois valores maiores
+# causavam timeout na API do GitHub. Agora o tamanho da página é ajustado pelo
+# PaginadorAdaptativo: cresce enquanto as respostas são rápidas e diminui após
+# timeouts ou erros 502/504.
+CAMPOS_LEVES = """
+          id
           nameWithOwner
           stargazers {
             totalCount
@@ -36,63 +43,532 @@ query_consolidada = """
           releases {
             totalCount
           }
-          pullRequests(states: MERGED) {
+          issues_total: issues {
             totalCount
           }
-          issues_total: issues {
+"""
+
+# Contagens caras: são elas que fazem páginas grandes estourarem o tempo limite.
+CAMPOS_PESADOS = """
+          pullRequests(states: MERGED) {
             totalCount
           }
           issues_closed: issues(states: CLOSED) {
             totalCount
           }
+"""
+
+QUERY_BUSCA = """
+  query TopStarredRepositories($consulta: String!, $cursor: String, $first: Int!) {
+    rateLimit {
+      cost
+    }
+    search(
+      query: $consulta
+      type: REPOSITORY
+      first: $first
+      after: $cursor
+    ) {
+      pageInfo {
+        endCursor
+        hasNextPage
+      }
+      nodes {
+        ... on Repository {%s
         }
       }
     }
   }
 """
 
+query_consolidada = QUERY_BUSCA % (CAMPOS_LEVES + CAMPOS_PESADOS)
+query_leve = QUERY_BUSCA % CAMPOS_LEVES
+
+query_total_busca = """
+  query TotalBusca($consulta: String!) {
+    rateLimit {
+      cost
+    }
+    search(query: $consulta, type: REPOSITORY, first: 1) {
+      repositoryCount
+    }
+  }
+"""
+
+query_mais_estrelas = """
+  query MaisEstrelas {
+    rateLimit {
+      cost
+    }
+    search(query: "stars:>1 sort:stars-desc", type: REPOSITORY, first: 1) {
+      nodes {
+        ... on Repository {
+          stargazerCount
+        }
+      }
+    }
+  }
+"""
+
+query_contagens = """
+  query ContagensRepositorios($ids: [ID!]!) {
+    rateLimit {
+      cost
+    }
+    nodes(ids: $ids) {
+      ... on Repository {
+          id%s
+      }
+    }
+  }
+""" % CAMPOS_PESADOS
+
+TIMEOUT_REQUISICAO = 60
+
+CONSULTA_PADRAO = 'stars:>1'
+
+DIRETORIO_CHECKPOINT = 'checkpoint_coleta'
+ARQUIVO_SAIDA = 'repositorios_populares.parquet'
+ARQUIVO_CSV = 'repositorios_populares.csv'
+TOTAL_REPOSITORIOS = 1000
+
+# Status que o GitHub devolve quando a consulta demora demais para ser resolvida.
+STATUS_TIMEOUT = (502, 504)
+
+# Vezes que a mesma consulta é repetida após um 403/429 de rate limit antes de desistir.
+MAX_ESPERAS_RATE_LIMIT = 5
+
+
+class ConsultaLentaError(Exception):
+    """A API não conseguiu responder a consulta a tempo (timeout, 502 ou 504)."""
+
+
+def executar_consulta(query, variables, custo=1, tentativa=1):
+    """
+    Executa uma consulta GraphQL e devolve (resultado, segundos).
+    Lança ConsultaLentaError quando a API não consegue responder a tempo.
+    `tentativa` conta as vezes que a mesma página ou lote foi pedido, reduzido após consultas lentas.
+    """
+    inicio = time.monotonic()
+    try:
+        result = exec_query_graphql(query, variables, custo, tentativa)
+    except requests.exceptions.Timeout as err:
+        raise ConsultaLentaError(str(err)) from err
+    except requests.exceptions.HTTPError as err:
+        if err.response is not None and err.response.status_code in STATUS_TIMEOUT:
+            raise ConsultaLentaError(str(err)) from err
+        raise
+    duracao = time.monotonic() - inicio
+
+    # Timeouts internos do GitHub podem vir como status 200 com 'errors' e sem dados.
+    if result.get('errors') and not result.get('data'):
+        raise ConsultaLentaError(result['errors'][0].get('message', 'erro desconhecido'))
+
+    return result, duracao
+
+
+class PaginadorAdaptativo:
+    """
+    Percorre a busca ajustando o parâmetro `first` a cada página.
+
+    O tamanho dobra enquanto as respostas chegam em menos de `tempo_rapido`
+    segundos e cai pela metade após um timeout. Se mesmo páginas pequenas
+    falharem com as contagens caras, o paginador passa para o modo separado:
+    busca a página sem essas contagens e as obtém depois, em lotes de `nodes(ids:)`.
+
+    Com `anteriores` (linhas de uma coleta anterior por nome, ver carregar_anteriores)
+    o paginador trabalha em modo delta: sempre no modo separado, e as contagens
+    caras só são buscadas para repositórios novos ou cujo pushedAt mudou. Os
+    demais reaproveitam as contagens da coleta anterior.
+    """
+
+    def __init__(self, consulta=CONSULTA_PADRAO, tamanho_inicial=10, tamanho_maximo=100, tempo_rapido=5.0, minimo_modo_completo=5,
+                 anteriores=None):
+        self.consulta = consulta
+        self.tamanho = tamanho_inicial
+        self.tamanho_maximo = tamanho_maximo
+        self.tempo_rapido = tempo_rapido
+        self.minimo_modo_completo = minimo_modo_completo
+        self.anteriores = anteriores
+        self.modo_separado = anteriores is not None
+        self.tamanho_lote_contagens = tamanho_inicial
+        self.requisicoes = 0
+        self.reaproveitados = 0
+
+    def _executar(self, query, variables, tentativa=1):
+        """Executa a consulta e devolve (dados, segundos). Lança ConsultaLentaError em timeouts."""
+        self.requisicoes += 1
+        result, duracao = executar_consulta(query, variables, tentativa=tentativa)
+        return result.get('data') or {}, duracao
+
+    def _ajustar(self, atual, duracao):
+        if duracao < self.tempo_rapido:
+            return min(atual * 2, self.tamanho_maximo)
+        return atual
+
+    def proxima_pagina(self, cursor, restantes=None):
+        """
+        Busca a página que começa em `cursor` e devolve (repositórios, pageInfo).
+        Com `restantes`, a página não passa desse número de repositórios, para não buscar
+        contagens de linhas que seriam descartadas.
+        """
+        tentativa = 1
+        while True:
+            query = query_leve if self.modo_separado else query_consolidada
+            first = self.tamanho if restantes is None else max(1, min(self.tamanho, restantes))
+            try:
+                data, duracao = self._executar(query, {'consulta': self.consulta, 'cursor': cursor, 'first': first},
+                                               tentativa)
+            except ConsultaLentaError as err:
+                tentativa += 1
+                novo_tamanho = max(1, first // 2)
+                print(f"Consulta lenta com first={first} ({err}). Reduzindo para {novo_tamanho}.")
+                if not self.modo_separado and novo_tamanho < self.minimo_modo_completo:
+                    print("Separando as contagens de PRs mergeados e issues fechadas em consultas próprias.")
+                    self.modo_separado = True
+                    continue
+                if first == 1:
+                    raise
+                self.tamanho = novo_tamanho
+                continue
+
+            self.tamanho = self._ajustar(self.tamanho, duracao)
+            search = data.get('search', {})
+            repos = [repo for repo in search.get('nodes', []) if repo]
+
+            if self.modo_separado:
+                with etapa('detalhes'):
+                    self._completar_contagens(self._reaproveitar_contagens(repos))
+
+            return repos, search.get('pageInfo', {})
 
-def main():
-    """Função principal para coletar e salvar os dados."""
-    todos_repos = []
+    def _reaproveitar_contagens(self, repos):
+        """
+        Copia as contagens caras da coleta anterior para os repositórios sem push desde
+        então e devolve os que ainda precisam delas.
+        """
+        if self.anteriores is None:
+            return repos
+
+        pendentes = []
+        for repo in repos:
+            anterior = self.anteriores.get(repo.get('nameWithOwner'))
+            if anterior is None or not mesmo_instante(anterior['last_update_date'], repo.get('pushedAt')):
+                pendentes.append(repo)
+                continue
+            repo['pullRequests'] = {'totalCount': anterior['accepted_pull_requests']}
+            repo['issues_closed'] = {'totalCount': anterior['closed_issues']}
+            self.reaproveitados += 1
+        return pendentes
+
+    def _completar_contagens(self, repos):
+        """Busca as contagens caras em lotes de tamanho adaptativo e as adiciona aos repositórios."""
+        por_id = {repo['id']: repo for repo in repos}
+        pendentes = list(por_id)
+        tentativa = 1
+
+        while pendentes:
+            lote = pendentes[:self.tamanho_lote_contagens]
+            try:
+                data, duracao = self._executar(query_contagens, {'ids': lote}, tentativa)
+            except ConsultaLentaError:
+                tentativa += 1
+                if self.tamanho_lote_contagens == 1:
+                    raise
+                self.tamanho_lote_contagens = max(1, self.tamanho_lote_contagens // 2)
+                continue
+
+            for node in data.get('nodes', []):
+                if node and node.get('id') in por_id:
+                    por_id[node['id']].update(node)
+
+            pendentes = pendentes[len(lote):]
+            tentativa = 1
+            self.tamanho_lote_contagens = self._ajustar(self.tamanho_lote_contagens, duracao)
+
+
+def query_repositorios_em_lote(nomes):
+    """
+    Monta uma consulta com um bloco `repository(owner:, name:)` com alias para cada
+    repositório de `nomes` (no formato 'dono/nome'). Devolve (query, variables).
+    """
+    declaracoes = []
+    blocos = []
+    variables = {}
+    for i, nome in enumerate(nomes):
+        owner, name = nome.split('/', 1)
+        declaracoes.append(f'$o{i}: String!, $n{i}: String!')
+        blocos.append(f'    r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...CamposRepositorio }}')
+        variables[f'o{i}'] = owner
+        variables[f'n{i}'] = name
+
+    query = """
+  query AtualizacaoEmLote(%s) {
+    rateLimit {
+      cost
+      remaining
+      resetAt
+    }
+%s
+  }
+
+  fragment CamposRepositorio on Repository {%s
+  }
+""" % (', '.join(declaracoes), '\n'.join(blocos), CAMPOS_LEVES + CAMPOS_PESADOS)
+    return query, variables
+
+
+def atualizar_csv_em_lote(arq_csv, arq_saida=None, tamanho_inicial=20, tamanho_maximo=50, custo_alvo=1):
+    """
+    Atualiza as métricas dos repositórios de um CSV já existente sem refazer a busca.
+
+    Cada requisição consulta um lote de repositórios por alias. O tamanho do lote é
+    ajustado pelo campo `rateLimit { cost }` da resposta anterior, buscando o maior
+    lote que custe no máximo `custo_alvo` pontos; timeouts reduzem o lote pela metade.
+    O custo do último lote é reservado no rate limit antes do próximo; o pool de
+    tokens segura a requisição se nenhum token tiver pontos para ela.
+    """
+    df_anterior = carregar(arq_csv)
+    if df_anterior.empty:
+        print("\nArquivo CSV vazio, não há repositórios para atualizar.")
+        return
+
+    colunas_base = ['repository', 'stars', 'creation_date', 'last_update_date', 'primary_language',
+                    'total_releases', 'accepted_pull_requests', 'total_issues', 'closed_issues']
+    linhas = df_anterior[colunas_base].to_dict('records')
+    nomes = [linha['repository'] for linha in linhas]
+
+    tamanho = tamanho_inicial
+    custo_lote = custo_alvo
+    requisicoes = 0
+    nao_encontrados = 0
+    pos = 0
+    tentativa = 1
+
+    print(f"Atualizando {len(nomes)} repositórios de '{arq_csv}' em lotes...")
+
+    while pos < len(nomes):
+        lote = nomes[pos:pos + tamanho]
+        query, variables = query_repositorios_em_lote(lote)
+
+        try:
+            requisicoes += 1
+            result, _ = executar_consulta(query, variables, custo_lote, tentativa)
+        except ConsultaLentaError as err:
+            tentativa += 1
+            if tamanho == 1:
+                raise
+            tamanho = max(1, tamanho // 2)
+            print(f"Lote lento ({err}). Reduzindo o lote para {tamanho} repositórios.")
+            continue
+
+        data = result.get('data') or {}
+        for i in range(len(lote)):
+            repo = data.get(f'r{i}')
+            if repo:
+                linhas[pos + i] = montar_linha(repo)
+            else:
+                nao_encontrados += 1
+
+        pos += len(lote)
+        tentativa = 1
+        print(f"Lote de {len(lote)} repositórios atualizado ({pos}/{len(nomes)}).")
+
+        rate_limit = data.get('rateLimit') or {}
+        custo_lote = rate_limit.get('cost', custo_lote) or custo_alvo
+        if custo_lote <= custo_alvo:
+            tamanho = min(tamanho * 2, tamanho_maximo)
+        else:
+            # O lote ficou caro demais: reduz proporcionalmente e não volta a crescer além disso.
+            tamanho = tamanho_maximo = max(1, int(tamanho * custo_alvo / custo_lote))
+
+    if nao_encontrados:
+        print(f"{nao_encontrados} repositórios não foram encontrados e mantiveram os valores anteriores.")
+    print(f"Atualização finalizada com {requisicoes} requisições à API.")
+
+    return gera_relatorio_csv(linhas, arq_saida or arq_csv)
+
+
+def montar_linha(repo):
+    """Converte um nó Repository da API GraphQL em uma linha do CSV."""
+    lang = repo.get('primaryLanguage')
+    return {
+        'repository': repo.get('nameWithOwner'),
+        'stars': repo.get('stargazers', {}).get('totalCount'),
+        'creation_date': repo.get('createdAt'),
+        'last_update_date': repo.get('pushedAt'),
+        'primary_language': lang['name'] if lang else None,
+        'total_releases': repo.get('releases', {}).get('totalCount'),
+        'accepted_pull_requests': repo.get('pullRequests', {}).get('totalCount'),
+        'total_issues': repo.get('issues_total', {}).get('totalCount'),
+        'closed_issues': repo.get('issues_closed', {}).get('totalCount'),
+    }
+
+
+def mesmo_instante(a, b):
+    """Compara duas datas que podem vir como texto ISO 8601 ou Timestamp."""
+    if a is None or b is None or pd.isna(a) or pd.isna(b):
+        return False
+    return pd.Timestamp(a) == pd.Timestamp(b)
+
+
+def carregar_anteriores(caminho):
+    """
+    Lê de uma coleta anterior o pushedAt e as contagens caras de cada repositório,
+    para o modo delta. Devolve {nome: linha}, vazio se o arquivo não existir.
+    """
+    if not os.path.exists(caminho):
+        print(f"Modo delta: '{caminho}' não existe; todos os repositórios serão coletados por completo.")
+        return {}
+    df = carregar(caminho, ['repository', 'last_update_date', 'accepted_pull_requests', 'closed_issues'])
+    print(f"Modo delta: {len(df)} repositórios da coleta anterior em '{caminho}'.")
+    return {linha['repository']: linha for linha in df.to_dict('records')}
+
+
+def executar_com_novas_tentativas(query, variables, max_tentativas=5, delay_inicial=1):
+    """
+    executar_consulta para consultas que não têm como ser reduzidas (contagens da busca e o
+    repositório com mais estrelas). Consultas lentas, erros 5xx e falhas de conexão são
+    repetidos com backoff exponencial; na última tentativa o erro é relançado.
+    """
+    for tentativa in range(1, max_tentativas + 1):
+        try:
+            return executar_consulta(query, variables, tentativa=tentativa)
+        except (ConsultaLentaError, requests.exceptions.ConnectionError, requests.exceptions.HTTPError) as err:
+            resposta = getattr(err, 'response', None)
+            if tentativa == max_tentativas or (resposta is not None and resposta.status_code < 500):
+                raise
+            espera = delay_inicial * 2 ** (tentativa - 1) + random.uniform(0, 1)
+            print(f"Falha temporária ({err}). Tentando novamente em {espera:.1f} segundos...")
+            obter_instrumentacao().dormir(espera, 'backoff')
+
+
+def contar_busca(consulta):
+    """Total de repositórios que uma consulta de busca encontra."""
+    result, _ = executar_com_novas_tentativas(query_total_busca, {'consulta': consulta})
+    return result['data']['search']['repositoryCount']
+
+
+def buscar_faixa(consulta, anteriores=None):
+    """Coleta todas as páginas de uma consulta de busca (no máximo 1000 repositórios)."""
+    paginador = PaginadorAdaptativo(consulta, anteriores=anteriores)
+    linhas = []
     cursor = None
-    num_pag = 0
+    while True:
+        repos, page_info = paginador.proxima_pagina(cursor)
+        linhas.extend(montar_linha(repo) for repo in repos)
+        cursor = page_info.get('endCursor')
+        if not page_info.get('hasNextPage') or not repos:
+            return linhas
+
+
+def diario_faixa(consulta):
+    """Nome do diário do checkpoint com as linhas de uma faixa."""
+    return 'faixa_' + hashlib.sha1(consulta.encode('utf-8')).hexdigest()[:16]
+
+
+def coletar_em_faixas(total, retomar=False, nome_arquivo=ARQUIVO_SAIDA, max_paralelo=4, anteriores=None):
+    """
+    Coleta mais repositórios do que o limite de 1000 da busca, dividindo-a em faixas de
+    estrelas que são buscadas em paralelo. As linhas de cada faixa vão para o checkpoint
+    quando ela termina e para o escritor quando ela e as anteriores terminaram; só os nomes
+    já gravados ficam em memória.
+    """
+    checkpoint = Checkpoint(DIRETORIO_CHECKPOINT, retomar)
+    concluidas = {registro['consulta'] for registro in checkpoint.registros('faixas')}
+
+    def buscar(consulta):
+        if consulta in concluidas:
+            return checkpoint.registros(diario_faixa(consulta))[-1]['linhas']
+        linhas = buscar_faixa(consulta, anteriores)
+        checkpoint.registrar(diario_faixa(consulta), {'linhas': linhas}, manter_aberto=False)
+        checkpoint.registrar('faixas', {'consulta': consulta})
+        return linhas
+
+    print(f"Iniciando a coleta dos {total} repositórios mais populares em faixas de estrelas...")
+    if concluidas:
+        print(f"Retomando: {len(concluidas)} faixas já coletadas.")
+
+    escritor = criar_escritor(nome_arquivo)
+    try:
+        result, _ = executar_com_novas_tentativas(query_mais_estrelas, {})
+        estrelas_max = result['data']['search']['nodes'][0]['stargazerCount']
+        faixas = planejar_top_repositorios(contar_busca, estrelas_max, total)
+        with etapa('busca'):
+            for linhas in percorrer_faixas(faixas, buscar, chave=lambda linha: linha['repository'],
+                                           estrelas=lambda linha: linha['stars'], total_desejado=total,
+                                           max_paralelo=max_paralelo):
+                escritor.escrever(linhas)
+    except Exception as e:
+        escritor.descartar()
+        checkpoint.fechar()
+        print(f"Ocorreu um erro inesperado: {e}")
+        print(f"As faixas concluídas foram salvas em '{DIRETORIO_CHECKPOINT}'; execute novamente com --retomar para continuar.")
+        return
+
+    total_salvo = escritor.finalizar()
+    checkpoint.finalizar()
+    if not total_salvo:
+        print("Arquivo não foi gerado devido a falta de dados.")
+        return
+    print(f"Total de {total_salvo} repositórios foram salvos em '{nome_arquivo}'.")
+    return total_salvo
+
+
+def main(retomar=False, nome_arquivo=ARQUIVO_SAIDA, total=TOTAL_REPOSITORIOS, delta=None):
+    """
+    Função principal para coletar e salvar os dados. Com `delta` (arquivo de uma coleta
+    anterior), só busca as contagens caras dos repositórios que mudaram desde ela.
+    """
+    anteriores = carregar_anteriores(delta) if delta else None
+    if total > LIMITE_BUSCA:
+        return coletar_em_faixas(total, retomar, nome_arquivo, anteriores=anteriores)
+
+    checkpoint = Checkpoint(DIRETORIO_CHECKPOINT, retomar)
+    escritor = criar_escritor(nome_arquivo)
+    coletados = checkpoint.registros('repositorios')[:total]
+    estado = checkpoint.estado()
+    cursor = estado.get('cursor')
+    num_pag = estado.get('pagina', 0)
+    has_next_page = estado.get('has_next_page', True)
+    vistos = {repo['repository'] for repo in coletados}
+    interrompida = False
     
-    print("Iniciando a coleta de dados dos 1000 repositórios mais populares...")
+    print(f"Iniciando a coleta de dados dos {total} repositórios mais populares...")
+    if coletados:
+        print(f"Retomando a coleta: {len(coletados)} repositórios já coletados, continuando da página {num_pag + 1}.")
+        escritor.escrever(coletados)
+    quantidade = len(coletados)
+    del coletados
+
+    paginador = PaginadorAdaptativo(anteriores=anteriores)
 
-    # A paginação buscará 10 páginas de 100 repositórios cada.
-    while len(todos_repos) < 1000:
+    # O tamanho de cada página é decidido pelo paginador (até 100 repositórios).
+    # Cada página vai direto para o escritor; só os nomes já vistos ficam em memória.
+    while quantidade < total and has_next_page:
         num_pag += 1
-        add_vars = {'cursor': cursor}
 
         try:
-            result = exec_query_graphql(query_consolidada, add_vars)
-            data = result.get('data', {}).get('search', {})
-            repos = data.get('nodes', [])
-            
-            for repo in repos:
-                # Evita adicionar repositórios sem dados
-                if not repo:
+            with etapa('busca'):
+                repos, page_info = paginador.proxima_pagina(cursor, total - quantidade)
+            novos = []
+            for repo in repos[:total - quantidade]:
+                linha = montar_linha(repo)
+                # Uma página pode ser buscada de novo se a execução caiu antes de salvar o cursor.
+                if linha['repository'] in vistos:
                     continue
+                vistos.add(linha['repository'])
+                novos.append(linha)
+                checkpoint.registrar('repositorios', linha)
+
+            escritor.escrever(novos)
+            quantidade += len(novos)
 
-                lang = repo.get('primaryLanguage')
-                todos_repos.append({
-                    'repository': repo.get('nameWithOwner'),
-                    'stars': repo.get('stargazers', {}).get('totalCount'),
-                    'creation_date': repo.get('createdAt'),
-                    'last_update_date': repo.get('pushedAt'),
-                    'primary_language': lang['name'] if lang else 'N/A',
-                    'total_releases': repo.get('releases', {}).get('totalCount'),
-                    'accepted_pull_requests': repo.get('pullRequests', {}).get('totalCount'),
-                    'total_issues': repo.get('issues_total', {}).get('totalCount'),
-                    'closed_issues': repo.get('issues_closed', {}).get('totalCount'),
-                })
-
-            page_info = data.get('pageInfo', {})
             cursor = page_info.get('endCursor')
             has_next_page = page_info.get('hasNextPage')
+            checkpoint.salvar_estado(cursor=cursor, pagina=num_pag, has_next_page=has_next_page)
 
-            print(f"Página {num_pag} coletada. Total de repositórios: {len(todos_repos)}")
+            print(f"Página {num_pag} coletada ({len(repos)} repositórios). Total de repositórios: {quantidade}")
 
             if not has_next_page:
                 print("Não há mais páginas para buscar.")
@@ -101,26 +577,64 @@ def main():
         except requests.exceptions.HTTPError as err:
             print(f"Erro na requisição: {err}")
             print(f"Resposta da API: {err.response.text}")
+            interrompida = True
             break
         except Exception as e:
             print(f"Ocorreu um erro inesperado: {e}")
+            interrompida = True
             break
 
-    rel_csv = gera_relatorio_csv(todos_repos, 'repositorios_populares.csv')
+    print(f"Coleta finalizada com {paginador.requisicoes} requisições à API.")
+    if anteriores is not None:
+        print(f"Modo delta: {paginador.reaproveitados} repositórios sem push desde a coleta anterior reaproveitaram as contagens.")
 
-    if rel_csv is None:
-        print("Arquivo CSV não foi gerado devido a falta de dados.")
+    if interrompida:
+        # Uma coleta parcial não substitui o arquivo anterior, que também serve de base para o --delta.
+        escritor.descartar()
+        checkpoint.fechar()
+        print(f"Coleta interrompida; '{nome_arquivo}' não foi alterado. O progresso foi salvo em "
+              f"'{DIRETORIO_CHECKPOINT}'; execute novamente com --retomar para continuar.")
+        return
+
+    # O diário só é apagado depois que o arquivo final está no lugar.
+    total_salvo = escritor.finalizar()
+    checkpoint.finalizar()
+
+    if not total_salvo:
+        print("Arquivo não foi gerado devido a falta de dados.")
         return
     
-    print(f"Total de {len(rel_csv)} repositórios foram salvos em 'repositorios_populares.csv'.")
-    print("\nVisualização das primeiras linhas do arquivo csv:")
-    print(rel_csv.head())
+    print(f"Total de {total_salvo} repositórios foram salvos em '{nome_arquivo}'.")
+    print("\nVisualização das primeiras linhas do arquivo:")
+    print(carregar(nome_arquivo).head())
+    return total_salvo
+
 
+def exec_query_graphql(query, variables, custo=1, tentativa=1):
+    # `custo` é a estimativa de pontos GraphQL reservada no agendador de rate limit. Todas as
+    # consultas pedem rateLimit { cost }, e a instrumentação fica com o custo real.
+    for esperas in range(MAX_ESPERAS_RATE_LIMIT + 1):
+        response = requisitar('POST', API_URL, recurso='graphql', custo=custo, tentativa=tentativa + esperas,
+                              json={'query': query, 'variables': variables}, headers=HEADERS, timeout=TIMEOUT_REQUISICAO)
+        if (response.status_code in (403, 429) and 'rate limit' in response.text.lower()
+                and esperas < MAX_ESPERAS_RATE_LIMIT):
+            # Limite secundário: o GitHub informa quanto esperar. No limite primário a resposta
+            # traz restante=0 e o agendador segura a próxima tentativa até o reset.
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                obter_instrumentacao().dormir(int(retry_after), 'retry_after')
+            continue
+        response.raise_for_status()
+        result = response.json()
+        custo_real = ((result.get('data') or {}).get('rateLimit') or {}).get('cost')
+        if custo_real is not None:
+            obter_instrumentacao().corrigir_custo(API_URL, custo_real - custo)
+        return result
 
-def exec_query_graphql(query, variables):
-    response = requests.post(API_URL, json={'query': query, 'variables': variables}, headers=HEADERS)
-    response.raise_for_status()
-    return response.json()
+
+def adicionar_colunas_derivadas(df, agora=None):
+    """Converte as datas e calcula idade, dias desde a última atualização, razão de issues fechadas e releases por ano."""
+    return adicionar_metricas(df, agora or datetime.now().astimezone())
 
 
 def gera_relatorio_csv(result_graphql, nome_arquivo):    
@@ -131,25 +645,75 @@ def gera_relatorio_csv(result_graphql, nome_arquivo):
         print("\nDataframe vazio, arquivo csv não será gerado.")
         return
     
-    # Convertendo as datas para datetime
-    df['creation_date'] = pd.to_datetime(df['creation_date'])
-    df['last_update_date'] = pd.to_datetime(df['last_update_date'])
+    df = adicionar_colunas_derivadas(df)
+    
+    salvar(df, nome_arquivo)
+    return df
 
-    # Calculando idade do repositório
-    df['repository_age_days'] = (datetime.now().astimezone() - df['creation_date']).dt.days
 
-    # Calculando tempo desde a última atualização
-    df['days_since_last_update'] = (datetime.now().astimezone() - df['last_update_date']).dt.days
+def criar_escritor(nome_arquivo, tamanho_lote=500):
+    """
+    Escritor incremental que calcula as colunas derivadas de cada lote com o mesmo instante
+    de referência e grava com os tipos de formato_colunar.
+    """
+    agora = datetime.now().astimezone()
+    return EscritorIncremental(nome_arquivo, tamanho_lote,
+                               derivar=lambda df: tipar(adicionar_colunas_derivadas(df, agora)),
+                               esquema=esquema() if formato(nome_arquivo) == 'parquet' else None)
 
-    # Calculando razão de issues fechadas
-    df['closed_issues_ratio'] = df.apply(
-        lambda row: row['closed_issues'] / row['total_issues'] if row['total_issues'] > 0 else 0,
-        axis=1
-    )
-    
-    df.to_csv(nome_arquivo, index=False)
-    return df
+
+def coletar(args):
+    """Executa a coleta ou a atualização pedida na linha de comando, com as exportações opcionais."""
+    try:
+        if args.atualizar:
+            resultado = atualizar_csv_em_lote(args.atualizar)
+            saida = args.atualizar
+        else:
+            delta = args.saida if args.delta == '' else args.delta
+            resultado = main(retomar=args.retomar, nome_arquivo=args.saida, total=args.total, delta=delta)
+            saida = args.saida
+    finally:
+        if args.metricas_execucao:
+            imprimir_resumo(obter_instrumentacao().exportar(args.metricas_execucao, {'coletor': 'graphql'}))
+            print(f"Métricas da execução em '{args.metricas_execucao}.prom' e '{args.metricas_execucao}.json'.")
+
+    # main() e atualizar_csv_em_lote() devolvem None quando nada foi gravado.
+    if args.exportar_csv and resultado is not None and saida != args.exportar_csv:
+        with etapa('escrita do CSV'):
+            converter(saida, args.exportar_csv)
+        print(f"CSV exportado em '{args.exportar_csv}'.")
+
+    if args.historico and resultado is not None:
+        with etapa('historico'), HistoricoRepositorios(args.historico) as historico:
+            gravados = historico.ingerir(carregar(saida))
+        print(f"{gravados} repositórios gravados no histórico '{args.historico}'.")
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Coleta dados dos repositórios mais populares do GitHub.')
+    parser.add_argument('--atualizar', metavar='ARQUIVO',
+                        help='Atualiza as métricas dos repositórios de um arquivo existente (.csv, .parquet ou .feather) em vez de refazer a busca.')
+    parser.add_argument('--retomar', action='store_true',
+                        help='Continua uma coleta interrompida a partir do último checkpoint.')
+    parser.add_argument('--saida', default=ARQUIVO_SAIDA,
+                        help='Arquivo de saída (.parquet ou .csv). Padrão: %(default)s.')
+    parser.add_argument('--delta', nargs='?', const='', metavar='ARQUIVO',
+                        help='Só busca PRs mergeados e issues fechadas dos repositórios com push desde a coleta '
+                             'anterior em ARQUIVO (padrão: o próprio arquivo de saída).')
+    parser.add_argument('--historico', nargs='?', const=ARQUIVO_HISTORICO, metavar='ARQ_DB',
+                        help=f'Grava a coleta como snapshot do dia no histórico SQLite (padrão: {ARQUIVO_HISTORICO}).')
+    parser.add_argument('--exportar-csv', nargs='?', const=ARQUIVO_CSV, metavar='ARQ_CSV',
+                        help=f'Exporta também um CSV ao final da coleta (padrão: {ARQUIVO_CSV}).')
+    parser.add_argument('--total', type=int, default=TOTAL_REPOSITORIOS,
+                        help='Quantidade de repositórios. Acima de 1000 a busca é dividida em faixas de estrelas.')
+    parser.add_argument('--metricas-execucao', nargs='?', const='metricas_execucao', metavar='PREFIXO',
+                        help='Grava PREFIXO.prom (Prometheus) e PREFIXO.json com latência, status, repetições, bytes '
+                             'e esperas por endpoint (padrão: metricas_execucao).')
+    parser.add_argument('--perfil', '--profile', nargs='?', const='perfil', metavar='PREFIXO',
+                        help='Mede tempo, CPU e pico de memória por etapa (busca, detalhes, DataFrame, escrita) e '
+                             'grava as pilhas amostradas em PREFIXO.folded (padrão: perfil); ver perfilamento.')
+    args = parser.parse_args()
+
+    with perfilar(args.perfil):
+        coletar(args)
+
@@ -0,0 +1,182 @@
+"""
+Cubo de agregados por linguagem, calculado uma vez por conjunto.
+
+As RQ02, RQ05 e RQ07 pedem contagens e medianas por linguagem; antes cada
+relatório refazia o value_counts, o filtro das 10 linguagens mais comuns e o
+groupby por linguagem sobre todas as linhas. O cubo agrupa as linhas uma vez e
+guarda, para cada combinação de chaves (total, linguagem e, se pedida, uma
+dimensão extra — faixa de estrelas ou ano de criação — sozinha e com a linguagem):
+
+- a quantidade de repositórios e a soma de cada métrica (exatas);
+- os quantis de QUANTIS_CUBO de cada métrica (exatos).
+
+As consultas nesses níveis só selecionam linhas do cubo. Para fatias arbitrárias
+(várias linguagens, um intervalo de faixas ou anos) o cubo guarda também um
+esboço KLL por célula e métrica (ver esboco_quantis): fatia() mescla os esboços
+das células escolhidas. A contagem continua exata; os quantis são exatos enquanto
+a fatia tiver até k repositórios e, acima disso, têm erro de rank de até erro_rank(k).
+
+Uso: python cubo_agregados.py ARQUIVO [--por faixa_estrelas|ano_criacao] [--linguagens Go Rust] [--valores 2020 2021] [--quantil 0.5]
+"""
+import argparse
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from esboco_quantis import K_PADRAO, EsbocoKLL, erro_rank
+
+LINGUAGEM = 'primary_language'
+METRICAS_CUBO = ['accepted_pull_requests', 'releases_per_year', 'days_since_last_update', 'closed_issues_ratio']
+QUANTIS_CUBO = (0.25, 0.5, 0.75, 0.95)
+
+FAIXAS_ESTRELAS = [0, 1_000, 5_000, 10_000, 50_000, 100_000, np.inf]
+ROTULOS_FAIXAS = ['<1k', '1k-5k', '5k-10k', '10k-50k', '50k-100k', '100k+']
+
+
+def _faixa_estrelas(df):
+    return pd.cut(df['stars'], FAIXAS_ESTRELAS, right=False, labels=ROTULOS_FAIXAS)
+
+
+def _ano_criacao(df):
+    return df['creation_date'].dt.year
+
+
+# Dimensões extras: nome -> (coluna de que depende, função que calcula a chave).
+DIMENSOES = {
+    'faixa_estrelas': ('stars', _faixa_estrelas),
+    'ano_criacao': ('creation_date', _ano_criacao),
+}
+
+
+class CuboAgregados:
+    """Contagens, somas e quantis das métricas por linguagem (e por uma dimensão extra opcional)."""
+
+    def __init__(self, df, dimensao=None, k=K_PADRAO):
+        self.dimensao = dimensao
+        self.k = k
+        self.metricas = [metrica for metrica in METRICAS_CUBO if metrica in df]
+        # A ordem do value_counts é a que os gráficos da RQ05 sempre usaram.
+        self.contagem_linguagens = df[LINGUAGEM].value_counts()
+
+        chaves = [LINGUAGEM]
+        dados = df[[LINGUAGEM] + self.metricas]
+        if dimensao is not None:
+            dados = dados.assign(**{dimensao: DIMENSOES[dimensao][1](df)})
+            chaves.append(dimensao)
+
+        self._contagens, self._somas, self._quantis = {}, {}, {}
+        for tamanho in range(len(chaves) + 1):
+            for nivel in combinations(chaves, tamanho):
+                self._agregar(dados, nivel)
+        self._esbocos = self._criar_esbocos(dados, tuple(chaves))
+
+    def _agregar(self, dados, nivel):
+        if not nivel:
+            self._contagens[nivel] = pd.Series({'total': len(dados)})
+            self._somas[nivel] = dados[self.metricas].sum().to_frame('total').T
+            self._quantis[nivel] = dados[self.metricas].quantile(list(QUANTIS_CUBO)).unstack().to_frame('total').T
+            return
+        grupos = dados.groupby(list(nivel), observed=True)
+        self._contagens[nivel] = grupos.size()
+        self._somas[nivel] = grupos[self.metricas].sum()
+        self._quantis[nivel] = grupos[self.metricas].quantile(list(QUANTIS_CUBO)).unstack()
+
+    def _criar_esbocos(self, dados, chaves):
+        valores = {metrica: dados[metrica].to_numpy(dtype='float64') for metrica in self.metricas}
+        esbocos = {}
+        for celula, posicoes in dados.groupby(list(chaves), observed=True).indices.items():
+            esbocos[celula] = {}
+            for metrica in self.metricas:
+                esboco = EsbocoKLL(self.k)
+                esboco.adicionar(valores[metrica][posicoes])
+                esbocos[celula][metrica] = esboco
+        return esbocos
+
+    def _nivel(self, por):
+        nivel = tuple(por)
+        if nivel not in self._contagens:
+            raise ValueError(f"o cubo não tem o nível {nivel}; níveis: {list(self._contagens)}")
+        return nivel
+
+    def contagem(self, por=(LINGUAGEM,)):
+        """Quantidade de repositórios por combinação das chaves em `por` (ex.: ('primary_language', 'ano_criacao'))."""
+        return self._contagens[self._nivel(por)]
+
+    def soma(self, metrica, por=(LINGUAGEM,)):
+        return self._somas[self._nivel(por)][metrica]
+
+    def quantis(self, q=0.5, por=(LINGUAGEM,), metricas=None):
+        """Quantil `q` (um de QUANTIS_CUBO) das métricas, por combinação das chaves em `por`."""
+        if q not in QUANTIS_CUBO:
+            raise ValueError(f"quantil {q} não está no cubo; use um de {QUANTIS_CUBO} ou fatia()")
+        tabela = self._quantis[self._nivel(por)].xs(q, axis=1, level=1)
+        return tabela[list(metricas)] if metricas is not None else tabela
+
+    def linguagens_comuns(self, n=10):
+        """Quantidade de repositórios das `n` linguagens mais comuns."""
+        return self.contagem_linguagens.head(n)
+
+    def medianas_por_linguagem(self, colunas, n=10):
+        """Medianas das `colunas` por linguagem, entre as `n` linguagens mais comuns."""
+        medianas = self.quantis(0.5, metricas=colunas)
+        return medianas[medianas.index.isin(self.linguagens_comuns(n).index)]
+
+    def fatia(self, q=0.5, **filtros):
+        """
+        Repositórios e quantil `q` das métricas nas células que passam nos `filtros`
+        (ex.: primary_language=['Go', 'Rust'], ano_criacao=range(2015, 2020)).
+        """
+        chaves = [LINGUAGEM] + ([self.dimensao] if self.dimensao else [])
+        desconhecidas = set(filtros) - set(chaves)
+        if desconhecidas:
+            raise ValueError(f"filtros sem dimensão no cubo: {sorted(desconhecidas)}; dimensões: {chaves}")
+        aceitos = [set(filtros[chave]) if chave in filtros else None for chave in chaves]
+
+        mescla = {metrica: EsbocoKLL(self.k) for metrica in self.metricas}
+        for celula, esbocos in self._esbocos.items():
+            celula = celula if isinstance(celula, tuple) else (celula,)
+            if all(valores is None or valor in valores for valor, valores in zip(celula, aceitos)):
+                for metrica, esboco in esbocos.items():
+                    mescla[metrica].mesclar(esboco)
+
+        resultado = pd.Series({metrica: esboco.quantil(q) for metrica, esboco in mescla.items()}, dtype='float64')
+        repositorios = mescla[self.metricas[0]].n if self.metricas else 0
+        return pd.concat([pd.Series({'repositorios': repositorios}, dtype='float64'), resultado])
+
+
+if __name__ == '__main__':
+    from formato_colunar import carregar
+    from metricas import adicionar_metricas
+
+    parser = argparse.ArgumentParser(description='Consulta o cubo de agregados por linguagem de um conjunto.')
+    parser.add_argument('arquivo', help='Conjunto de repositórios (.parquet, .feather ou .csv).')
+    parser.add_argument('--por', choices=list(DIMENSOES), help='Dimensão extra do cubo.')
+    parser.add_argument('--linguagens', nargs='+', help='Fatia só destas linguagens.')
+    parser.add_argument('--valores', nargs='+', help='Fatia só destes valores da dimensão de --por.')
+    parser.add_argument('--quantil', type=float, default=0.5)
+    args = parser.parse_args()
+
+    colunas = ['primary_language', 'accepted_pull_requests', 'total_releases', 'repository_age_days',
+               'days_since_last_update', 'total_issues', 'closed_issues']
+    if args.por:
+        colunas.append(DIMENSOES[args.por][0])
+    cubo = CuboAgregados(adicionar_metricas(carregar(args.arquivo, colunas)), args.por)
+
+    filtros = {}
+    if args.linguagens:
+        filtros[LINGUAGEM] = args.linguagens
+    if args.valores:
+        if not args.por:
+            parser.error('--valores precisa de --por')
+        filtros[args.por] = [int(valor) if args.por == 'ano_criacao' else valor for valor in args.valores]
+
+    if filtros:
+        print(cubo.fatia(args.quantil, **filtros).to_string())
+        print(f"(quantis aproximados acima de {cubo.k} repositórios: erro de rank de até {erro_rank(cubo.k):.1%})")
+    else:
+        if args.quantil not in QUANTIS_CUBO:
+            parser.error(f'sem filtros, --quantil tem que ser um de {QUANTIS_CUBO}')
+        por = (args.por,) if args.por else (LINGUAGEM,)
+        tabela = cubo.contagem(por).rename('repositorios').to_frame().join(cubo.quantis(args.quantil, por))
+        print(tabela.sort_values('repositorios', ascending=False).to_string())
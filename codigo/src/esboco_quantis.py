@@ -0,0 +1,144 @@
+"""
+Esboço de quantis KLL (Karnin, Lang e Liberty, 2016) com memória limitada.
+
+Guarda uma amostra ponderada dos valores em níveis: os itens do nível h valem
+2**h valores originais. Quando um nível passa da capacidade, ele é ordenado e
+metade dos itens (os de posição par ou os de posição ímpar, sorteado) sobe para
+o nível seguinte com o dobro do peso. As capacidades diminuem geometricamente
+(fator 2/3) do nível mais alto para o mais baixo, então o esboço guarda cerca
+de 3*k valores, qualquer que seja a quantidade de valores vista.
+
+Erro: o quantil q devolvido é um dos valores vistos e tem rank entre
+(q - e)*n e (q + e)*n, com e ~ 2.3 / k**0.97 (ver erro_rank()): cerca de 1,3%
+de n para o k padrão, 200, com 99% de confiança por quantil. O erro é de rank,
+não de valor: a mediana aproximada de um conjunto com 1 milhão de repositórios
+é o valor de algum repositório entre a posição 487 mil e a 513 mil.
+
+Esboços de partes diferentes do conjunto (blocos, arquivos, snapshots, processos)
+podem ser mesclados com mesclar(), e a garantia de erro vale para o total. Para
+juntar esboços de processos diferentes, use para_dict() e de_dict() (JSON).
+"""
+import math
+
+import numpy as np
+
+K_PADRAO = 200
+FATOR_CAPACIDADE = 2 / 3
+
+
+def erro_rank(k=K_PADRAO):
+    """Erro de rank normalizado de um quantil (99% de confiança) para o parâmetro `k`."""
+    # Constantes empíricas do KLL da Apache DataSketches, que usa o mesmo esquema de compactação.
+    return 2.296 / k ** 0.9723
+
+
+class EsbocoKLL:
+    """Esboço KLL de uma coluna numérica; NaN é ignorado."""
+
+    def __init__(self, k=K_PADRAO, semente=None):
+        self.k = k
+        self.n = 0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.niveis = [np.empty(0)]
+        self._rng = np.random.default_rng(semente)
+
+    def _capacidade(self, nivel):
+        altura = len(self.niveis) - 1 - nivel
+        return max(int(math.ceil(self.k * FATOR_CAPACIDADE ** altura)), 2)
+
+    @property
+    def retidos(self):
+        """Quantidade de valores guardados no esboço."""
+        return sum(len(nivel) for nivel in self.niveis)
+
+    def adicionar(self, valores):
+        """Acrescenta um bloco de valores (array, Series ou lista)."""
+        valores = np.asarray(valores, dtype='float64')
+        valores = valores[~np.isnan(valores)]
+        if not len(valores):
+            return
+        self.n += len(valores)
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+        self.niveis[0] = np.concatenate([self.niveis[0], valores])
+        self._compactar()
+
+    def _compactar(self):
+        # Cada compactação preserva o peso total: 2m itens de peso w viram m itens de peso 2w,
+        # e o item que sobra quando a quantidade é ímpar fica no nível em que estava.
+        while True:
+            cheio = next((nivel for nivel, itens in enumerate(self.niveis)
+                          if len(itens) > self._capacidade(nivel)), None)
+            if cheio is None:
+                return
+            if cheio + 1 == len(self.niveis):
+                self.niveis.append(np.empty(0))
+            itens = np.sort(self.niveis[cheio])
+            sobra = len(itens) % 2
+            promovidos = itens[sobra + int(self._rng.integers(2))::2]
+            self.niveis[cheio + 1] = np.concatenate([self.niveis[cheio + 1], promovidos])
+            self.niveis[cheio] = itens[:sobra]
+
+    def mesclar(self, outro):
+        """Junta os valores de `outro` a este esboço e devolve este esboço."""
+        if outro.n == 0:
+            return self
+        self.k = min(self.k, outro.k)
+        self.n += outro.n
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        while len(self.niveis) < len(outro.niveis):
+            self.niveis.append(np.empty(0))
+        for nivel, itens in enumerate(outro.niveis):
+            self.niveis[nivel] = np.concatenate([self.niveis[nivel], itens])
+        self._compactar()
+        return self
+
+    def _ordenados(self):
+        valores = np.concatenate(self.niveis)
+        pesos = np.concatenate([np.full(len(itens), 2 ** nivel, dtype='int64')
+                                for nivel, itens in enumerate(self.niveis)])
+        ordem = np.argsort(valores, kind='stable')
+        return valores[ordem], np.cumsum(pesos[ordem])
+
+    def quantis(self, qs):
+        """Quantis aproximados para cada q em `qs` (entre 0 e 1); NaN se o esboço estiver vazio."""
+        qs = np.asarray(qs, dtype='float64')
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        valores, acumulado = self._ordenados()
+        posicoes = np.searchsorted(acumulado, np.maximum(qs * self.n, 1), side='left')
+        resultado = valores[np.minimum(posicoes, len(valores) - 1)]
+        # Os extremos são guardados exatamente.
+        resultado = np.where(qs <= 0, self.minimo, resultado)
+        return np.where(qs >= 1, self.maximo, resultado)
+
+    def quantil(self, q):
+        return float(self.quantis([q])[0])
+
+    def mediana(self):
+        return self.quantil(0.5)
+
+    def rank(self, valor):
+        """Fração aproximada dos valores menores ou iguais a `valor`."""
+        if self.n == 0:
+            return math.nan
+        valores, acumulado = self._ordenados()
+        posicao = np.searchsorted(valores, valor, side='right')
+        return float(acumulado[posicao - 1] / self.n) if posicao else 0.0
+
+    def para_dict(self):
+        return {
+            'k': self.k, 'n': self.n, 'minimo': self.minimo, 'maximo': self.maximo,
+            'niveis': [itens.tolist() for itens in self.niveis],
+        }
+
+    @classmethod
+    def de_dict(cls, dados, semente=None):
+        esboco = cls(dados['k'], semente)
+        esboco.n = dados['n']
+        esboco.minimo = dados['minimo']
+        esboco.maximo = dados['maximo']
+        esboco.niveis = [np.asarray(itens, dtype='float64') for itens in dados['niveis']]
+        return esboco
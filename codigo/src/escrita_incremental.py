@@ -0,0 +1,109 @@
+"""
+Escrita incremental dos repositórios coletados em CSV ou Parquet.
+
+As linhas são gravadas em lotes pequenos à medida que as páginas chegam, em vez
+de montar um DataFrame com o conjunto inteiro no final. A memória usada fica
+limitada ao tamanho do lote. O arquivo é escrito com o sufixo '.parcial' e só
+substitui o destino em finalizar(), de forma atômica.
+"""
+import os
+
+import pandas as pd
+
+from perfilamento import etapa
+
+
+class EscritorIncremental:
+    """
+    Grava linhas (dicionários) em lotes de `tamanho_lote`.
+
+    `derivar`, se informado, recebe o DataFrame de cada lote e devolve o lote
+    com as colunas derivadas calculadas. O formato vem da extensão do arquivo
+    ('.csv' ou '.parquet'); Parquet requer o pyarrow. `esquema` (pyarrow.Schema)
+    fixa os tipos do Parquet; sem ele, os tipos vêm do primeiro lote.
+    """
+
+    def __init__(self, caminho, tamanho_lote=500, derivar=None, esquema=None):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.derivar = derivar
+        self.esquema = esquema
+        self.formato = 'parquet' if caminho.endswith('.parquet') else 'csv'
+        self.total = 0
+        self._parcial = caminho + '.parcial'
+        self._buffer = []
+        self._colunas = None
+        self._parquet = None
+
+        if os.path.exists(self._parcial):
+            os.remove(self._parcial)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traceback):
+        if tipo is None:
+            self.finalizar()
+        else:
+            self.descartar()
+
+    def escrever(self, linhas):
+        """Acrescenta linhas; grava um lote sempre que o buffer chega a `tamanho_lote`."""
+        self._buffer.extend(linhas)
+        if len(self._buffer) >= self.tamanho_lote:
+            self._descarregar()
+
+    def _descarregar(self):
+        if not self._buffer:
+            return
+
+        with etapa('DataFrame'):
+            df = pd.DataFrame(self._buffer)
+            self._buffer = []
+            if self.derivar:
+                df = self.derivar(df)
+
+            # Todos os lotes seguem as colunas do primeiro.
+            if self._colunas is None:
+                self._colunas = list(df.columns)
+            df = df.reindex(columns=self._colunas)
+
+        with etapa('escrita'):
+            if self.formato == 'parquet':
+                self._escrever_parquet(df)
+            else:
+                df.to_csv(self._parcial, mode='a', header=self.total == 0, index=False, encoding='utf-8')
+
+        self.total += len(df)
+
+    def _escrever_parquet(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._parquet is None:
+            tabela = pa.Table.from_pandas(df, schema=self.esquema, preserve_index=False)
+            self._parquet = pq.ParquetWriter(self._parcial, tabela.schema)
+        else:
+            tabela = pa.Table.from_pandas(df, schema=self._parquet.schema, preserve_index=False)
+        self._parquet.write_table(tabela)
+
+    def finalizar(self):
+        """Grava o que restou no buffer e move o arquivo parcial para o destino. Devolve o total de linhas."""
+        self._descarregar()
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+        if self.total == 0:
+            return 0
+
+        os.replace(self._parcial, self.caminho)
+        return self.total
+
+    def descartar(self):
+        """Abandona a escrita sem alterar o arquivo de destino."""
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+        if os.path.exists(self._parcial):
+            os.remove(self._parcial)
@@ -0,0 +1,180 @@
+"""
+Formato colunar tipado do conjunto de repositórios (Parquet ou Feather).
+
+No CSV as datas são texto e precisam ser convertidas a cada leitura, a
+linguagem é texto livre repetido em cada linha e as contagens viram int64.
+Aqui o conjunto tem um esquema fixo: datas como timestamp UTC, linguagem como
+categoria (dicionário) e contagens como Int32, o inteiro de 32 bits do pandas
+que aceita ausentes: uma contagem que a API não devolveu e a linguagem de um
+repositório sem linguagem ficam nulas. Parquet e Feather guardam os
+tipos, então a leitura não converte nada, e ambos são colunares: carregar(...,
+colunas=[...]) lê do disco só as colunas pedidas. O CSV continua disponível
+como exportação (ver converter()).
+
+O formato vem da extensão: '.parquet', '.feather' ou '.csv'. Parquet e Feather requerem o pyarrow.
+
+Uso: python formato_colunar.py ORIGEM DESTINO (ex.: repositorios_populares.csv repositorios_populares.parquet)
+"""
+import argparse
+import os
+
+import pandas as pd
+
+# Tipos (pandas) das colunas do conjunto gerado pelo coletor GraphQL.
+TIPOS_COLUNAS = {
+    'repository': 'string',
+    'stars': 'Int32',
+    'creation_date': 'datetime64[us, UTC]',
+    'last_update_date': 'datetime64[us, UTC]',
+    'primary_language': 'category',
+    'total_releases': 'Int32',
+    'accepted_pull_requests': 'Int32',
+    'total_issues': 'Int32',
+    'closed_issues': 'Int32',
+    'repository_age_days': 'Int32',
+    'days_since_last_update': 'Int32',
+    'closed_issues_ratio': 'float64',
+    'releases_per_year': 'float64',
+}
+COLUNAS_DATAS = ['creation_date', 'last_update_date']
+
+# Marcador de linguagem ausente gravado por versões anteriores do coletor; o CSV já o lia como nulo.
+SEM_LINGUAGEM = 'N/A'
+
+
+def formato(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in ('.parquet', '.pq'):
+        return 'parquet'
+    if extensao in ('.feather', '.arrow'):
+        return 'feather'
+    return 'csv'
+
+
+def esquema(colunas=None):
+    """Esquema pyarrow das colunas informadas (todas, por padrão), na ordem de TIPOS_COLUNAS."""
+    import pyarrow as pa
+
+    tipos = {
+        'string': pa.string(),
+        'Int32': pa.int32(),
+        'float64': pa.float64(),
+        'datetime64[us, UTC]': pa.timestamp('us', tz='UTC'),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([
+        (coluna, tipos[tipo]) for coluna, tipo in TIPOS_COLUNAS.items()
+        if colunas is None or coluna in colunas
+    ])
+
+
+def tipar(df):
+    """Converte as colunas conhecidas do DataFrame para os tipos de TIPOS_COLUNAS. Devolve o próprio DataFrame."""
+    for coluna, tipo in TIPOS_COLUNAS.items():
+        if coluna not in df or df[coluna].dtype == tipo:
+            continue
+        if coluna in COLUNAS_DATAS:
+            df[coluna] = pd.to_datetime(df[coluna], format='ISO8601', utc=True).astype(tipo)
+        else:
+            df[coluna] = df[coluna].astype(tipo)
+    if 'primary_language' in df and SEM_LINGUAGEM in df['primary_language'].cat.categories:
+        df['primary_language'] = df['primary_language'].cat.remove_categories(SEM_LINGUAGEM)
+    return df
+
+
+def salvar(df, caminho):
+    """Grava o DataFrame tipado no formato da extensão de `caminho`."""
+    df = tipar(df)
+    if formato(caminho) == 'csv':
+        df.to_csv(caminho, index=False)
+        return
+
+    import pyarrow as pa
+
+    tabela = pa.Table.from_pandas(df, schema=esquema(df.columns), preserve_index=False)
+    if formato(caminho) == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(tabela, caminho)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(tabela, caminho)
+
+
+def carregar(caminho, colunas=None):
+    """
+    Lê o conjunto com os tipos de TIPOS_COLUNAS. Com `colunas`, lê só essas colunas;
+    em Parquet e Feather as demais nem saem do disco.
+    """
+    if colunas is not None:
+        colunas = list(colunas)
+
+    if formato(caminho) == 'parquet':
+        df = pd.read_parquet(caminho, columns=colunas)
+    elif formato(caminho) == 'feather':
+        df = pd.read_feather(caminho, columns=colunas)
+    else:
+        existentes = pd.read_csv(caminho, nrows=0).columns
+        df = pd.read_csv(
+            caminho,
+            usecols=colunas,
+            dtype={coluna: tipo for coluna, tipo in TIPOS_COLUNAS.items()
+                   if coluna in existentes and coluna not in COLUNAS_DATAS},
+        )
+    # No CSV as datas ainda são texto; nos formatos colunares nada muda.
+    return tipar(df)
+
+
+def ler_em_blocos(caminho, colunas=None, linhas_por_bloco=100_000):
+    """
+    Lê o conjunto em DataFrames de até `linhas_por_bloco` linhas, tipados como em carregar().
+    Só um bloco fica na memória de cada vez; o Feather é mapeado em memória, não lido inteiro.
+    """
+    if colunas is not None:
+        colunas = list(colunas)
+
+    if formato(caminho) == 'csv':
+        existentes = pd.read_csv(caminho, nrows=0).columns
+        blocos = pd.read_csv(
+            caminho,
+            usecols=colunas,
+            chunksize=linhas_por_bloco,
+            dtype={coluna: tipo for coluna, tipo in TIPOS_COLUNAS.items()
+                   if coluna in existentes and coluna not in COLUNAS_DATAS},
+        )
+        for bloco in blocos:
+            yield tipar(bloco)
+        return
+
+    import pyarrow as pa
+
+    if formato(caminho) == 'parquet':
+        import pyarrow.parquet as pq
+        for lote in pq.ParquetFile(caminho).iter_batches(batch_size=linhas_por_bloco, columns=colunas):
+            yield tipar(pa.Table.from_batches([lote]).to_pandas())
+        return
+
+    with pa.memory_map(caminho) as fonte:
+        leitor = pa.ipc.open_file(fonte)
+        for i in range(leitor.num_record_batches):
+            lote = leitor.get_batch(i)
+            if colunas is not None:
+                lote = lote.select(colunas)
+            for inicio in range(0, lote.num_rows, linhas_por_bloco):
+                yield tipar(lote.slice(inicio, linhas_por_bloco).to_pandas())
+
+
+def converter(origem, destino, colunas=None):
+    """Converte entre CSV, Parquet e Feather; serve para exportar o CSV a partir do formato colunar."""
+    df = carregar(origem, colunas)
+    salvar(df, destino)
+    return len(df)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Converte o conjunto de repositórios entre CSV, Parquet e Feather.')
+    parser.add_argument('origem')
+    parser.add_argument('destino')
+    args = parser.parse_args()
+
+    total = converter(args.origem, args.destino)
+    print(f"{total} repositórios convertidos de '{args.origem}' para '{args.destino}'.")
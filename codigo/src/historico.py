@@ -0,0 +1,220 @@
+"""
+Histórico de snapshots das métricas dos repositórios em SQLite.
+
+Cada coleta vira um snapshot: uma linha por (repository, snapshot_date) na
+tabela `snapshots`. A chave primária é esse par (tabela WITHOUT ROWID), então o
+histórico de um repositório é uma leitura sequencial no índice, e há um índice
+por data para consultas de período. A ingestão só acrescenta snapshots; uma
+nova coleta no mesmo dia substitui o snapshot daquele dia.
+
+Os dois coletores gravam aqui com --historico (colunas do GraphQL ou do REST,
+ver COLUNAS_REST). Coletas antigas podem ser importadas pela linha de comando.
+As consultas de crescimento rodam no SQLite e devolvem só o resultado, sem
+carregar os CSVs históricos no pandas.
+
+Uso:
+  python historico.py importar ARQUIVO... [--db historico.sqlite3]
+  python historico.py crescimento [--coluna stars] [--desde AAAA-MM-DD] [--ate AAAA-MM-DD] [--limite 20]
+  python historico.py repositorio DONO/NOME [--coluna stars]
+"""
+import argparse
+import os
+import re
+import sqlite3
+from datetime import date
+
+import pandas as pd
+
+from formato_colunar import carregar
+
+ARQUIVO_HISTORICO = 'historico.sqlite3'
+
+# Colunas numéricas que podem ser consultadas no histórico.
+COLUNAS_METRICAS = ['stars', 'total_releases', 'accepted_pull_requests', 'total_issues',
+                    'closed_issues', 'open_issues', 'forks', 'closed_issues_ratio']
+
+# Colunas do CSV do coletor REST (sprint1/GetData.py) e os nomes equivalentes no histórico.
+COLUNAS_REST = {
+    'Repositorio': 'repository',
+    'Estrelas': 'stars',
+    'Linguagem_Primaria': 'primary_language',
+    'Data_de_Criacao': 'creation_date',
+    'Ultimo_Push': 'last_update_date',
+    'Pull_Requests_Aceitas': 'accepted_pull_requests',
+    'Total_de_Releases': 'total_releases',
+    'Issues_Abertas': 'open_issues',
+    'Forks': 'forks',
+    'Razao_Issues_Fechadas_Total': 'closed_issues_ratio',
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    repository TEXT NOT NULL,
+    snapshot_date TEXT NOT NULL,
+    fonte TEXT NOT NULL,
+    stars INTEGER,
+    primary_language TEXT,
+    creation_date TEXT,
+    last_update_date TEXT,
+    total_releases INTEGER,
+    accepted_pull_requests INTEGER,
+    total_issues INTEGER,
+    closed_issues INTEGER,
+    open_issues INTEGER,
+    forks INTEGER,
+    closed_issues_ratio REAL,
+    PRIMARY KEY (repository, snapshot_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_snapshots_data ON snapshots (snapshot_date);
+"""
+
+COLUNAS_TABELA = ['repository', 'snapshot_date', 'fonte', 'stars', 'primary_language', 'creation_date',
+                  'last_update_date', 'total_releases', 'accepted_pull_requests', 'total_issues',
+                  'closed_issues', 'open_issues', 'forks', 'closed_issues_ratio']
+
+
+def _data_do_arquivo(caminho):
+    """Data do snapshot: a do nome do arquivo (coletas REST: AAAA-MM-DD_HH-MM-SS.csv) ou a da modificação."""
+    encontrada = re.search(r'(\d{4}-\d{2}-\d{2})', os.path.basename(caminho))
+    if encontrada:
+        return encontrada.group(1)
+    return date.fromtimestamp(os.path.getmtime(caminho)).isoformat()
+
+
+def _valor(valor):
+    # O sqlite3 não aceita tipos do NumPy nem Timestamp; ausentes viram NULL.
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return valor.isoformat()
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return valor
+
+
+class HistoricoRepositorios:
+    """Snapshots das métricas por (repository, snapshot_date) em um arquivo SQLite."""
+
+    def __init__(self, caminho=ARQUIVO_HISTORICO):
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho)
+        # WAL permite consultar o histórico enquanto uma coleta grava nele.
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.executescript(ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def fechar(self):
+        self._conexao.close()
+
+    def ingerir(self, df, snapshot_date=None, fonte='graphql'):
+        """
+        Grava um snapshot a partir de um DataFrame com as colunas do coletor GraphQL,
+        ou do REST com fonte='rest'. Devolve quantos repositórios foram gravados.
+        """
+        if fonte == 'rest':
+            df = df.rename(columns=COLUNAS_REST)
+            df['closed_issues_ratio'] = pd.to_numeric(df['closed_issues_ratio'], errors='coerce')
+        snapshot_date = snapshot_date or date.today().isoformat()
+
+        colunas = [coluna for coluna in COLUNAS_TABELA[3:] if coluna in df.columns]
+        linhas = (
+            (repo, snapshot_date, fonte, *(_valor(valor) for valor in valores))
+            for repo, *valores in df[['repository'] + colunas].itertuples(index=False, name=None)
+        )
+        sql = 'INSERT OR REPLACE INTO snapshots (repository, snapshot_date, fonte, {}) VALUES ({})'.format(
+            ', '.join(colunas), ', '.join('?' * (len(colunas) + 3)))
+        with self._conexao:
+            cursor = self._conexao.executemany(sql, linhas)
+        return cursor.rowcount
+
+    def importar(self, caminho):
+        """Importa uma coleta salva (CSV do REST, ou CSV/Parquet/Feather do GraphQL) como snapshot."""
+        df = carregar(caminho)
+        fonte = 'rest' if 'Repositorio' in df.columns else 'graphql'
+        return self.ingerir(df, _data_do_arquivo(caminho), fonte)
+
+    def datas(self):
+        return [linha[0] for linha in self._conexao.execute('SELECT DISTINCT snapshot_date FROM snapshots ORDER BY 1')]
+
+    def serie(self, repository, coluna='stars'):
+        """Valores de `coluna` de um repositório em cada snapshot, pela chave primária."""
+        _validar(coluna)
+        return pd.read_sql_query(
+            f'SELECT snapshot_date, {coluna} FROM snapshots WHERE repository = ? ORDER BY snapshot_date',
+            self._conexao, params=(repository,), parse_dates=['snapshot_date'],
+        )
+
+    def crescimento(self, coluna='stars', desde=None, ate=None, limite=20):
+        """
+        Repositórios que mais cresceram em `coluna` entre o primeiro e o último snapshot de
+        cada um no período [desde, ate]: valor inicial, final, crescimento absoluto,
+        relativo e por dia. O cálculo roda no SQLite; só as `limite` linhas do resultado vêm para o pandas.
+        """
+        _validar(coluna)
+        consulta = f"""
+            WITH periodo AS (
+                SELECT repository, snapshot_date, {coluna} AS valor,
+                       ROW_NUMBER() OVER (PARTITION BY repository ORDER BY snapshot_date) AS ordem_inicio,
+                       ROW_NUMBER() OVER (PARTITION BY repository ORDER BY snapshot_date DESC) AS ordem_fim
+                FROM snapshots
+                WHERE snapshot_date BETWEEN ? AND ? AND {coluna} IS NOT NULL
+            )
+            SELECT inicio.repository,
+                   inicio.snapshot_date AS data_inicio,
+                   fim.snapshot_date AS data_fim,
+                   inicio.valor AS valor_inicio,
+                   fim.valor AS valor_fim,
+                   fim.valor - inicio.valor AS crescimento,
+                   CASE WHEN inicio.valor > 0 THEN (fim.valor - inicio.valor) * 1.0 / inicio.valor END AS crescimento_relativo,
+                   (fim.valor - inicio.valor) / (julianday(fim.snapshot_date) - julianday(inicio.snapshot_date)) AS crescimento_por_dia
+            FROM periodo AS inicio
+            JOIN periodo AS fim ON fim.repository = inicio.repository AND fim.ordem_fim = 1
+            WHERE inicio.ordem_inicio = 1 AND fim.snapshot_date > inicio.snapshot_date
+            ORDER BY crescimento DESC
+            LIMIT ?
+        """
+        return pd.read_sql_query(
+            consulta, self._conexao,
+            params=(desde or '0000-01-01', ate or '9999-12-31', limite),
+        )
+
+
+def _validar(coluna):
+    # O nome da coluna entra no SQL; só as colunas conhecidas são aceitas.
+    if coluna not in COLUNAS_METRICAS:
+        raise ValueError(f"coluna '{coluna}' não existe no histórico; use uma de {', '.join(COLUNAS_METRICAS)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Histórico de snapshots das métricas dos repositórios.')
+    parser.add_argument('--db', default=ARQUIVO_HISTORICO, help='Arquivo SQLite do histórico. Padrão: %(default)s.')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    importar = comandos.add_parser('importar', help='Importa coletas salvas como snapshots.')
+    importar.add_argument('arquivos', nargs='+')
+
+    crescimento = comandos.add_parser('crescimento', help='Repositórios que mais cresceram em um período.')
+    crescimento.add_argument('--coluna', default='stars', choices=COLUNAS_METRICAS)
+    crescimento.add_argument('--desde', help='Data inicial (AAAA-MM-DD).')
+    crescimento.add_argument('--ate', help='Data final (AAAA-MM-DD).')
+    crescimento.add_argument('--limite', type=int, default=20)
+
+    repositorio = comandos.add_parser('repositorio', help='Série histórica de um repositório.')
+    repositorio.add_argument('nome', help='DONO/NOME')
+    repositorio.add_argument('--coluna', default='stars', choices=COLUNAS_METRICAS)
+
+    args = parser.parse_args()
+
+    with HistoricoRepositorios(args.db) as historico:
+        if args.comando == 'importar':
+            for arquivo in args.arquivos:
+                print(f"{arquivo}: {historico.importar(arquivo)} repositórios no snapshot de {_data_do_arquivo(arquivo)}.")
+        elif args.comando == 'crescimento':
+            print(historico.crescimento(args.coluna, args.desde, args.ate, args.limite).to_string(index=False))
+        else:
+            print(historico.serie(args.nome, args.coluna).to_string(index=False))
@@ -0,0 +1,204 @@
+"""
+Instrumentação das requisições dos coletores.
+
+Cada requisição que passa por cliente_http.requisitar() é registrada com a
+classe do endpoint (search/repositories, search/issues, repos/pulls, graphql...),
+a latência, o status (ou o nome da exceção), o número da tentativa, os bytes
+recebidos e o custo no rate limit (1 por requisição REST, 0 nas respostas 304;
+no GraphQL, o rateLimit.cost da resposta, ou a estimativa reservada quando a
+consulta não o pede). As esperas também são registradas,
+por motivo: a vez no rate limit (agendador), o backoff entre tentativas e o
+Retry-After dos limites secundários.
+
+Ao final da coleta, exportar() grava:
+- PREFIXO.prom: métricas no formato texto do Prometheus, para o textfile
+  collector do node_exporter;
+- PREFIXO.json: um resumo da execução, com p50/p95/p99 por endpoint e o tempo
+  gasto esperando e fazendo requisições.
+
+As latências e esperas são somadas entre as threads, então podem passar do tempo total da execução.
+"""
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+QUANTIS = (0.5, 0.95, 0.99)
+RAIZES_API = ('search', 'repos', 'rate_limit', 'graphql')
+
+
+def classe_endpoint(url):
+    """Classe do endpoint de uma URL da API, sem dono, nome e parâmetros: 'repos/pulls', 'search/issues'..."""
+    partes = [parte for parte in urlparse(url).path.split('/') if parte]
+    # Em instalações Enterprise a API fica embaixo de um prefixo (ex.: /api/v3).
+    inicio = next((i for i, parte in enumerate(partes) if parte in RAIZES_API), None)
+    if inicio is None:
+        return '/'.join(partes) or '/'
+    partes = partes[inicio:]
+    if partes[0] == 'search':
+        return '/'.join(partes[:2])
+    if partes[0] == 'repos':
+        return '/'.join(['repos'] + partes[3:4])
+    return partes[0]
+
+
+def _quantil(ordenados, q):
+    # Quantil pelo posto mais próximo: sempre uma latência observada.
+    return ordenados[max(0, min(len(ordenados) - 1, int(round(q * len(ordenados))) - 1))]
+
+
+class _Endpoint:
+    def __init__(self):
+        self.latencias = []
+        self.status = {}
+        self.novas_tentativas = 0
+        self.bytes = 0
+        self.custo = 0
+
+
+class Instrumentacao:
+    """Registro das requisições e esperas de uma execução."""
+
+    def __init__(self):
+        self.inicio = time.time()
+        self._endpoints = {}
+        self._esperas = {}
+        self._lock = threading.Lock()
+
+    def registrar_requisicao(self, url, status, segundos, tentativa=1, bytes_recebidos=0, custo=0):
+        with self._lock:
+            endpoint = self._endpoints.setdefault(classe_endpoint(url), _Endpoint())
+            endpoint.latencias.append(segundos)
+            endpoint.status[str(status)] = endpoint.status.get(str(status), 0) + 1
+            endpoint.novas_tentativas += tentativa > 1
+            endpoint.bytes += bytes_recebidos
+            endpoint.custo += custo
+
+    def corrigir_custo(self, url, diferenca):
+        """Soma `diferenca` ao custo já registrado do endpoint, quando o custo real só se conhece pela resposta."""
+        if not diferenca:
+            return
+        with self._lock:
+            self._endpoints.setdefault(classe_endpoint(url), _Endpoint()).custo += diferenca
+
+    def registrar_espera(self, motivo, segundos):
+        if segundos <= 0:
+            return
+        with self._lock:
+            self._esperas[motivo] = self._esperas.get(motivo, 0.0) + segundos
+
+    def dormir(self, segundos, motivo):
+        """time.sleep() que conta o tempo como espera por `motivo`."""
+        time.sleep(segundos)
+        self.registrar_espera(motivo, segundos)
+
+    def resumo(self):
+        """Resumo da execução até agora: por endpoint e tempos de espera e de trabalho."""
+        with self._lock:
+            endpoints = {}
+            for nome, endpoint in sorted(self._endpoints.items()):
+                ordenadas = sorted(endpoint.latencias)
+                endpoints[nome] = {
+                    'requisicoes': len(ordenadas),
+                    'status': dict(endpoint.status),
+                    'novas_tentativas': endpoint.novas_tentativas,
+                    'bytes': endpoint.bytes,
+                    'custo_rate_limit': endpoint.custo,
+                    'segundos': sum(ordenadas),
+                    **{f'p{int(q * 100)}_ms': _quantil(ordenadas, q) * 1000 for q in QUANTIS},
+                }
+            esperas = dict(self._esperas)
+        return {
+            'duracao_s': time.time() - self.inicio,
+            'requisicoes': sum(endpoint['requisicoes'] for endpoint in endpoints.values()),
+            'tempo_em_requisicoes_s': sum(endpoint['segundos'] for endpoint in endpoints.values()),
+            'tempo_esperando_s': sum(esperas.values()),
+            'esperas_s': esperas,
+            'endpoints': endpoints,
+        }
+
+    def prometheus(self, rotulos=None):
+        """Métricas no formato texto do Prometheus; `rotulos` vão em todas as séries (ex.: {'coletor': 'rest'})."""
+        resumo = self.resumo()
+        base = ''.join(f'{chave}="{valor}",' for chave, valor in (rotulos or {}).items())
+        with self._lock:
+            latencias = {nome: sorted(endpoint.latencias) for nome, endpoint in self._endpoints.items()}
+
+        linhas = [
+            '# HELP coleta_requisicoes_total Requisições à API do GitHub por endpoint e status.',
+            '# TYPE coleta_requisicoes_total counter',
+        ]
+        for nome, endpoint in resumo['endpoints'].items():
+            for status, quantidade in sorted(endpoint['status'].items()):
+                linhas.append(f'coleta_requisicoes_total{{{base}endpoint="{nome}",status="{status}"}} {quantidade}')
+
+        linhas += [
+            '# HELP coleta_requisicao_segundos Latência das requisições à API do GitHub.',
+            '# TYPE coleta_requisicao_segundos summary',
+        ]
+        for nome, ordenadas in sorted(latencias.items()):
+            for q in QUANTIS:
+                linhas.append(f'coleta_requisicao_segundos{{{base}endpoint="{nome}",quantile="{q}"}} {_quantil(ordenadas, q):.6f}')
+            linhas.append(f'coleta_requisicao_segundos_sum{{{base}endpoint="{nome}"}} {sum(ordenadas):.6f}')
+            linhas.append(f'coleta_requisicao_segundos_count{{{base}endpoint="{nome}"}} {len(ordenadas)}')
+
+        for metrica, campo, descricao in (
+            ('coleta_novas_tentativas_total', 'novas_tentativas', 'Requisições repetidas após uma falha.'),
+            ('coleta_bytes_recebidos_total', 'bytes', 'Bytes recebidos nos corpos das respostas.'),
+            ('coleta_custo_rate_limit_total', 'custo_rate_limit', 'Pontos de rate limit gastos.'),
+        ):
+            linhas += [f'# HELP {metrica} {descricao}', f'# TYPE {metrica} counter']
+            for nome, endpoint in resumo['endpoints'].items():
+                linhas.append(f'{metrica}{{{base}endpoint="{nome}"}} {endpoint[campo]}')
+
+        linhas += [
+            '# HELP coleta_espera_segundos_total Tempo parado esperando, por motivo.',
+            '# TYPE coleta_espera_segundos_total counter',
+        ]
+        for motivo, segundos in sorted(resumo['esperas_s'].items()):
+            linhas.append(f'coleta_espera_segundos_total{{{base}motivo="{motivo}"}} {segundos:.6f}')
+
+        linhas += [
+            '# HELP coleta_duracao_segundos Duração da execução.',
+            '# TYPE coleta_duracao_segundos gauge',
+            f'coleta_duracao_segundos{{{base.rstrip(",")}}} {resumo["duracao_s"]:.3f}',
+        ]
+        return '\n'.join(linhas) + '\n'
+
+    def exportar(self, prefixo, rotulos=None):
+        """Grava PREFIXO.prom e PREFIXO.json e devolve o resumo."""
+        resumo = self.resumo()
+        # Escrita atômica: o node_exporter nunca lê um arquivo pela metade.
+        for extensao, conteudo in (('.prom', self.prometheus(rotulos)),
+                                   ('.json', json.dumps(resumo, indent=2, ensure_ascii=False))):
+            caminho = prefixo + extensao
+            with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(conteudo)
+            os.replace(caminho + '.tmp', caminho)
+        return resumo
+
+
+def imprimir_resumo(resumo):
+    """Mostra o resumo de exportar()/resumo() como tabela."""
+    print(f"\n{'endpoint':<22}{'req':>7}{'retry':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'KiB':>9}{'custo':>7}")
+    for nome, endpoint in resumo['endpoints'].items():
+        print(f"{nome:<22}{endpoint['requisicoes']:>7}{endpoint['novas_tentativas']:>7}"
+              f"{endpoint['p50_ms']:>7.0f}ms{endpoint['p95_ms']:>7.0f}ms{endpoint['p99_ms']:>7.0f}ms"
+              f"{endpoint['bytes'] / 1024:>9.0f}{endpoint['custo_rate_limit']:>7}")
+    esperas = ', '.join(f"{motivo} {segundos:.1f} s" for motivo, segundos in sorted(resumo['esperas_s'].items()))
+    print(f"Duração: {resumo['duracao_s']:.1f} s; em requisições: {resumo['tempo_em_requisicoes_s']:.1f} s; "
+          f"esperando: {resumo['tempo_esperando_s']:.1f} s" + (f" ({esperas})" if esperas else '') + '.')
+
+
+_instrumentacao = None
+_lock_instrumentacao = threading.Lock()
+
+
+def obter_instrumentacao():
+    """Devolve a instrumentação do processo, criada na primeira chamada."""
+    global _instrumentacao
+    with _lock_instrumentacao:
+        if _instrumentacao is None:
+            _instrumentacao = Instrumentacao()
+    return _instrumentacao
@@ -0,0 +1,138 @@
+"""
+Agendador central do rate limit do GitHub, compartilhado pelos coletores REST e GraphQL.
+
+O GitHub tem orçamentos separados por recurso: 'core' (API REST), 'search'
+(busca) e 'graphql' (pontos). Para cada recurso o agendador mantém um balde de
+fichas (token bucket). A taxa de reposição é o restante do orçamento dividido
+pelo tempo até o reset, o que espalha as requisições pela janela em vez de
+gastar tudo no início e parar em 403. Antes de cada requisição, adquirir()
+bloqueia a thread até haver ficha e orçamento. As respostas atualizam o balde
+pelos cabeçalhos X-RateLimit-*. Como todas as threads usam o mesmo agendador
+para um token (ver pool_tokens), os trabalhadores concorrentes dividem um único orçamento.
+"""
+import os
+import threading
+import time
+
+# Orçamento e duração da janela (segundos) assumidos até a primeira resposta de cada recurso.
+LIMITES_PADRAO = {
+    'core': (5000, 3600),
+    'search': (30, 60),
+    'graphql': (5000, 3600),
+}
+
+# Parte do orçamento que nunca é usada, para absorver requisições de outros processos.
+MARGEM = int(os.getenv('RATE_LIMIT_MARGEM', '5'))
+
+# Quantas requisições podem sair de uma vez antes de o ritmo uniforme começar a valer.
+RAJADA = int(os.getenv('RATE_LIMIT_RAJADA', '20'))
+
+
+def recurso_da_url(url):
+    """Recurso de rate limit que uma URL da API consome."""
+    if url.rstrip('/').endswith('/graphql'):
+        return 'graphql'
+    if '/search/' in url:
+        return 'search'
+    return 'core'
+
+
+class _Balde:
+    def __init__(self, recurso, rajada):
+        self.limite, duracao = LIMITES_PADRAO.get(recurso, LIMITES_PADRAO['core'])
+        self.duracao = duracao
+        self.restante = self.limite
+        self.reset = time.time() + duracao
+        self.fichas = rajada
+        self.atualizado_em = time.time()
+        # Falso enquanto `restante` for só uma suposição (LIMITES_PADRAO ou janela virada sem resposta).
+        self.confirmado = False
+
+
+class AgendadorLimite:
+    """Baldes de fichas por recurso, alimentados pelos cabeçalhos de rate limit."""
+
+    def __init__(self, margem=MARGEM, rajada=RAJADA):
+        self.margem = margem
+        self.rajada = rajada
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def _balde(self, recurso):
+        if recurso not in self._baldes:
+            self._baldes[recurso] = _Balde(recurso, self.rajada)
+        return self._baldes[recurso]
+
+    def adquirir(self, recurso, custo=1):
+        """Bloqueia até a requisição poder ser feita e devolve quantos segundos esperou."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                balde = self._balde(recurso)
+                agora = time.time()
+
+                if agora >= balde.reset:
+                    # A janela virou e ainda não chegou resposta da nova: assume o orçamento cheio.
+                    balde.restante = balde.limite
+                    balde.reset = agora + balde.duracao
+                    balde.confirmado = False
+
+                disponivel = balde.restante - self.margem
+                taxa = max(disponivel, 0) / max(balde.reset - agora, 1)
+                # Uma requisição mais cara que a rajada (um lote GraphQL grande) precisa caber no balde.
+                balde.fichas = min(max(self.rajada, custo), balde.fichas + (agora - balde.atualizado_em) * taxa)
+                balde.atualizado_em = agora
+
+                if disponivel < custo:
+                    espera = balde.reset - agora + 1
+                elif balde.fichas >= custo:
+                    balde.fichas -= custo
+                    balde.restante -= custo
+                    return esperado
+                else:
+                    espera = (custo - balde.fichas) / taxa
+
+            time.sleep(espera)
+            esperado += espera
+
+    def restante(self, recurso):
+        """Orçamento restante conhecido para o recurso."""
+        with self._lock:
+            return self._balde(recurso).restante
+
+    def devolver(self, recurso, custo=1):
+        """Devolve ao orçamento uma requisição que a API não descontou."""
+        with self._lock:
+            balde = self._balde(recurso)
+            balde.restante = min(balde.limite, balde.restante + custo)
+
+    def atualizar(self, recurso, limite, restante, reset):
+        """Atualiza um recurso com o limite, o restante e o reset (epoch) informados pela API."""
+        with self._lock:
+            balde = self._balde(recurso)
+            if not balde.confirmado or reset > balde.reset + 1:
+                # Primeira resposta do recurso ou janela nova: o restante suposto não vale mais.
+                balde.restante = restante
+            else:
+                # Respostas concorrentes chegam fora de ordem; vale o menor restante da mesma janela.
+                balde.restante = min(balde.restante, restante)
+            balde.limite = limite
+            balde.reset = reset
+            balde.confirmado = True
+
+    def atualizar_por_cabecalhos(self, headers, recurso=None):
+        """Atualiza a partir dos cabeçalhos X-RateLimit-* de uma resposta."""
+        restante = headers.get('X-RateLimit-Remaining')
+        if restante is None:
+            return
+        self.atualizar(
+            headers.get('X-RateLimit-Resource', recurso or 'core'),
+            int(headers.get('X-RateLimit-Limit', restante)),
+            int(restante),
+            int(headers.get('X-RateLimit-Reset', time.time() + 60))
+        )
+
+    def atualizar_recursos(self, resources):
+        """Atualiza todos os recursos a partir do campo 'resources' do endpoint /rate_limit."""
+        for recurso, info in resources.items():
+            self.atualizar(recurso, info['limit'], info['remaining'], info['reset'])
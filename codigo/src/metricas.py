@@ -0,0 +1,59 @@
+"""
+Métricas derivadas dos repositórios, calculadas de forma vetorizada.
+
+O coletor GraphQL e o relatório usam as mesmas colunas derivadas: idade do
+repositório, dias desde a última atualização, razão de issues fechadas e
+releases por ano. Todas são calculadas aqui, sobre colunas inteiras de NumPy,
+em vez de um df.apply(axis=1), que roda uma função Python por linha. As
+divisões são mascaradas, nunca dão inf: onde o denominador é zero ou ausente,
+releases_per_year é 0 e closed_issues_ratio fica indefinida (NaN), para que
+repositórios sem issues fiquem fora da mediana da RQ06.
+"""
+import numpy as np
+import pandas as pd
+
+DIAS_POR_ANO = 365.25
+
+
+def dividir(numerador, denominador, padrao=0.0):
+    """Divide elemento a elemento; onde o denominador não é positivo (ou é NaN), devolve `padrao`."""
+    numerador = np.asarray(numerador, dtype='float64')
+    denominador = np.asarray(denominador, dtype='float64')
+    resultado = np.full(np.broadcast(numerador, denominador).shape, padrao, dtype='float64')
+    np.divide(numerador, denominador, out=resultado, where=denominador > 0)
+    return resultado
+
+
+def _dias_ate(agora, datas):
+    if not pd.api.types.is_datetime64_any_dtype(datas):
+        datas = pd.to_datetime(datas, format='ISO8601')
+    return datas, (agora - datas).dt.days
+
+
+def adicionar_metricas(df, agora=None):
+    """
+    Acrescenta ao DataFrame as colunas derivadas, em uma passada:
+
+    - repository_age_days e days_since_last_update, a partir de creation_date e
+      last_update_date. Só são recalculadas se `agora` for informado ou se ainda
+      não existirem, para que o relatório use as idades do momento da coleta.
+    - closed_issues_ratio: closed_issues / total_issues (NaN sem issues).
+    - releases_per_year: total_releases / idade em anos (0 para repositórios com menos de um dia).
+
+    As colunas de datas são convertidas para datetime. Uma coluna derivada só é
+    calculada se as colunas de que ela depende estiverem no DataFrame, para que
+    quem leu só parte das colunas (ver formato_colunar) possa usar esta função.
+    Devolve o próprio DataFrame.
+    """
+    recalcular = agora is not None
+    agora = agora or pd.Timestamp.now(tz='UTC')
+    if 'creation_date' in df and (recalcular or 'repository_age_days' not in df):
+        df['creation_date'], df['repository_age_days'] = _dias_ate(agora, df['creation_date'])
+    if 'last_update_date' in df and (recalcular or 'days_since_last_update' not in df):
+        df['last_update_date'], df['days_since_last_update'] = _dias_ate(agora, df['last_update_date'])
+
+    if 'closed_issues' in df and 'total_issues' in df:
+        df['closed_issues_ratio'] = dividir(df['closed_issues'], df['total_issues'], padrao=np.nan)
+    if 'total_releases' in df and 'repository_age_days' in df:
+        df['releases_per_year'] = dividir(df['total_releases'], df['repository_age_days'] / DIAS_POR_ANO)
+    return df
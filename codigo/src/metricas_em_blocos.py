@@ -0,0 +1,176 @@
+"""
+Métricas das RQ01 a RQ06 calculadas em blocos, sem carregar o conjunto inteiro.
+
+metricas_repositorios_populares() lê todas as linhas e chama .median() em
+cada coluna. Aqui o conjunto é lido em blocos (ver formato_colunar.ler_em_blocos)
+e cada bloco alimenta:
+- contadores exatos: quantidade de repositórios, total de pull requests aceitos
+  (RQ02), repositórios por linguagem (RQ05), e soma, mínimo e máximo de cada métrica;
+- um esboço KLL por métrica com mediana (RQ01, RQ03, RQ04, RQ06), ver esboco_quantis.
+
+A memória fica em um bloco mais uns poucos milhares de valores por métrica,
+qualquer que seja o tamanho do conjunto. As contagens são exatas; as medianas
+são aproximadas, com erro de rank de até erro_rank(k) (~1,3% dos repositórios
+com k=200), e o valor devolvido é sempre o de algum repositório.
+
+Métricas de partes diferentes (arquivos, snapshots ou processos) podem ser
+mescladas: cada parte grava a sua com --salvar, e os JSONs são passados juntos.
+
+Uso: python metricas_em_blocos.py ENTRADA... [--linhas-por-bloco 100000] [--k 200] [--salvar METRICAS.json]
+     (ENTRADA: conjunto .parquet/.feather/.csv ou métricas .json já salvas)
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from esboco_quantis import K_PADRAO, EsbocoKLL, erro_rank
+from formato_colunar import ler_em_blocos
+from metricas import adicionar_metricas
+
+# Colunas lidas do disco; razão de issues e releases por ano saem delas.
+COLUNAS_LIDAS = ['repository_age_days', 'accepted_pull_requests', 'total_releases',
+                 'days_since_last_update', 'primary_language', 'total_issues', 'closed_issues']
+COLUNAS_ESBOCO = ['repository_age_days', 'releases_per_year', 'days_since_last_update', 'closed_issues_ratio']
+LINHAS_POR_BLOCO = 100_000
+
+
+class MetricasEmBlocos:
+    """Contadores exatos e esboços de quantis das RQ01 a RQ06, alimentados bloco a bloco."""
+
+    def __init__(self, k=K_PADRAO, semente=None):
+        self.k = k
+        self.repositorios = 0
+        self.total_pull_requests = 0
+        self.linguagens = {}
+        self.somas = dict.fromkeys(COLUNAS_ESBOCO, 0.0)
+        self.esbocos = {coluna: EsbocoKLL(k, semente) for coluna in COLUNAS_ESBOCO}
+
+    @classmethod
+    def de_arquivo(cls, caminho, linhas_por_bloco=LINHAS_POR_BLOCO, k=K_PADRAO):
+        metricas = cls(k)
+        for bloco in ler_em_blocos(caminho, COLUNAS_LIDAS, linhas_por_bloco):
+            metricas.adicionar_bloco(bloco)
+        return metricas
+
+    def adicionar_bloco(self, df):
+        df = adicionar_metricas(df)
+        self.repositorios += len(df)
+        self.total_pull_requests += int(df['accepted_pull_requests'].sum())
+        for linguagem, quantidade in df['primary_language'].value_counts().items():
+            if quantidade:
+                self.linguagens[linguagem] = self.linguagens.get(linguagem, 0) + int(quantidade)
+        for coluna, esboco in self.esbocos.items():
+            esboco.adicionar(df[coluna])
+            self.somas[coluna] += float(df[coluna].sum())
+
+    def mesclar(self, outras):
+        """Junta as métricas de `outras` (de outro arquivo ou processo) a estas e devolve estas."""
+        self.repositorios += outras.repositorios
+        self.total_pull_requests += outras.total_pull_requests
+        for linguagem, quantidade in outras.linguagens.items():
+            self.linguagens[linguagem] = self.linguagens.get(linguagem, 0) + quantidade
+        for coluna, esboco in self.esbocos.items():
+            esboco.mesclar(outras.esbocos[coluna])
+            self.somas[coluna] += outras.somas[coluna]
+        self.k = min(self.k, outras.k)
+        return self
+
+    @property
+    def vazia(self):
+        return self.repositorios == 0
+
+    @property
+    def erro_rank(self):
+        return erro_rank(self.k)
+
+    def mediana(self, coluna):
+        return self.esbocos[coluna].mediana()
+
+    def quantil(self, coluna, q):
+        return self.esbocos[coluna].quantil(q)
+
+    def media(self, coluna):
+        esboco = self.esbocos[coluna]
+        return self.somas[coluna] / esboco.n if esboco.n else float('nan')
+
+    def linguagens_comuns(self, n=10):
+        """Quantidade exata de repositórios das `n` linguagens mais comuns."""
+        contagens = pd.Series(self.linguagens, dtype='int64', name='count')
+        contagens.index.name = 'primary_language'
+        return contagens.sort_values(ascending=False, kind='stable').head(n)
+
+    def imprimir(self):
+        """Mostra os resultados das RQ01 a RQ06, como metricas_repositorios_populares()."""
+        print(f"Repositórios: {self.repositorios} (medianas aproximadas, erro de rank de até "
+              f"{self.erro_rank:.1%}; contagens exatas)")
+        print(f"Idade mediana dos repositórios (em dias): {self.mediana('repository_age_days'):.2f}")
+        print(f"Total de pull requests aceitos: {self.total_pull_requests}")
+        print(f"Frequência mediana de lançamento de releases por ano: {self.mediana('releases_per_year'):.2f}")
+        print(f"Tempo mediano desde a última atualização (em dias): {self.mediana('days_since_last_update'):.2f}")
+        print("Linguagens de programação mais comuns entre os repositórios:")
+        print(self.linguagens_comuns(10))
+        print(f"Razão mediana de issues fechadas para issues totais: {self.mediana('closed_issues_ratio'):.2f}")
+
+    def para_dict(self):
+        return {
+            'k': self.k,
+            'repositorios': self.repositorios,
+            'total_pull_requests': self.total_pull_requests,
+            'linguagens': self.linguagens,
+            'somas': self.somas,
+            'esbocos': {coluna: esboco.para_dict() for coluna, esboco in self.esbocos.items()},
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        metricas = cls(dados['k'])
+        metricas.repositorios = dados['repositorios']
+        metricas.total_pull_requests = dados['total_pull_requests']
+        metricas.linguagens = dict(dados['linguagens'])
+        metricas.somas = dict(dados['somas'])
+        metricas.esbocos = {coluna: EsbocoKLL.de_dict(esboco) for coluna, esboco in dados['esbocos'].items()}
+        return metricas
+
+    def salvar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.para_dict(), f)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with open(caminho, encoding='utf-8') as f:
+            return cls.de_dict(json.load(f))
+
+
+def calcular(entradas, linhas_por_bloco=LINHAS_POR_BLOCO, k=K_PADRAO):
+    """Métricas mescladas de todas as `entradas`: conjuntos de repositórios ou métricas .json já salvas."""
+    total = MetricasEmBlocos(k)
+    for entrada in entradas:
+        if os.path.splitext(entrada)[1].lower() == '.json':
+            total.mesclar(MetricasEmBlocos.carregar(entrada))
+        else:
+            total.mesclar(MetricasEmBlocos.de_arquivo(entrada, linhas_por_bloco, k))
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Métricas das RQ01 a RQ06 em blocos, com memória limitada.')
+    parser.add_argument('entradas', nargs='+', metavar='ENTRADA',
+                        help='Conjuntos de repositórios (.parquet, .feather ou .csv) ou métricas salvas (.json).')
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO)
+    parser.add_argument('--k', type=int, default=K_PADRAO,
+                        help='Precisão dos esboços de quantis; o erro de rank cai com 1/k. Padrão: %(default)s.')
+    parser.add_argument('--salvar', metavar='METRICAS_JSON',
+                        help='Grava as métricas mescladas, para juntar depois com as de outras partes.')
+    args = parser.parse_args()
+
+    metricas = calcular(args.entradas, args.linhas_por_bloco, args.k)
+    if args.salvar:
+        metricas.salvar(args.salvar)
+        print(f"Métricas de {metricas.repositorios} repositórios salvas em '{args.salvar}'.")
+
+    if metricas.vazia:
+        print("Nenhum repositório nas entradas.")
+    else:
+        metricas.imprimir()
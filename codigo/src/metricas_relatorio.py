@@ -1,21 +1,54 @@
-import pandas as pd
-from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+import os
+import time
+import argparse
 
+from metricas_em_blocos import LINHAS_POR_BLOCO, calcular
+from perfilamento import etapa, perfilar
+from renderizacao import Figura, renderizar_figuras
+from sessao_analise import SessaoAnalise
 
-def metricas_repositorios_populares(arq_csv):
+# Colunas que cada relatório lê do disco; as derivadas (razão, releases por ano) saem delas.
+COLUNAS_RQ01_RQ06 = ['repository_age_days', 'accepted_pull_requests', 'total_releases',
+                     'days_since_last_update', 'primary_language', 'total_issues', 'closed_issues']
+COLUNAS_RQ07 = ['primary_language', 'accepted_pull_requests', 'total_releases',
+                'repository_age_days', 'days_since_last_update']
 
-    df = pd.read_csv(arq_csv)
+ARQUIVOS_DADOS = ['repositorios_populares.parquet', 'repositorios_populares.feather', 'repositorios_populares.csv']
 
-    if df.empty:
+
+def arquivo_de_dados(entrada=None):
+    """`entrada` ou, sem ela, o primeiro de ARQUIVOS_DADOS que existir (o formato colunar antes do CSV)."""
+    return entrada or next((arq for arq in ARQUIVOS_DADOS if os.path.exists(arq)), ARQUIVOS_DADOS[-1])
+
+
+def abrir_sessao(fonte, colunas=None):
+    """
+    Aceita uma SessaoAnalise já aberta ou o caminho do conjunto (CSV, Parquet ou Feather),
+    lendo só as `colunas` informadas. Devolve None se o arquivo não existir.
+    """
+    if isinstance(fonte, SessaoAnalise):
+        return fonte
+    try:
+        return SessaoAnalise.de_arquivo(fonte, colunas)
+    except FileNotFoundError:
+        print(f"\nErro: O arquivo '{fonte}' não foi encontrado.")
+        return None
+
+
+def metricas_repositorios_populares(fonte):
+
+    sessao = abrir_sessao(fonte, COLUNAS_RQ01_RQ06)
+    if sessao is None:
+        return
+
+    if sessao.vazia:
         print("\nDataframe vazio, não há dados para calcular métricas.")
         return
-    
+
+    df = sessao.df
+
     # RQ1: Idade mediana dos repositórios
-    idade_media_repos = df['repository_age_days'].median()
+    idade_media_repos = sessao.mediana('repository_age_days')
     print(f"Idade mediana dos repositórios (em dias): {idade_media_repos:.2f}")
 
     # RQ2: Total de pull requests aceitos
@@ -23,150 +56,65 @@ def metricas_repositorios_populares(arq_csv):
     print(f"Total de pull requests aceitos: {total_pr_aceitos}")
 
     # RQ3: Frequência lancamento releases
-    df['releases_per_year'] = df['total_releases'] / (df['repository_age_days'] / 365.25)
-    freq_lancamento_releases = df['releases_per_year'].median()
+    freq_lancamento_releases = sessao.mediana('releases_per_year')
     print(f"Frequência mediana de lançamento de releases por ano: {freq_lancamento_releases:.2f}")
 
     # RQ4: Tempo médio desde a última atualização
-    tempo_medio_ultima_atualizacao = df['days_since_last_update'].median()
+    tempo_medio_ultima_atualizacao = sessao.mediana('days_since_last_update')
     print(f"Tempo médio desde a última atualização (em dias): {tempo_medio_ultima_atualizacao:.2f}")
 
     # RQ5: Linguagens de programação mais comuns
-    linguagens_comuns = df['primary_language'].value_counts().head(10)
+    linguagens_comuns = sessao.linguagens_comuns(10)
     print("Linguagens de programação mais comuns entre os repositórios:")
     print(linguagens_comuns)
 
     # RQ6: Razao de issues fechadas para issues totais
-    df['issue_closure_rate'] = df['closed_issues'] / df['total_issues']
-    razao_issues_fechadas = df['issue_closure_rate'].median()
+    razao_issues_fechadas = sessao.mediana('closed_issues_ratio')
     print(f"Razão mediana de issues fechadas para issues totais: {razao_issues_fechadas:.2f}")    
 
 
 
 # Visualizações
+#
+# Cada figura é desenhada por uma função de módulo que recebe o caminho de destino e
+# só os dados de que precisa, para poder rodar em outro processo (ver renderizacao).
+# matplotlib e seaborn são importados só ao desenhar: as métricas em texto não precisam deles.
 
-def visualizacoes_metricas(arq_csv):
-    try:
-        df = pd.read_csv(arq_csv)
-    except FileNotFoundError:
-        print(f"\nErro: O arquivo '{arq_csv}' não foi encontrado.")
-        return
+def _histograma(destino, valores, mediana, legenda, titulo, eixo_x, bins):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    if df.empty:
-        print("\nDataframe vazio, não há dados para analisar.")
-        return
-
-    df['releases_per_year'] = df['total_releases'] / (df['repository_age_days'] / 365.25)
-    df['issue_closure_rate'] = df.apply(
-        lambda row: row['closed_issues'] / row['total_issues'] if row['total_issues'] > 0 else 0,
-        axis=1
-    )    
-    top_10_languages = df['primary_language'].value_counts().head(10).index
-    df_top_lang = df[df['primary_language'].isin(top_10_languages)].copy()
-    
-    sns.set_theme(style="whitegrid")
-    print("Gerando visualizações e análises...")
-
-    # --- RQ01: Idade dos repositórios ---
     plt.figure(figsize=(10, 6))
-    sns.histplot(df['repository_age_days'], kde=True, bins=30)
-    idade_mediana = df['repository_age_days'].median()
-    plt.axvline(idade_mediana, color='red', linestyle='--', linewidth=2, label=f'Mediana: {idade_mediana:.0f} dias')
-    plt.title('RQ01: Distribuição da Idade dos Repositórios Populares', fontsize=16)
-    plt.xlabel('Idade em Dias')
+    sns.histplot(valores, kde=True, bins=bins)
+    plt.axvline(mediana, color='red', linestyle='--', linewidth=2, label=legenda)
+    plt.title(titulo, fontsize=16)
+    plt.xlabel(eixo_x)
     plt.ylabel('Contagem de Repositórios')
     plt.legend()
-    plt.savefig('RQ01_idade_repositorios.png')
+    plt.savefig(destino)
     plt.close()
 
-    # --- RQ02: Contribuição externa por linguagem ---
-    median_prs_by_lang = df_top_lang.groupby('primary_language')['accepted_pull_requests'].median().sort_values(ascending=False)
-    plt.figure(figsize=(12, 8))
-    sns.barplot(x=median_prs_by_lang.values, y=median_prs_by_lang.index, palette='magma', orient='h', hue=median_prs_by_lang.index, legend=False)
-    plt.title('RQ02: Mediana de Pull Requests Aceitas por Linguagem', fontsize=16)
-    plt.xlabel('Mediana de Pull Requests Aceitas')
-    plt.ylabel('Linguagem Primária')
-    plt.tight_layout()
-    plt.savefig('RQ02_comparacao_linguagens.png', dpi=150)
-    plt.close()
 
-    # --- RQ03: Frequência de Releases ---
-    df_releases_filtered = df[df['releases_per_year'] < df['releases_per_year'].quantile(0.95)]
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df_releases_filtered['releases_per_year'], kde=True, bins=25)
-    releases_mediana = df['releases_per_year'].median()
-    plt.axvline(releases_mediana, color='red', linestyle='--', linewidth=2, label=f'Mediana: {releases_mediana:.2f} releases/ano')
-    plt.title('RQ03: Frequência Anual de Releases (95% dos dados)', fontsize=16)
-    plt.xlabel('Releases por Ano')
-    plt.ylabel('Contagem de Repositórios')
-    plt.legend()
-    plt.savefig('RQ03_frequencia_releases.png')
-    plt.close()
+def _barras(destino, valores, paleta, titulo, eixo_x, eixo_y, dpi='figure'):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    # --- RQ04: Frequência de atualização ---
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['days_since_last_update'], kde=True, bins=30)
-    atualizacao_mediana = df['days_since_last_update'].median()
-    plt.axvline(atualizacao_mediana, color='red', linestyle='--', linewidth=2, label=f'Mediana: {atualizacao_mediana:.0f} dias')
-    plt.title('RQ04: Tempo Desde a Última Atualização', fontsize=16)
-    plt.xlabel('Dias Desde a Última Atualização')
-    plt.ylabel('Contagem de Repositórios')
-    plt.legend()
-    plt.savefig('RQ04_ultima_atualizacao.png')
-    plt.close()
-
-    # --- RQ05: Linguagens mais comuns ---
-    linguagens_comuns = df['primary_language'].value_counts().head(10)
     plt.figure(figsize=(12, 8))
-    sns.barplot(x=linguagens_comuns.values, y=linguagens_comuns.index, palette='viridis', orient='h', hue=linguagens_comuns.index, legend=False)
-    plt.title('RQ05: 10 Linguagens de Programação Mais Comuns', fontsize=16)
-    plt.xlabel('Número de Repositórios')
-    plt.ylabel('Linguagem')
+    sns.barplot(x=valores.values, y=valores.index, palette=paleta, orient='h', hue=valores.index, legend=False)
+    plt.title(titulo, fontsize=16)
+    plt.xlabel(eixo_x)
+    plt.ylabel(eixo_y)
     plt.tight_layout()
-    plt.savefig('RQ05_linguagens_populares.png')
-    plt.close()
-
-    # --- RQ06: Razão de issues fechadas ---
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['issue_closure_rate'], kde=True, bins=20)
-    razao_mediana = df['issue_closure_rate'].median()
-    plt.axvline(razao_mediana, color='red', linestyle='--', linewidth=2, label=f'Mediana: {razao_mediana:.2f}')
-    plt.title('RQ06: Distribuição da Razão de Issues Fechadas', fontsize=16)
-    plt.xlabel('Razão (Issues Fechadas / Issues Totais)')
-    plt.ylabel('Contagem de Repositórios')
-    plt.legend()
-    plt.savefig('RQ06_razao_issues.png')
+    plt.savefig(destino, dpi=dpi)
     plt.close()
 
-    
-def visualizacoes_rq07(arq_csv):
-    """
-    Gera visualizações para a RQ07.
-    """
-    try:
-        df = pd.read_csv(arq_csv)
-    except FileNotFoundError:
-        print(f"Erro: O arquivo '{arq_csv}' não foi encontrado.")
-        return
-
-    df['releases_per_year'] = df['total_releases'] / (df['repository_age_days'] / 365.25)
-    top_10_languages = df['primary_language'].value_counts().head(10).index
-    df_top_lang = df[df['primary_language'].isin(top_10_languages)].copy()
 
-    analise_por_linguagem = df_top_lang.groupby('primary_language').agg(
-        pull_requests=('accepted_pull_requests', 'median'),
-        releases_ano=('releases_per_year', 'median'),
-        dias_ultima_att=('days_since_last_update', 'median')
-    )
-    
-    analise_ordenada = analise_por_linguagem.sort_values(by='pull_requests', ascending=False)
-    
-    print("\n--- Gerando Painel Comparativo para a RQ07 ---")
+def _painel_rq07(destino, analise_ordenada):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
     fig, axes = plt.subplots(1, 3, figsize=(22, 10), sharey=True)
     fig.suptitle('RQ07: Painel Comparativo de Performance por Linguagem', fontsize=20, y=1.02)
-    
-    sns.set_theme(style="whitegrid")
 
     sns.barplot(
         x=analise_ordenada['pull_requests'], 
@@ -210,15 +158,153 @@ def visualizacoes_rq07(arq_csv):
     axes[2].set_ylabel('')
 
     plt.tight_layout(rect=[0, 0, 1, 0.96])
-    plt.savefig('RQ07_painel_comparativo.png', dpi=150)
+    plt.savefig(destino, dpi=150)
     plt.close()
+
+
+def figuras_rq01_rq06(sessao):
+    """Figuras das RQ01 a RQ06, prontas para renderizar_figuras."""
+    df = sessao.df
+
+    # --- RQ01: Idade dos repositórios ---
+    idade_mediana = sessao.mediana('repository_age_days')
+    rq01 = Figura('RQ01_idade_repositorios.png', _histograma, dict(
+        valores=df['repository_age_days'], mediana=idade_mediana,
+        legenda=f'Mediana: {idade_mediana:.0f} dias',
+        titulo='RQ01: Distribuição da Idade dos Repositórios Populares', eixo_x='Idade em Dias', bins=30))
+
+    # --- RQ02: Contribuição externa por linguagem ---
+    median_prs_by_lang = sessao.medianas_por_linguagem(['accepted_pull_requests'])['accepted_pull_requests'].sort_values(ascending=False)
+    rq02 = Figura('RQ02_comparacao_linguagens.png', _barras, dict(
+        valores=median_prs_by_lang, paleta='magma',
+        titulo='RQ02: Mediana de Pull Requests Aceitas por Linguagem',
+        eixo_x='Mediana de Pull Requests Aceitas', eixo_y='Linguagem Primária', dpi=150))
+
+    # --- RQ03: Frequência de Releases ---
+    df_releases_filtered = df[df['releases_per_year'] < sessao.quantil('releases_per_year', 0.95)]
+    releases_mediana = sessao.mediana('releases_per_year')
+    rq03 = Figura('RQ03_frequencia_releases.png', _histograma, dict(
+        valores=df_releases_filtered['releases_per_year'], mediana=releases_mediana,
+        legenda=f'Mediana: {releases_mediana:.2f} releases/ano',
+        titulo='RQ03: Frequência Anual de Releases (95% dos dados)', eixo_x='Releases por Ano', bins=25))
+
+    # --- RQ04: Frequência de atualização ---
+    atualizacao_mediana = sessao.mediana('days_since_last_update')
+    rq04 = Figura('RQ04_ultima_atualizacao.png', _histograma, dict(
+        valores=df['days_since_last_update'], mediana=atualizacao_mediana,
+        legenda=f'Mediana: {atualizacao_mediana:.0f} dias',
+        titulo='RQ04: Tempo Desde a Última Atualização', eixo_x='Dias Desde a Última Atualização', bins=30))
+
+    # --- RQ05: Linguagens mais comuns ---
+    rq05 = Figura('RQ05_linguagens_populares.png', _barras, dict(
+        valores=sessao.linguagens_comuns(10), paleta='viridis',
+        titulo='RQ05: 10 Linguagens de Programação Mais Comuns',
+        eixo_x='Número de Repositórios', eixo_y='Linguagem'))
+
+    # --- RQ06: Razão de issues fechadas ---
+    razao_mediana = sessao.mediana('closed_issues_ratio')
+    rq06 = Figura('RQ06_razao_issues.png', _histograma, dict(
+        valores=df['closed_issues_ratio'], mediana=razao_mediana,
+        legenda=f'Mediana: {razao_mediana:.2f}',
+        titulo='RQ06: Distribuição da Razão de Issues Fechadas', eixo_x='Razão (Issues Fechadas / Issues Totais)', bins=20))
+
+    return [rq01, rq02, rq03, rq04, rq05, rq06]
+
+
+def analise_rq07(sessao):
+    """Medianas de pull requests, releases por ano e dias desde a atualização por linguagem."""
+    analise_por_linguagem = sessao.medianas_por_linguagem(
+        ['accepted_pull_requests', 'releases_per_year', 'days_since_last_update']
+    ).rename(columns={
+        'accepted_pull_requests': 'pull_requests',
+        'releases_per_year': 'releases_ano',
+        'days_since_last_update': 'dias_ultima_att',
+    })
+    return analise_por_linguagem.sort_values(by='pull_requests', ascending=False)
+
+
+def figuras_rq07(sessao):
+    return [Figura('RQ07_painel_comparativo.png', _painel_rq07, dict(analise_ordenada=analise_rq07(sessao)))]
+
+
+def visualizacoes_metricas(fonte, diretorio='.', processos=None, refazer=False):
+    sessao = abrir_sessao(fonte, COLUNAS_RQ01_RQ06)
+    if sessao is None:
+        return
+
+    if sessao.vazia:
+        print("\nDataframe vazio, não há dados para analisar.")
+        return
+
+    print("Gerando visualizações e análises...")
+    renderizar_figuras(figuras_rq01_rq06(sessao), diretorio, processos, refazer)
+
     
-    print(analise_ordenada)
+def visualizacoes_rq07(fonte, diretorio='.', processos=None, refazer=False):
+    """
+    Gera visualizações para a RQ07.
+    """
+    sessao = abrir_sessao(fonte, COLUNAS_RQ07)
+    if sessao is None:
+        return
+
+    print("\n--- Gerando Painel Comparativo para a RQ07 ---")
+    renderizar_figuras(figuras_rq07(sessao), diretorio, processos, refazer)
 
+    print(analise_rq07(sessao))
 
 
-if __name__ == '__main__':
+def gerar_graficos(sessao, diretorio='.', processos=None, refazer=False):
+    """Renderiza as figuras das RQ01 a RQ07 que mudaram, em um único pool de processos."""
+    if sessao.vazia:
+        print("\nDataframe vazio, não há dados para analisar.")
+        return
+
+    print("Gerando visualizações e análises...")
+    with etapa('dados das figuras'):
+        figuras = figuras_rq01_rq06(sessao) + figuras_rq07(sessao)
+    inicio = time.perf_counter()
+    with etapa('renderizacao'):
+        gerados = renderizar_figuras(figuras, diretorio, processos, refazer)
+    print(f"{len(gerados)} figuras geradas e {len(figuras) - len(gerados)} sem mudanças em "
+          f"'{os.path.abspath(diretorio)}' ({time.perf_counter() - inicio:.1f} s).")
 
-    # metricas_repositorios_populares('repositorios_populares.csv')
-    visualizacoes_metricas('repositorios_populares.csv')
-    visualizacoes_rq07('repositorios_populares.csv')
\ No newline at end of file
+    print("\n--- Painel Comparativo da RQ07 ---")
+    print(analise_rq07(sessao))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera as métricas e os gráficos das RQs a partir dos repositórios coletados.')
+    parser.add_argument('--entrada',
+                        help='Conjunto de repositórios (.parquet, .feather ou .csv). Padrão: o primeiro de '
+                             + ', '.join(ARQUIVOS_DADOS) + ' que existir.')
+    parser.add_argument('--graficos', default='.', metavar='DIRETORIO',
+                        help='Diretório onde as figuras são salvas. Padrão: o diretório atual.')
+    parser.add_argument('--processos', type=int,
+                        help='Processos usados para renderizar as figuras. Padrão: um por núcleo.')
+    parser.add_argument('--refazer', action='store_true',
+                        help='Gera todas as figuras, mesmo as que não mudaram desde a última execução.')
+    parser.add_argument('--em-blocos', nargs='?', type=int, const=LINHAS_POR_BLOCO, metavar='LINHAS',
+                        help='Só mostra as métricas das RQ01 a RQ06, lendo o conjunto em blocos de LINHAS linhas '
+                             f'(padrão: {LINHAS_POR_BLOCO}) com memória limitada; ver metricas_em_blocos.')
+    parser.add_argument('--perfil', '--profile', nargs='?', const='perfil', metavar='PREFIXO',
+                        help='Mede tempo, CPU e pico de memória da leitura e de cada figura e grava as pilhas amostradas '
+                             'em PREFIXO.folded (padrão: perfil). As figuras são desenhadas em um só processo, '
+                             'e só as que mudaram, a menos que --refazer seja usado.')
+    args = parser.parse_args()
+
+    # Os dados são lidos uma vez e compartilhados por todos os relatórios. O formato
+    # colunar (ver formato_colunar) é preferido ao CSV quando existir.
+    arquivo = arquivo_de_dados(args.entrada)
+    with perfilar(args.perfil):
+        if args.em_blocos:
+            # Conjuntos que não cabem na memória: medianas por esboço de quantis, sem gráficos.
+            with etapa('metricas em blocos'):
+                calcular([arquivo], args.em_blocos).imprimir()
+            raise SystemExit
+        with etapa('leitura (DataFrame)'):
+            sessao = abrir_sessao(arquivo, sorted(set(COLUNAS_RQ01_RQ06) | set(COLUNAS_RQ07)))
+        if sessao is not None:
+            # metricas_repositorios_populares(sessao)
+            # No perfil as figuras são desenhadas aqui mesmo, para medir cada uma.
+            gerar_graficos(sessao, args.graficos, 1 if args.perfil else args.processos, args.refazer)
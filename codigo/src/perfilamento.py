@@ -0,0 +1,183 @@
+"""
+Perfil de execução por etapa dos coletores e do relatório (opção --perfil).
+
+Com o perfil ativo:
+- cada trecho marcado com `with etapa('nome'):` mede o tempo de parede, o tempo
+  de CPU do processo e o pico de memória alocada pelo Python (tracemalloc).
+  Etapas podem ser aninhadas ('renderizacao/RQ01_idade_repositorios.png') e
+  repetidas (os lotes da escrita incremental): a tabela soma os tempos e guarda
+  o maior pico;
+- uma thread amostra as pilhas de todas as threads a cada INTERVALO_AMOSTRAGEM
+  segundos e grava PREFIXO.folded em pilhas colapsadas ('etapa;função;função N'),
+  o formato que flamegraph.pl, inferno e speedscope leem. A raiz de cada pilha é
+  a etapa em que a thread principal estava.
+
+A amostragem foi preferida ao cProfile porque vê todas as threads (os coletores
+fazem as requisições em threads) e não pesa mais em funções curtas e muito
+chamadas, como o apply por linha. O tracemalloc deixa a execução mais lenta: os
+tempos com perfil servem para comparar etapas entre si e entre commits, não com
+execuções sem perfil.
+
+Sem o perfil, etapa() não faz nada. As etapas só são medidas na thread que ativou
+o perfil; nas outras, etapa() também não faz nada.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+INTERVALO_AMOSTRAGEM = 0.005
+PROFUNDIDADE_MAXIMA = 128
+
+
+def _nome_funcao(codigo):
+    return f"{getattr(codigo, 'co_qualname', codigo.co_name)} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+
+def _ociosa(codigos):
+    """Thread de um ThreadPoolExecutor parada esperando trabalho na fila."""
+    return any(codigo.co_name == '_worker' and i > 0 and codigos[i - 1].co_name == 'get'
+               for i, codigo in enumerate(codigos))
+
+
+class Perfilador:
+    """Tempos e picos de memória por etapa, mais as pilhas amostradas de todas as threads."""
+
+    def __init__(self, intervalo=INTERVALO_AMOSTRAGEM):
+        self.intervalo = intervalo
+        self.etapas = {}
+        self.amostras = Counter()
+        self._abertas = []
+        self._raiz = 'fora de etapas'
+        self._thread = threading.get_ident()
+        self._parar = threading.Event()
+        self._amostrador = threading.Thread(target=self._amostrar, name='perfil-amostrador', daemon=True)
+
+    def iniciar(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._inicio = time.perf_counter()
+        self._cpu = time.process_time()
+        self._amostrador.start()
+
+    def parar(self):
+        self._parar.set()
+        self._amostrador.join()
+        self.duracao = time.perf_counter() - self._inicio
+        self.cpu = time.process_time() - self._cpu
+        self.pico = max([tracemalloc.get_traced_memory()[1]] + [etapa['pico'] for etapa in self.etapas.values()])
+        tracemalloc.stop()
+
+    def _amostrar(self):
+        proprio = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            raiz = self._raiz
+            for ident, frame in sys._current_frames().items():
+                if ident == proprio:
+                    continue
+                codigos = []
+                while frame is not None and len(codigos) < PROFUNDIDADE_MAXIMA:
+                    codigos.append(frame.f_code)
+                    frame = frame.f_back
+                if not _ociosa(codigos):
+                    self.amostras[(raiz, tuple(reversed(codigos)))] += 1
+
+    @contextmanager
+    def etapa(self, nome):
+        if threading.get_ident() != self._thread:
+            yield
+            return
+
+        # O pico da etapa de fora até aqui é guardado antes de zerar o contador para a de dentro.
+        if self._abertas:
+            self._abertas[-1]['pico'] = max(self._abertas[-1]['pico'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        aberta = {'nome': nome.replace(';', ','), 'pico': 0}
+        self._abertas.append(aberta)
+        caminho = '/'.join(etapa['nome'] for etapa in self._abertas)
+        registro = self.etapas.setdefault(caminho, {'vezes': 0, 'parede': 0.0, 'cpu': 0.0, 'pico': 0})
+        self._raiz = ';'.join(etapa['nome'] for etapa in self._abertas)
+        parede, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            registro['vezes'] += 1
+            registro['parede'] += time.perf_counter() - parede
+            registro['cpu'] += time.process_time() - cpu
+            aberta['pico'] = max(aberta['pico'], tracemalloc.get_traced_memory()[1])
+            registro['pico'] = max(registro['pico'], aberta['pico'])
+            self._abertas.pop()
+            if self._abertas:
+                self._abertas[-1]['pico'] = max(self._abertas[-1]['pico'], aberta['pico'])
+            tracemalloc.reset_peak()
+            self._raiz = ';'.join(etapa['nome'] for etapa in self._abertas) or 'fora de etapas'
+
+    def pilhas_colapsadas(self):
+        """Linhas 'etapa;função;...;função N', uma por pilha distinta."""
+        linhas = Counter()
+        for (raiz, codigos), quantidade in self.amostras.items():
+            linhas[';'.join([raiz] + [_nome_funcao(codigo) for codigo in codigos])] += quantidade
+        return [f'{pilha} {quantidade}' for pilha, quantidade in sorted(linhas.items())]
+
+    def tabela(self):
+        amostras_por_raiz = Counter()
+        for (raiz, _), quantidade in self.amostras.items():
+            amostras_por_raiz[raiz] += quantidade
+
+        linhas = [f"{'etapa':<44}{'vezes':>6}{'parede':>10}{'%':>6}{'CPU':>10}{'pico':>12}{'amostras':>10}",
+                  f"{'total':<44}{1:>6}{self.duracao:>9.2f}s{100:>6.0f}{self.cpu:>9.2f}s"
+                  f"{self.pico / 2 ** 20:>8.1f} MiB{sum(amostras_por_raiz.values()):>10}"]
+        for caminho, registro in self.etapas.items():
+            partes = caminho.split('/')
+            prefixo = ';'.join(partes)
+            amostras = sum(quantidade for raiz, quantidade in amostras_por_raiz.items()
+                           if raiz == prefixo or raiz.startswith(prefixo + ';'))
+            nome = '  ' * len(partes) + partes[-1]
+            linhas.append(f"{nome[:44]:<44}{registro['vezes']:>6}{registro['parede']:>9.2f}s"
+                          f"{100 * registro['parede'] / self.duracao:>6.0f}{registro['cpu']:>9.2f}s"
+                          f"{registro['pico'] / 2 ** 20:>8.1f} MiB{amostras:>10}")
+        return '\n'.join(linhas)
+
+    def gravar(self, prefixo):
+        """Grava PREFIXO.folded (pilhas colapsadas) e PREFIXO.txt (tabela por etapa) e devolve a tabela."""
+        os.makedirs(os.path.dirname(prefixo) or '.', exist_ok=True)
+        with open(prefixo + '.folded', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.pilhas_colapsadas()) + '\n')
+        tabela = self.tabela()
+        with open(prefixo + '.txt', 'w', encoding='utf-8') as f:
+            f.write(tabela + '\n')
+        return tabela
+
+
+_perfilador = None
+
+
+def etapa(nome):
+    """Marca uma etapa do perfil ativo; sem perfil, não faz nada."""
+    return _perfilador.etapa(nome) if _perfilador is not None else nullcontext()
+
+
+@contextmanager
+def perfilar(prefixo, intervalo=INTERVALO_AMOSTRAGEM):
+    """
+    Ativa o perfil durante o bloco e, ao sair (também por erro ou interrupção), grava
+    PREFIXO.folded e PREFIXO.txt e mostra a tabela por etapa. Com `prefixo` None, não faz nada.
+    """
+    global _perfilador
+    if prefixo is None:
+        yield
+        return
+
+    _perfilador = Perfilador(intervalo)
+    _perfilador.iniciar()
+    try:
+        yield
+    finally:
+        perfilador, _perfilador = _perfilador, None
+        perfilador.parar()
+        print("\n--- Perfil por etapa (pico: memória alocada pelo Python, tracemalloc) ---")
+        print(perfilador.gravar(prefixo))
+        print(f"Pilhas amostradas em '{prefixo}.folded' (flamegraph.pl, inferno ou speedscope) e tabela em '{prefixo}.txt'.")
@@ -0,0 +1,155 @@
+"""
+Planejador de buscas em faixas de estrelas, para passar do limite de 1000
+resultados da busca do GitHub.
+
+O espaço de estrelas é dividido em faixas 'stars:a..b' com no máximo 1000
+resultados cada. Se uma única contagem de estrelas ainda tiver mais de 1000
+repositórios, ela é dividida em faixas de data de criação 'created:x..y'. As
+faixas são buscadas em paralelo e os resultados são unidos, sem repetições e
+ordenados por estrelas, de uma vez (executar_faixas) ou faixa a faixa (percorrer_faixas).
+
+O planejador não conhece a API: quem chama fornece `contar(consulta)`, que
+devolve o total de resultados de uma consulta, e `buscar(consulta)`, que devolve
+todos os repositórios dela. Assim ele serve tanto ao coletor REST quanto ao GraphQL.
+"""
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from itertools import islice
+
+LIMITE_BUSCA = 1000
+
+# Nenhum repositório do GitHub foi criado antes disso.
+INICIO_GITHUB = date(2007, 10, 1)
+
+
+def encontrar_estrelas_minimas(contar, total_desejado, estrelas_max):
+    """
+    Encontra um número de estrelas T tal que 'stars:>=T' tenha pelo menos `total_desejado`
+    repositórios, descendo T pela metade a partir de `estrelas_max`.
+    """
+    estrelas_min = estrelas_max
+    while estrelas_min > 1:
+        estrelas_min = max(1, estrelas_min // 2)
+        if contar(f"stars:>={estrelas_min}") >= total_desejado:
+            break
+    return estrelas_min
+
+
+def _faixas_por_data(contar, prefixo, inicio, fim, limite):
+    """Divide uma consulta com mais de `limite` resultados em faixas de data de criação."""
+    faixas = []
+    pendentes = [(inicio, fim)]
+    while pendentes:
+        a, b = pendentes.pop()
+        consulta = f"{prefixo} created:{a.isoformat()}..{b.isoformat()}"
+        total = contar(consulta)
+        if total == 0:
+            continue
+        if total <= limite or a == b:
+            if total > limite:
+                print(f"Aviso: '{consulta}' tem {total} resultados; apenas {limite} serão coletados.")
+            faixas.append((consulta, total))
+            continue
+        meio = a + (b - a) // 2
+        pendentes.append((meio + timedelta(days=1), b))
+        pendentes.append((a, meio))
+    return faixas
+
+
+def planejar_faixas(contar, estrelas_min, estrelas_max, limite=LIMITE_BUSCA):
+    """
+    Divide o intervalo [estrelas_min, estrelas_max] em consultas com no máximo `limite`
+    resultados. Devolve uma lista de (consulta, total), da faixa com mais estrelas para a com menos.
+    """
+    faixas = []
+    pendentes = [(estrelas_min, estrelas_max)]
+    while pendentes:
+        a, b = pendentes.pop()
+        consulta = f"stars:{a}..{b}" if a != b else f"stars:{a}"
+        total = contar(consulta)
+        if total == 0:
+            continue
+        if total <= limite:
+            faixas.append((consulta, total, b))
+            continue
+        if a == b:
+            faixas.extend((c, t, b) for c, t in _faixas_por_data(contar, consulta, INICIO_GITHUB, date.today(), limite))
+            continue
+        # A quantidade de repositórios cai muito rápido com o número de estrelas,
+        # então o corte é feito na média geométrica, não na aritmética.
+        meio = max(a, min(b - 1, int(math.sqrt(a * b))))
+        pendentes.append((a, meio))
+        pendentes.append((meio + 1, b))
+
+    faixas.sort(key=lambda faixa: faixa[2], reverse=True)
+    return [(consulta, total) for consulta, total, _ in faixas]
+
+
+def percorrer_faixas(faixas, buscar, chave, estrelas, total_desejado=None, max_paralelo=4):
+    """
+    Busca as faixas em paralelo e entrega a lista de repositórios de cada uma, na ordem
+    das faixas, assim que ela termina. Cada lista vem ordenada por estrelas e sem os
+    repositórios já entregues; como as faixas vão da com mais estrelas para a com menos,
+    a sequência inteira sai ordenada. Só as chaves já entregues e no máximo
+    2 * `max_paralelo` faixas ficam em memória. Com `total_desejado`, para ao chegar nele.
+    """
+    vistos = set()
+    entregues = 0
+    proximas = iter(faixas)
+    with ThreadPoolExecutor(max_workers=max_paralelo) as executor:
+        pendentes = deque()
+
+        def submeter():
+            for consulta, _ in islice(proximas, 2 * max_paralelo - len(pendentes)):
+                pendentes.append((consulta, executor.submit(buscar, consulta)))
+
+        try:
+            submeter()
+            while pendentes:
+                consulta, futuro = pendentes.popleft()
+                repos = futuro.result()
+                submeter()
+                print(f"Faixa '{consulta}': {len(repos)} repositórios.")
+
+                novos = []
+                for repo in sorted(repos, key=estrelas, reverse=True):
+                    if chave(repo) not in vistos:
+                        vistos.add(chave(repo))
+                        novos.append(repo)
+                if total_desejado is not None:
+                    novos = novos[:total_desejado - entregues]
+                entregues += len(novos)
+                yield novos
+
+                if total_desejado is not None and entregues >= total_desejado:
+                    return
+        finally:
+            for _, futuro in pendentes:
+                futuro.cancel()
+
+
+def executar_faixas(faixas, buscar, chave, estrelas, max_paralelo=4):
+    """
+    Busca as faixas em paralelo e devolve os repositórios sem repetições, ordenados por estrelas.
+    `chave(repo)` identifica o repositório e `estrelas(repo)` dá o número de estrelas.
+    """
+    repos = [repo for novos in percorrer_faixas(faixas, buscar, chave, estrelas, max_paralelo=max_paralelo)
+             for repo in novos]
+    return sorted(repos, key=estrelas, reverse=True)
+
+
+def planejar_top_repositorios(contar, estrelas_max, total_desejado):
+    """Faixas que juntas cobrem pelo menos os `total_desejado` repositórios com mais estrelas."""
+    estrelas_min = encontrar_estrelas_minimas(contar, total_desejado, estrelas_max)
+    faixas = planejar_faixas(contar, estrelas_min, estrelas_max)
+    print(f"Busca dividida em {len(faixas)} faixas entre {estrelas_min} e {estrelas_max} estrelas.")
+    return faixas
+
+
+def buscar_top_repositorios(contar, buscar, estrelas_max, total_desejado, chave, estrelas, max_paralelo=4):
+    """Planeja e executa a busca dos `total_desejado` repositórios com mais estrelas."""
+    faixas = planejar_top_repositorios(contar, estrelas_max, total_desejado)
+    repos = executar_faixas(faixas, buscar, chave, estrelas, max_paralelo)
+    return repos[:total_desejado]
@@ -0,0 +1,78 @@
+"""
+Pool de tokens do GitHub com rotação automática.
+
+Os tokens vêm de GITHUB_TOKENS (separados por vírgula) e de GITHUB_TOKEN. Cada
+token tem o seu próprio AgendadorLimite, porque o GitHub conta o rate limit por
+token. Cada requisição vai para o token com mais orçamento restante no recurso
+pedido. Um token esgotado sai da rotação até o reset do seu limite. Com N
+tokens, o limite somado é N vezes o de um token só.
+"""
+import os
+import threading
+import time
+
+from limite_taxa import AgendadorLimite
+
+
+def carregar_tokens():
+    """Lê os tokens de GITHUB_TOKENS e GITHUB_TOKEN, sem repetições e na ordem em que aparecem."""
+    tokens = os.getenv('GITHUB_TOKENS', '').split(',') + [os.getenv('GITHUB_TOKEN', '')]
+    return list(dict.fromkeys(token.strip() for token in tokens if token.strip()))
+
+
+class PoolTokens:
+    """Escolhe, para cada requisição, o token com mais orçamento restante."""
+
+    def __init__(self, tokens):
+        # Sem tokens, as requisições saem com os cabeçalhos de quem chamou e um único orçamento.
+        self.tokens = list(tokens) or [None]
+        self._agendadores = {token: AgendadorLimite() for token in self.tokens}
+        self._suspenso_ate = {}
+        self._lock = threading.Lock()
+
+    def agendador(self, token):
+        return self._agendadores[token]
+
+    def escolher(self, recurso):
+        """Token com mais orçamento restante no recurso, ignorando os suspensos nesse recurso."""
+        agora = time.time()
+        with self._lock:
+            ativos = [token for token in self.tokens if self._suspenso_ate.get((token, recurso), 0) <= agora]
+            if not ativos:
+                # Todos esgotados: usa o que volta primeiro; o agendador dele espera o reset.
+                return min(self.tokens, key=lambda token: self._suspenso_ate[(token, recurso)])
+        return max(ativos, key=lambda token: self._agendadores[token].restante(recurso))
+
+    def registrar(self, token, recurso, response):
+        """Atualiza o orçamento do token com a resposta e o suspende se estiver esgotado."""
+        agendador = self._agendadores[token]
+        agendador.atualizar_por_cabecalhos(response.headers, recurso)
+
+        restante = response.headers.get('X-RateLimit-Remaining')
+        esgotado = restante is not None and int(restante) == 0
+        if response.status_code in (403, 429) and 'rate limit' in response.text.lower():
+            esgotado = True
+
+        if esgotado and len(self.tokens) > 1:
+            recurso = response.headers.get('X-RateLimit-Resource', recurso)
+            if response.headers.get('Retry-After'):
+                # Limite secundário: dura só o que o GitHub pedir, não até o reset da janela.
+                reset = int(time.time()) + int(response.headers['Retry-After'])
+            else:
+                reset = int(response.headers.get('X-RateLimit-Reset', time.time() + 60))
+            with self._lock:
+                self._suspenso_ate[(token, recurso)] = reset
+            print(f"   Token {self.tokens.index(token) + 1}/{len(self.tokens)} esgotado em '{recurso}' até {time.strftime('%H:%M:%S', time.localtime(reset))}.")
+
+
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def obter_pool():
+    """Devolve o pool de tokens do processo, criado na primeira chamada a partir das variáveis de ambiente."""
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = PoolTokens(carregar_tokens())
+    return _pool
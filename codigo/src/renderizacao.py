@@ -0,0 +1,126 @@
+"""
+Renderização das figuras do relatório em paralelo.
+
+Cada figura das RQs é independente das outras, e desenhar e salvar um PNG
+ocupa a CPU. As figuras são distribuídas em um pool de processos, um por
+núcleo, cada um com o backend Agg (sem janela, serve em servidores e em
+contêineres). Uma figura é descrita por Figura(arquivo, desenhar, dados):
+o processo chama desenhar(destino, **dados), então `desenhar` tem que ser uma
+função de módulo e `dados` tem que poder ser serializado (pickle).
+
+Figuras cujos dados não mudaram não são desenhadas de novo. A assinatura de
+uma figura é um hash dos seus dados (colunas, medianas, títulos, bins...) e do
+código da função que a desenha; o manifesto '.figuras.json' no diretório de
+saída guarda a assinatura de cada arquivo gerado. Se só os dados de releases
+mudaram, só a RQ03 é refeita, e a RQ07 apenas se alguma mediana por linguagem mudou.
+"""
+import hashlib
+import json
+import os
+from types import CodeType
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from perfilamento import etapa
+
+Figura = namedtuple('Figura', ['arquivo', 'desenhar', 'dados'])
+
+MANIFESTO = '.figuras.json'
+
+
+def _atualizar_hash(h, valor):
+    if isinstance(valor, (pd.Series, pd.DataFrame)):
+        h.update(pd.util.hash_pandas_object(valor, index=True).values.tobytes())
+        # O hash das linhas não cobre nomes e tipos, que também aparecem na figura.
+        colunas = list(valor.columns) if isinstance(valor, pd.DataFrame) else [valor.name]
+        h.update(repr((colunas, str(valor.dtypes), valor.index.name)).encode())
+    else:
+        h.update(repr(valor).encode())
+
+
+def _atualizar_hash_codigo(h, codigo):
+    # Só o bytecode, as constantes e os nomes usados: números de linha e o caminho do
+    # arquivo ficam de fora, para que mover a função no arquivo não refaça a figura.
+    h.update(codigo.co_code)
+    h.update(repr(codigo.co_names).encode())
+    for constante in codigo.co_consts:
+        if isinstance(constante, CodeType):
+            _atualizar_hash_codigo(h, constante)
+        else:
+            h.update(repr(constante).encode())
+
+
+def assinatura(figura):
+    """Hash do que define a figura: nome do arquivo, código de `desenhar` e dados."""
+    h = hashlib.sha256()
+    h.update(figura.arquivo.encode())
+    _atualizar_hash_codigo(h, figura.desenhar.__code__)
+    for chave in sorted(figura.dados):
+        h.update(chave.encode())
+        _atualizar_hash(h, figura.dados[chave])
+    return h.hexdigest()
+
+
+def _ler_manifesto(diretorio):
+    try:
+        with open(os.path.join(diretorio, MANIFESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _salvar_manifesto(diretorio, manifesto):
+    caminho = os.path.join(diretorio, MANIFESTO)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+    os.replace(caminho + '.tmp', caminho)
+
+
+def _iniciar_processo():
+    import matplotlib
+    matplotlib.use('Agg')
+    import seaborn as sns
+    sns.set_theme(style="whitegrid")
+
+
+def _renderizar(figura, diretorio):
+    destino = os.path.join(diretorio, figura.arquivo)
+    figura.desenhar(destino, **figura.dados)
+    return destino
+
+
+def renderizar_figuras(figuras, diretorio='.', processos=None, refazer=False):
+    """
+    Desenha em `diretorio` (criado se não existir), em paralelo, as figuras que mudaram
+    desde a última execução, e devolve os caminhos gerados. Com `refazer`, desenha todas.
+    `processos` limita o pool (padrão: um por núcleo); com 1, desenha no próprio processo,
+    e cada figura é uma etapa do perfil (ver perfilamento).
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    manifesto = _ler_manifesto(diretorio)
+    assinaturas = {figura.arquivo: assinatura(figura) for figura in figuras}
+    pendentes = [
+        figura for figura in figuras
+        if refazer
+        or manifesto.get(figura.arquivo) != assinaturas[figura.arquivo]
+        or not os.path.exists(os.path.join(diretorio, figura.arquivo))
+    ]
+    if not pendentes:
+        return []
+
+    processos = processos or min(len(pendentes), os.cpu_count() or 1)
+    if processos <= 1:
+        _iniciar_processo()
+        gerados = []
+        for figura in pendentes:
+            with etapa(figura.arquivo):
+                gerados.append(_renderizar(figura, diretorio))
+    else:
+        with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo) as executor:
+            gerados = list(executor.map(_renderizar, pendentes, [diretorio] * len(pendentes)))
+
+    manifesto.update({figura.arquivo: assinaturas[figura.arquivo] for figura in pendentes})
+    _salvar_manifesto(diretorio, manifesto)
+    return gerados
@@ -0,0 +1,76 @@
+"""
+Sessão de análise: carrega o conjunto de repositórios uma vez para todos os relatórios.
+
+Antes, cada relatório (métricas em texto, gráficos RQ01–RQ06 e painel RQ07)
+lia o CSV de novo e recalculava releases_per_year e o filtro das 10 linguagens
+mais comuns. A SessaoAnalise lê os dados uma vez, já tipados (ver
+formato_colunar), calcula as colunas derivadas (ver metricas) e guarda em
+cache as medianas e os agrupamentos já pedidos. As contagens por linguagem são
+um value_counts; as medianas por linguagem saem do cubo de agregados (ver
+cubo_agregados), montado só quando um gráfico ou uma consulta precisa dele.
+"""
+from cubo_agregados import CuboAgregados
+from formato_colunar import carregar
+from metricas import adicionar_metricas
+
+
+def _indice_texto(resultado):
+    # Com índice categórico o seaborn desenha as barras na ordem das categorias, não na do resultado.
+    resultado.index = resultado.index.astype(str)
+    return resultado
+
+
+class SessaoAnalise:
+    """Conjunto de repositórios carregado uma vez, com colunas derivadas e agregações em cache."""
+
+    def __init__(self, df):
+        self.df = adicionar_metricas(df)
+        self._cache = {}
+
+    @classmethod
+    def de_arquivo(cls, caminho, colunas=None):
+        """Abre o conjunto em CSV, Parquet ou Feather; com `colunas`, lê só essas (ver formato_colunar)."""
+        return cls(carregar(caminho, colunas))
+
+    @property
+    def vazia(self):
+        return self.df.empty
+
+    def _em_cache(self, chave, calcular):
+        if chave not in self._cache:
+            self._cache[chave] = calcular()
+        return self._cache[chave]
+
+    def mediana(self, coluna):
+        return self._em_cache(('mediana', coluna), lambda: self.df[coluna].median())
+
+    def quantil(self, coluna, q):
+        return self._em_cache(('quantil', coluna, q), lambda: self.df[coluna].quantile(q))
+
+    def cubo(self, dimensao=None):
+        """Cubo de agregados por linguagem (e por `dimensao`, se informada), montado na primeira chamada."""
+        return self._em_cache(('cubo', dimensao), lambda: CuboAgregados(self.df, dimensao))
+
+    def linguagens_comuns(self, n=10):
+        """Quantidade de repositórios das `n` linguagens mais comuns."""
+        # Mesma ordem de CuboAgregados.contagem_linguagens, sem montar o cubo só para contar.
+        contagem = self._em_cache(('contagem_linguagens',), lambda: self.df['primary_language'].value_counts())
+        return self._em_cache(('linguagens', n), lambda: _indice_texto(contagem.head(n)))
+
+    def top_linguagens(self, n=10):
+        """Linhas dos repositórios cujas linguagens estão entre as `n` mais comuns."""
+        def calcular():
+            top = self.linguagens_comuns(n).index
+            df = self.df[self.df['primary_language'].isin(top)].copy()
+            # Tira as categorias que ficaram de fora, para não aparecerem nos agrupamentos.
+            df['primary_language'] = df['primary_language'].cat.remove_unused_categories()
+            return df
+        return self._em_cache(('top_linguagens', n), calcular)
+
+    def medianas_por_linguagem(self, colunas, n=10):
+        """Medianas das `colunas` por linguagem, entre as `n` linguagens mais comuns."""
+        colunas = tuple(colunas)
+        return self._em_cache(
+            ('medianas_por_linguagem', colunas, n),
+            lambda: _indice_texto(self.cubo().medianas_por_linguagem(list(colunas), n))
+        )
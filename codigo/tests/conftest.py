@@ -0,0 +1,55 @@
+"""
+Configuração dos testes: os módulos de codigo/src são scripts soltos, importados
+pelo nome como quando rodam de dentro do diretório. Rode com `python -m pytest codigo/tests`.
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+for diretorio in (os.path.join(RAIZ, 'codigo', 'src'), os.path.join(RAIZ, 'codigo', 'benchmarks'),
+                  os.path.join(RAIZ, 'sprint1')):
+    if diretorio not in sys.path:
+        sys.path.insert(0, diretorio)
+
+
+@pytest.fixture
+def servidor(monkeypatch, tmp_path):
+    """
+    Simulador da API do GitHub em uma thread, com os dois coletores apontados para ele,
+    sem cache em disco e com o diretório de trabalho em `tmp_path`. Devolve a URL base.
+    """
+    import cache_http
+    import cliente_http
+    import consulta_repositorios
+    import GetData
+    import instrumentacao
+    import pool_tokens
+    import servidor_github
+
+    args = servidor_github.criar_parser().parse_args([
+        '--porta', '0', '--repositorios', '400', '--latencia-ms', '0', '--jitter-ms', '0',
+        '--limite-busca', '5000', '--limite-core', '50000', '--limite-graphql', '50000',
+    ])
+    http = servidor_github.iniciar(args)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{http.server_port}'
+
+    monkeypatch.setenv('GITHUB_TOKEN', 'token-teste')
+    monkeypatch.setenv('GITHUB_TOKENS', '')
+    monkeypatch.setenv('CACHE_HTTP', '0')
+    monkeypatch.setattr(pool_tokens, '_pool', None)
+    monkeypatch.setattr(cache_http, '_cache', None)
+    monkeypatch.setattr(cliente_http, '_sessao', None)
+    monkeypatch.setattr(instrumentacao, '_instrumentacao', None)
+    monkeypatch.setattr(consulta_repositorios, 'API_URL', f'{url}/graphql')
+    for nome, caminho in (('SEARCH_URL', '/search/repositories'), ('SEARCH_ISSUES_URL', '/search/issues'),
+                          ('REPO_BASE_URL', '/repos'), ('GRAPHQL_URL', '/graphql'),
+                          ('RATE_LIMIT_URL', '/rate_limit')):
+        monkeypatch.setattr(GetData, nome, url + caminho)
+    monkeypatch.chdir(tmp_path)
+    yield url
+    http.shutdown()
+    http.server_close()
@@ -0,0 +1,119 @@
+import os
+
+import pytest
+import requests
+
+import cache_http
+import GetData
+from cache_http import CacheRespostas, obter_cache
+
+URL = 'https://api.github.com/repos/dono/repo/releases'
+
+
+def resposta(corpo='{"ok": true}', status=200, **cabecalhos):
+    response = requests.Response()
+    response.status_code = status
+    response.encoding = 'utf-8'
+    response.headers.update(cabecalhos)
+    response._content = corpo.encode('utf-8')
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheRespostas(str(tmp_path / 'cache'))
+
+
+def test_chave_ignora_ordem_dos_parametros(cache):
+    assert cache._caminho(URL, {'per_page': 1, 'page': 2}) == cache._caminho(URL, {'page': 2, 'per_page': 1})
+    assert cache._caminho(URL, None) == cache._caminho(URL, {})
+    assert cache._caminho(URL, {'page': 2}) != cache._caminho(URL, {'page': 3})
+    assert cache._caminho(URL, None) != cache._caminho(URL + '/latest', None)
+
+
+def test_guarda_e_revalida_com_etag(cache):
+    cache.salvar(URL, {'page': 1}, resposta('[1, 2]', ETag='"abc"', Link='<x?page=9>; rel="last"', Server='GitHub'))
+
+    assert cache.cabecalhos_condicionais(URL, {'page': 1}) == {'If-None-Match': '"abc"'}
+    assert cache.cabecalhos_condicionais(URL, {'page': 2}) == {}
+    guardada = cache.resposta(URL, {'page': 1})
+    assert guardada.status_code == 200
+    assert guardada.json() == [1, 2]
+    assert guardada.headers['link'] == '<x?page=9>; rel="last"'
+    assert 'Server' not in guardada.headers
+
+
+def test_sem_etag_nem_last_modified_nao_guarda(cache):
+    cache.salvar(URL, None, resposta())
+    assert cache.resposta(URL, None) is None
+    assert os.listdir(cache.diretorio) == []
+
+    cache.salvar(URL, None, resposta(**{'Last-Modified': 'Tue, 01 Oct 2024 00:00:00 GMT'}))
+    assert cache.cabecalhos_condicionais(URL, None) == {'If-Modified-Since': 'Tue, 01 Oct 2024 00:00:00 GMT'}
+
+
+def test_remove_as_entradas_usadas_ha_mais_tempo(tmp_path):
+    corpo = 'x' * 1000
+    cache = CacheRespostas(str(tmp_path), tamanho_maximo=10_000)
+    for pagina in range(8):
+        cache.salvar(URL, {'page': pagina}, resposta(corpo, ETag=f'"{pagina}"'))
+        os.utime(cache._caminho(URL, {'page': pagina}), (pagina, pagina))
+    # Ler a página 0 a torna a mais recente.
+    assert cache.resposta(URL, {'page': 0}) is not None
+
+    for pagina in range(8, 12):
+        cache.salvar(URL, {'page': pagina}, resposta(corpo, ETag=f'"{pagina}"'))
+
+    restantes = {pagina for pagina in range(12) if cache.resposta(URL, {'page': pagina}) is not None}
+    assert 0 in restantes
+    assert {1, 2}.isdisjoint(restantes)
+    assert {9, 10, 11} <= restantes
+    tamanho = sum(entrada.stat().st_size for entrada in os.scandir(tmp_path))
+    assert tamanho == cache._tamanho_atual <= cache.tamanho_maximo
+    # Um cache aberto de novo parte do tamanho que já está em disco.
+    assert CacheRespostas(str(tmp_path), tamanho_maximo=10_000)._tamanho_atual == tamanho
+
+
+def test_substituir_entrada_nao_conta_duas_vezes(cache):
+    cache.salvar(URL, None, resposta('a' * 100, ETag='"1"'))
+    cache.salvar(URL, None, resposta('a' * 100, ETag='"2"'))
+    assert cache._tamanho_atual == os.path.getsize(cache._caminho(URL, None))
+
+
+def requisicoes_falsas(monkeypatch, respostas):
+    """Troca a requisição do GetData por uma que devolve `respostas` em ordem e guarda os cabeçalhos."""
+    enviados = []
+
+    def requisitar(metodo, url, headers=None, **kwargs):
+        enviados.append(headers)
+        return respostas.pop(0)
+
+    monkeypatch.setattr(GetData, 'requisitar', requisitar)
+    return enviados
+
+
+def test_revalidacao_304_serve_do_cache(monkeypatch, cache):
+    monkeypatch.setenv('CACHE_HTTP', '1')
+    monkeypatch.setattr(cache_http, '_cache', cache)
+    enviados = requisicoes_falsas(monkeypatch, [resposta('{"n": 1}', ETag='"v1"'), resposta('', status=304)])
+
+    assert GetData.fazer_requisicao_com_retry(URL, {'page': 1}) == {'n': 1}
+    assert GetData.fazer_requisicao_com_retry(URL, {'page': 1}) == {'n': 1}
+    assert 'If-None-Match' not in enviados[0]
+    assert enviados[1]['If-None-Match'] == '"v1"'
+
+
+def test_cache_http_0_desliga_o_cache(monkeypatch, cache):
+    cache.salvar(URL, None, resposta('{"n": 1}', ETag='"v1"'))
+    monkeypatch.setattr(cache_http, '_cache', cache)
+    monkeypatch.setenv('CACHE_HTTP', '0')
+    assert obter_cache() is None
+
+    enviados = requisicoes_falsas(monkeypatch, [resposta('{"n": 2}', ETag='"v2"')])
+    assert GetData.fazer_requisicao_com_retry(URL) == {'n': 2}
+    assert 'If-None-Match' not in enviados[0]
+    # A resposta nova não foi gravada: a entrada antiga continua lá.
+    assert cache.cabecalhos_condicionais(URL) == {'If-None-Match': '"v1"'}
+
+    monkeypatch.setenv('CACHE_HTTP', '1')
+    assert obter_cache() is cache
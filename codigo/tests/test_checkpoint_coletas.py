@@ -0,0 +1,140 @@
+"""
+Checkpoint, retomada e finalização dos dois coletores, contra o simulador da API em
+codigo/benchmarks/servidor_github.py (fixture `servidor` do conftest.py).
+"""
+import os
+
+import pandas as pd
+import pytest
+import requests
+
+import consulta_repositorios
+import GetData
+from checkpoint import Checkpoint
+from escrita_incremental import EscritorIncremental
+
+
+class Interrupcao(Exception):
+    """Simula a coleta caindo no meio (processo morto, rede fora)."""
+
+
+def test_checkpoint_retoma_e_descarta(tmp_path):
+    diretorio = str(tmp_path / 'ck')
+    checkpoint = Checkpoint(diretorio)
+    checkpoint.registrar('linhas', {'n': 1})
+    checkpoint.registrar('linhas', {'n': 2})
+    checkpoint.salvar_estado(cursor='abc', pagina=2)
+    checkpoint.fechar()
+    with open(os.path.join(diretorio, 'linhas.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('{"n": 3')  # linha cortada por uma queda no meio da escrita
+
+    retomado = Checkpoint(diretorio, retomar=True)
+    assert retomado.registros('linhas') == [{'n': 1}, {'n': 2}]
+    assert retomado.estado() == {'cursor': 'abc', 'pagina': 2}
+    retomado.fechar()
+
+    novo = Checkpoint(diretorio)
+    assert novo.registros('linhas') == []
+    assert novo.estado() == {}
+    novo.finalizar()
+    assert not os.path.exists(diretorio)
+
+
+def interromper_graphql(monkeypatch, depois_de):
+    """Faz a consulta GraphQL falhar com 500 depois de `depois_de` chamadas."""
+    original = consulta_repositorios.exec_query_graphql
+    chamadas = []
+
+    def falhando(*args, **kwargs):
+        chamadas.append(1)
+        if len(chamadas) > depois_de:
+            resposta = requests.Response()
+            resposta.status_code = 500
+            resposta._content = b'{"message": "erro simulado"}'
+            raise requests.exceptions.HTTPError('500 erro simulado', response=resposta)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(consulta_repositorios, 'exec_query_graphql', falhando)
+    return original
+
+
+def test_graphql_retoma_do_checkpoint(servidor, monkeypatch):
+    consulta_repositorios.main(nome_arquivo='referencia.parquet', total=250)
+    referencia = pd.read_parquet('referencia.parquet')
+    assert len(referencia) == 250
+
+    pd.DataFrame({'repository': ['antigo/repo']}).to_parquet('saida.parquet')
+    original = interromper_graphql(monkeypatch, depois_de=2)
+    consulta_repositorios.main(nome_arquivo='saida.parquet', total=250)
+
+    # A coleta parcial não substitui o arquivo anterior e o progresso fica no checkpoint.
+    assert list(pd.read_parquet('saida.parquet')['repository']) == ['antigo/repo']
+    diario = Checkpoint(consulta_repositorios.DIRETORIO_CHECKPOINT, retomar=True)
+    parciais = diario.registros('repositorios')
+    diario.fechar()
+    assert 0 < len(parciais) < 250
+
+    monkeypatch.setattr(consulta_repositorios, 'exec_query_graphql', original)
+    consulta_repositorios.main(nome_arquivo='saida.parquet', total=250, retomar=True)
+
+    saida = pd.read_parquet('saida.parquet')
+    assert len(saida) == 250
+    assert saida['repository'].is_unique
+    assert set(saida['repository']) == set(referencia['repository'])
+    assert list(saida['repository'][:len(parciais)]) == [linha['repository'] for linha in parciais]
+    assert not os.path.exists(consulta_repositorios.DIRETORIO_CHECKPOINT)
+
+
+def test_graphql_mantem_checkpoint_se_arquivo_final_falha(servidor, monkeypatch):
+    def falha_ao_finalizar(self):
+        raise OSError('disco cheio')
+
+    with monkeypatch.context() as m, pytest.raises(OSError):
+        m.setattr(EscritorIncremental, 'finalizar', falha_ao_finalizar)
+        consulta_repositorios.main(nome_arquivo='saida.parquet', total=120)
+    assert not os.path.exists('saida.parquet')
+
+    # O diário continua lá: a próxima execução com --retomar não precisa buscar tudo de novo.
+    diario = Checkpoint(consulta_repositorios.DIRETORIO_CHECKPOINT, retomar=True)
+    assert len(diario.registros('repositorios')) == 120
+    diario.fechar()
+    consulta_repositorios.main(nome_arquivo='saida.parquet', total=120, retomar=True)
+    assert len(pd.read_parquet('saida.parquet')) == 120
+    assert not os.path.exists(consulta_repositorios.DIRETORIO_CHECKPOINT)
+
+
+def test_getdata_retoma_do_checkpoint(servidor, monkeypatch):
+    os.mkdir('referencia')
+    monkeypatch.chdir('referencia')
+    GetData.main(total_repos_desejados=60, trabalhadores_busca=1)
+    (arquivo_referencia,) = os.listdir('result')
+    referencia = pd.read_csv(os.path.join('result', arquivo_referencia))
+    monkeypatch.chdir('..')
+
+    original = GetData.fazer_requisicao_com_retry
+
+    def cai_na_pagina_2(url, params=None, *args, **kwargs):
+        if url == GetData.SEARCH_URL and (params or {}).get('page') == 2:
+            raise Interrupcao('coleta interrompida na página 2')
+        return original(url, params, *args, **kwargs)
+
+    monkeypatch.setattr(GetData, 'fazer_requisicao_com_retry', cai_na_pagina_2)
+    with pytest.raises(Interrupcao):
+        GetData.main(total_repos_desejados=60, trabalhadores_busca=1)
+
+    diario = Checkpoint(os.path.join('result', 'checkpoint'), retomar=True)
+    assert [registro['pagina'] for registro in diario.registros('busca')] == [1]
+    assert len(diario.registros('detalhes')) <= 25
+    diario.fechar()
+    assert not any(nome.endswith('.csv') for nome in os.listdir('result'))
+
+    monkeypatch.setattr(GetData, 'fazer_requisicao_com_retry', original)
+    GetData.main(total_repos_desejados=60, trabalhadores_busca=1, retomar=True)
+
+    (arquivo,) = [nome for nome in os.listdir('result') if nome.endswith('.csv')]
+    saida = pd.read_csv(os.path.join('result', arquivo))
+    assert len(saida) == 60
+    assert saida['Repositorio'].is_unique
+    assert set(saida['Repositorio']) == set(referencia['Repositorio'])
+    assert saida['Estrelas'].is_monotonic_decreasing
+    assert not os.path.exists(os.path.join('result', 'checkpoint'))
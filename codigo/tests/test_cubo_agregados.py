@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cubo_agregados import LINGUAGEM, METRICAS_CUBO, QUANTIS_CUBO, CuboAgregados, _faixa_estrelas
+from esboco_quantis import erro_rank
+
+
+def conjunto(n=5000, semente=3):
+    rng = np.random.default_rng(semente)
+    razao = rng.random(n)
+    razao[rng.random(n) < 0.1] = np.nan  # repositórios sem issues
+    return pd.DataFrame({
+        LINGUAGEM: pd.Categorical(rng.choice(['Python', 'Go', 'Rust', 'C', 'Zig'], n, p=[0.4, 0.3, 0.2, 0.08, 0.02])),
+        'stars': rng.integers(500, 200_000, n),
+        'creation_date': pd.to_datetime(rng.integers(2010, 2024, n).astype(str) + '-06-01', utc=True),
+        'accepted_pull_requests': rng.integers(0, 5000, n),
+        'releases_per_year': rng.lognormal(1, 1, n),
+        'days_since_last_update': rng.integers(0, 400, n),
+        'closed_issues_ratio': razao,
+    })
+
+
+@pytest.mark.parametrize('q', QUANTIS_CUBO)
+def test_quantis_por_linguagem_iguais_ao_groupby(q):
+    df = conjunto()
+    esperado = df.groupby(LINGUAGEM, observed=True)[METRICAS_CUBO].quantile(q)
+    pd.testing.assert_frame_equal(CuboAgregados(df).quantis(q), esperado, check_names=False)
+
+
+def test_medianas_contagens_e_somas_iguais_ao_pandas():
+    df = conjunto()
+    cubo = CuboAgregados(df)
+    grupos = df.groupby(LINGUAGEM, observed=True)
+
+    comuns = df[LINGUAGEM].value_counts().head(3)
+    medianas = cubo.medianas_por_linguagem(['accepted_pull_requests', 'closed_issues_ratio'], n=3)
+    esperado = grupos[['accepted_pull_requests', 'closed_issues_ratio']].median().loc[medianas.index]
+    pd.testing.assert_frame_equal(medianas, esperado, check_names=False)
+    assert set(medianas.index) == set(comuns.index)
+
+    pd.testing.assert_series_equal(cubo.linguagens_comuns(3), comuns)
+    pd.testing.assert_series_equal(cubo.contagem(), grupos.size(), check_names=False)
+    pd.testing.assert_series_equal(cubo.soma('accepted_pull_requests'), grupos['accepted_pull_requests'].sum(),
+                                   check_names=False)
+    total = cubo.quantis(0.5, por=())
+    assert total.loc['total', 'closed_issues_ratio'] == df['closed_issues_ratio'].median()
+
+
+def test_dimensao_extra_igual_ao_groupby():
+    df = conjunto()
+    cubo = CuboAgregados(df, 'faixa_estrelas')
+    dados = df.assign(faixa_estrelas=_faixa_estrelas(df))
+    for por in [('faixa_estrelas',), (LINGUAGEM, 'faixa_estrelas')]:
+        grupos = dados.groupby(list(por), observed=True)
+        pd.testing.assert_series_equal(cubo.contagem(por), grupos.size(), check_names=False)
+        pd.testing.assert_frame_equal(cubo.quantis(0.75, por), grupos[METRICAS_CUBO].quantile(0.75), check_names=False)
+    with pytest.raises(ValueError):
+        cubo.quantis(0.5, por=('ano_criacao',))
+    with pytest.raises(ValueError):
+        cubo.quantis(0.9)
+
+
+def test_fatia_dentro_do_erro_de_rank():
+    df = conjunto(20_000)
+    cubo = CuboAgregados(df, 'ano_criacao', k=200)
+    linguagens, anos = ['Go', 'Rust'], range(2012, 2018)
+    filtro = df[LINGUAGEM].isin(linguagens) & df['creation_date'].dt.year.isin(anos)
+    fatia = cubo.fatia(0.5, primary_language=linguagens, ano_criacao=anos)
+
+    assert fatia['repositorios'] == filtro.sum()
+    for metrica in METRICAS_CUBO:
+        valores = np.sort(df.loc[filtro, metrica].dropna().to_numpy(dtype='float64'))
+        rank = np.searchsorted(valores, fatia[metrica], side='right') / len(valores)
+        assert abs(rank - 0.5) <= 1.5 * erro_rank(200), metrica
+
+
+def test_fatia_pequena_e_exata():
+    df = conjunto(2000)
+    cubo = CuboAgregados(df)
+    fatia = cubo.fatia(0.5, primary_language=['Zig'])
+    zig = df[df[LINGUAGEM] == 'Zig']
+    assert len(zig) <= cubo.k
+    # Até k valores o esboço guarda todos: o quantil é o da distribuição empírica.
+    for metrica in METRICAS_CUBO:
+        assert fatia[metrica] == np.quantile(zig[metrica].dropna(), 0.5, method='inverted_cdf'), metrica
+    with pytest.raises(ValueError):
+        cubo.fatia(0.5, faixa_estrelas=['<1k'])
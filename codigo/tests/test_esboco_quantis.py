@@ -0,0 +1,100 @@
+import json
+
+import numpy as np
+import pytest
+
+from esboco_quantis import EsbocoKLL, erro_rank
+
+QUANTIS = np.linspace(0.01, 0.99, 99)
+
+
+def erros_de_rank(esboco, ordenados):
+    """Distância entre o rank real de cada quantil devolvido e o q pedido."""
+    ranks = np.searchsorted(ordenados, esboco.quantis(QUANTIS), side='right') / len(ordenados)
+    return np.abs(ranks - QUANTIS)
+
+
+def dados(semente, n=50_000):
+    # Distribuição de cauda longa, como as contagens dos repositórios.
+    return np.random.default_rng(semente).lognormal(3, 2, n)
+
+
+def test_erro_de_rank_dentro_da_garantia_em_blocos_e_mesclas():
+    # A garantia é de 99% por quantil: alguns quantis podem passar um pouco de erro_rank(),
+    # mas em vários conjuntos e sementes a fração que passa fica abaixo de 1%.
+    limite = erro_rank(200)
+    erros = []
+    for semente in range(10):
+        valores = dados(semente)
+        ordenados = np.sort(valores)
+
+        em_blocos = EsbocoKLL(200, semente=semente)
+        for bloco in np.array_split(valores, 20):
+            em_blocos.adicionar(bloco)
+
+        mesclado = EsbocoKLL(200, semente=semente + 1000)
+        for i, bloco in enumerate(np.array_split(valores, 200)):
+            parte = EsbocoKLL(200, semente=semente * 1000 + i)
+            parte.adicionar(bloco)
+            mesclado.mesclar(parte)
+
+        for esboco in (em_blocos, mesclado):
+            assert esboco.n == len(valores)
+            erros.append(erros_de_rank(esboco, ordenados))
+
+    erros = np.concatenate(erros)
+    assert (erros > limite).mean() <= 0.01
+    assert erros.max() <= 1.5 * limite
+    assert np.median(erros) <= limite / 3
+
+
+def test_memoria_limitada():
+    esboco = EsbocoKLL(200, semente=1)
+    for bloco in np.array_split(dados(1, 200_000), 100):
+        esboco.adicionar(bloco)
+    assert esboco.retidos <= 3 * 200
+
+
+def test_extremos_exatos_e_nan_ignorado():
+    esboco = EsbocoKLL(50, semente=3)
+    valores = dados(3, 10_000)
+    esboco.adicionar(np.append(valores, [np.nan, np.nan]))
+
+    assert esboco.n == len(valores)
+    assert esboco.quantil(0) == valores.min()
+    assert esboco.quantil(1) == valores.max()
+    assert esboco.rank(valores.max()) == 1.0
+    assert esboco.rank(valores.min() - 1) == 0.0
+
+
+def test_vazio():
+    esboco = EsbocoKLL()
+    assert np.isnan(esboco.mediana())
+    esboco.mesclar(EsbocoKLL())
+    assert esboco.n == 0
+
+
+def test_mesclar_junta_contagem_extremos_e_usa_o_menor_k():
+    a, b = EsbocoKLL(200, semente=1), EsbocoKLL(100, semente=2)
+    a.adicionar(np.arange(1000))
+    b.adicionar(np.arange(1000, 3000))
+
+    a.mesclar(b)
+
+    assert (a.n, a.k, a.minimo, a.maximo) == (3000, 100, 0, 2999)
+    assert abs(a.mediana() - 1500) <= erro_rank(100) * 1.5 * 3000
+
+
+def test_dict_em_json_preserva_o_esboco():
+    esboco = EsbocoKLL(200, semente=5)
+    esboco.adicionar(dados(5, 20_000))
+
+    copia = EsbocoKLL.de_dict(json.loads(json.dumps(esboco.para_dict())))
+
+    assert copia.n == esboco.n and copia.k == esboco.k
+    np.testing.assert_array_equal(copia.quantis(QUANTIS), esboco.quantis(QUANTIS))
+
+
+@pytest.mark.parametrize('k', [50, 200, 800])
+def test_erro_rank_diminui_com_k(k):
+    assert erro_rank(k) > erro_rank(2 * k)
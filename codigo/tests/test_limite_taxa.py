@@ -0,0 +1,122 @@
+import pytest
+
+import limite_taxa
+from limite_taxa import AgendadorLimite, recurso_da_url
+
+
+class Relogio:
+    """Substitui o módulo time do agendador: sleep() só avança o relógio."""
+
+    def __init__(self, agora=1_000_000.0):
+        self.agora = agora
+
+    def time(self):
+        return self.agora
+
+    def sleep(self, segundos):
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(limite_taxa, 'time', relogio)
+    return relogio
+
+
+def test_recurso_da_url():
+    assert recurso_da_url('https://api.github.com/graphql') == 'graphql'
+    assert recurso_da_url('https://api.github.com/search/issues?q=x') == 'search'
+    assert recurso_da_url('https://api.github.com/repos/a/b/pulls') == 'core'
+
+
+def test_reposicao_e_o_restante_dividido_pelo_tempo_ate_o_reset(relogio):
+    agendador = AgendadorLimite(margem=5, rajada=1)
+    # 1000 requisições utilizáveis em 100 s: 10 por segundo.
+    agendador.atualizar('core', 5000, 1005, relogio.agora + 100)
+
+    assert agendador.adquirir('core') == 0
+    # A taxa é recalculada a cada chamada com o restante de agora (999, 998...), por isso o rel.
+    assert agendador.adquirir('core') == pytest.approx(0.1, rel=0.01)
+    assert agendador.adquirir('core') == pytest.approx(0.1, rel=0.01)
+    assert agendador.restante('core') == 1002
+
+
+def test_rajada_limita_as_fichas_acumuladas(relogio):
+    agendador = AgendadorLimite(margem=0, rajada=3)
+    agendador.atualizar('core', 100_000, 100_000, relogio.agora + 100_000)  # 1 por segundo
+
+    relogio.sleep(500)  # Parado por muito tempo: acumula só a rajada, não 500 fichas.
+    assert [agendador.adquirir('core') for _ in range(3)] == [0, 0, 0]
+    assert agendador.adquirir('core') == pytest.approx(1.0, rel=0.01)
+
+
+def test_margem_nunca_e_usada_e_espera_o_reset(relogio):
+    agendador = AgendadorLimite(margem=5, rajada=20)
+    reset = relogio.agora + 30
+    agendador.atualizar('search', 30, 6, reset)
+
+    assert agendador.adquirir('search') == 0
+    inicio = relogio.agora
+    esperado = agendador.adquirir('search')
+
+    # Só a margem sobrou: espera a janela virar (um segundo depois do reset) e usa o orçamento novo.
+    assert esperado == pytest.approx(reset - inicio + 1)
+    assert agendador.restante('search') == 29
+
+
+def test_atualizar_fica_com_o_menor_restante_da_mesma_janela(relogio):
+    agendador = AgendadorLimite()
+    reset = relogio.agora + 3600
+    agendador.atualizar('core', 5000, 4000, reset)
+    # Resposta mais antiga que chegou depois: não devolve orçamento.
+    agendador.atualizar('core', 5000, 4100, reset)
+    assert agendador.restante('core') == 4000
+
+    agendador.atualizar('core', 5000, 3900, reset)
+    assert agendador.restante('core') == 3900
+
+    # Janela nova: vale o que a API informar.
+    agendador.atualizar('core', 5000, 4999, reset + 3600)
+    assert agendador.restante('core') == 4999
+
+
+def test_primeira_resposta_substitui_o_limite_padrao(relogio):
+    agendador = AgendadorLimite()
+    agendador.atualizar('core', 15000, 14990, relogio.agora + 3000)
+    assert agendador.restante('core') == 14990
+
+
+def test_janela_virada_sem_resposta_aceita_a_primeira_resposta_da_nova(relogio):
+    agendador = AgendadorLimite(margem=0, rajada=20)
+    agendador.atualizar('core', 5000, 100, relogio.agora + 10)
+    relogio.sleep(20)
+    agendador.adquirir('core')  # Vira a janela supondo o orçamento cheio.
+
+    agendador.atualizar('core', 5000, 4500, relogio.agora + 5)
+    assert agendador.restante('core') == 4500
+
+
+def test_requisicao_mais_cara_que_a_rajada_espera_e_passa(relogio):
+    agendador = AgendadorLimite(margem=0, rajada=20)
+    agendador.atualizar('graphql', 5000, 1000, relogio.agora + 100)  # 10 pontos por segundo
+
+    # Começa com 20 fichas; faltam 5, meio segundo de reposição.
+    assert agendador.adquirir('graphql', 25) == pytest.approx(0.5)
+    assert agendador.restante('graphql') == 975
+
+
+def test_devolver_nao_passa_do_limite(relogio):
+    agendador = AgendadorLimite()
+    agendador.atualizar('core', 5000, 4999, relogio.agora + 3600)
+    agendador.devolver('core', 5)
+    assert agendador.restante('core') == 5000
+
+
+def test_atualizar_por_cabecalhos(relogio):
+    agendador = AgendadorLimite()
+    agendador.atualizar_por_cabecalhos({'X-RateLimit-Remaining': '12', 'X-RateLimit-Limit': '30',
+                                        'X-RateLimit-Reset': str(int(relogio.agora) + 60),
+                                        'X-RateLimit-Resource': 'search'})
+    agendador.atualizar_por_cabecalhos({})  # Sem cabeçalhos de rate limit: nada muda.
+    assert agendador.restante('search') == 12
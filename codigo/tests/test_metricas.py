@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from metricas import adicionar_metricas, dividir
+
+
+def test_dividir_mascara_denominadores_invalidos():
+    resultado = dividir([1, 2, 3, 4], [2, 0, np.nan, -1])
+    assert resultado.tolist() == [0.5, 0.0, 0.0, 0.0]
+    assert np.isnan(dividir([1], [0], padrao=np.nan)).all()
+
+
+def test_razao_de_issues_indefinida_sem_issues():
+    df = pd.DataFrame({
+        'creation_date': ['2020-01-01T00:00:00Z'] * 4,
+        'total_releases': [4, 0, 2, 1],
+        'total_issues': [10, 0, 4, 0],
+        'closed_issues': [9, 0, 1, 0],
+    })
+    agora = pd.Timestamp('2020-01-01', tz='UTC')
+    adicionar_metricas(df, agora)
+
+    assert df['closed_issues_ratio'].tolist()[0::2] == [0.9, 0.25]
+    assert df['closed_issues_ratio'].isna().tolist() == [False, True, False, True]
+    # Repositórios sem issues ficam fora da mediana da RQ06, em vez de puxá-la para 0.
+    assert df['closed_issues_ratio'].median() == 0.575
+    # Idade zero não tem releases por ano definidas; o relatório sempre as tratou como 0.
+    assert df['releases_per_year'].tolist() == [0.0] * 4
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from formato_colunar import salvar
+from metricas import adicionar_metricas
+from metricas_em_blocos import COLUNAS_ESBOCO, COLUNAS_LIDAS, MetricasEmBlocos, calcular
+
+
+def conjunto(n=30_000, semente=7):
+    rng = np.random.default_rng(semente)
+    issues = rng.integers(0, 5000, n)
+    return pd.DataFrame({
+        'repository_age_days': rng.integers(1, 6000, n),
+        'accepted_pull_requests': rng.integers(0, 20_000, n),
+        'total_releases': rng.integers(0, 500, n),
+        'days_since_last_update': rng.integers(0, 1000, n),
+        'primary_language': pd.Categorical(rng.choice(['Python', 'Go', 'Rust', 'C'], n, p=[0.5, 0.3, 0.15, 0.05])),
+        'total_issues': issues,
+        'closed_issues': (issues * rng.random(n)).astype('int64'),
+    })
+
+
+def em_blocos(df, tamanho=4000, semente=1):
+    metricas = MetricasEmBlocos(semente=semente)
+    for inicio in range(0, len(df), tamanho):
+        metricas.adicionar_bloco(df.iloc[inicio:inicio + tamanho].copy())
+    return metricas
+
+
+def conferir(metricas, df):
+    """Contagens exatas e medianas com rank dentro de 1,5 vez erro_rank em relação ao pandas."""
+    completo = adicionar_metricas(df.copy())
+    assert metricas.repositorios == len(df)
+    assert metricas.total_pull_requests == df['accepted_pull_requests'].sum()
+    assert metricas.linguagens == df['primary_language'].value_counts().to_dict()
+    for coluna in COLUNAS_ESBOCO:
+        valores = np.sort(completo[coluna].dropna().to_numpy(dtype='float64'))
+        rank = np.searchsorted(valores, metricas.mediana(coluna), side='right') / len(valores)
+        assert abs(rank - 0.5) <= 1.5 * metricas.erro_rank, coluna
+        assert np.isclose(metricas.media(coluna), valores.mean())
+
+
+def test_blocos_batem_com_o_pandas():
+    df = conjunto()
+    conferir(em_blocos(df), df)
+
+
+def test_salvar_carregar_e_mesclar(tmp_path):
+    df = conjunto()
+    primeira, segunda = df.iloc[:12_000], df.iloc[12_000:]
+    em_blocos(primeira, semente=1).salvar(tmp_path / 'primeira.json')
+
+    mescladas = MetricasEmBlocos.carregar(tmp_path / 'primeira.json').mesclar(em_blocos(segunda, semente=2))
+
+    conferir(mescladas, df)
+
+
+def test_json_preserva_as_metricas(tmp_path):
+    metricas = em_blocos(conjunto(5000))
+    metricas.salvar(tmp_path / 'm.json')
+    copia = MetricasEmBlocos.carregar(tmp_path / 'm.json')
+
+    assert copia.para_dict() == metricas.para_dict()
+    pd.testing.assert_series_equal(copia.linguagens_comuns(), metricas.linguagens_comuns())
+
+
+def test_calcular_mistura_conjuntos_e_json(tmp_path):
+    df = conjunto(20_000)
+    salvar(df.iloc[:8000][COLUNAS_LIDAS].copy(), str(tmp_path / 'a.parquet'))
+    salvar(df.iloc[8000:][COLUNAS_LIDAS].copy(), str(tmp_path / 'b.csv'))
+    MetricasEmBlocos.de_arquivo(str(tmp_path / 'b.csv'), linhas_por_bloco=3000).salvar(tmp_path / 'b.json')
+
+    conferir(calcular([str(tmp_path / 'a.parquet'), str(tmp_path / 'b.json')], linhas_por_bloco=3000), df)
@@ -0,0 +1,43 @@
+"""
+Tamanho das páginas do PaginadorAdaptativo na coleta GraphQL, contra o simulador da API
+(fixture `servidor` do conftest.py).
+"""
+import re
+
+import consulta_repositorios
+
+
+def registrar_consultas(monkeypatch):
+    """Guarda as variáveis de cada consulta feita pelo coletor."""
+    original = consulta_repositorios.exec_query_graphql
+    variaveis = []
+
+    def registrando(query, variables, *args, **kwargs):
+        variaveis.append(dict(variables))
+        return original(query, variables, *args, **kwargs)
+
+    monkeypatch.setattr(consulta_repositorios, 'exec_query_graphql', registrando)
+    return variaveis
+
+
+def test_ultima_pagina_nao_passa_do_total(servidor, monkeypatch):
+    variaveis = registrar_consultas(monkeypatch)
+    consulta_repositorios.main(nome_arquivo='saida.parquet', total=95)
+
+    tamanhos = [v['first'] for v in variaveis if 'first' in v]
+    assert tamanhos == [10, 20, 40, 25]
+
+
+def test_delta_so_reaproveita_linhas_gravadas(servidor, monkeypatch, capsys):
+    consulta_repositorios.main(nome_arquivo='anterior.parquet', total=300)
+    capsys.readouterr()
+
+    variaveis = registrar_consultas(monkeypatch)
+    consulta_repositorios.main(nome_arquivo='novo.parquet', total=300, delta='anterior.parquet')
+
+    saida = capsys.readouterr().out
+    reaproveitados = int(re.search(r'Modo delta: (\d+) repositórios', saida).group(1))
+    assert reaproveitados == 300
+    assert sum(v['first'] for v in variaveis if 'first' in v) == 300
+    # Nada mudou desde a coleta anterior: nenhuma contagem cara é buscada de novo.
+    assert not [v for v in variaveis if 'ids' in v]
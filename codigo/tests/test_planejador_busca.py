@@ -0,0 +1,153 @@
+import re
+import threading
+import time
+from datetime import date
+
+import planejador_busca
+from planejador_busca import encontrar_estrelas_minimas, percorrer_faixas, planejar_faixas
+
+
+class BuscaFalsa:
+    """contar(consulta) sobre uma lista de (estrelas, data de criação), guardando as consultas feitas."""
+
+    def __init__(self, repos):
+        self.repos = repos
+        self.consultas = []
+
+    def filtrar(self, consulta):
+        repos = self.repos
+        for termo in consulta.split():
+            if m := re.fullmatch(r'stars:>=(\d+)', termo):
+                repos = [r for r in repos if r[0] >= int(m[1])]
+            elif m := re.fullmatch(r'stars:(\d+)\.\.(\d+)', termo):
+                repos = [r for r in repos if int(m[1]) <= r[0] <= int(m[2])]
+            elif m := re.fullmatch(r'stars:(\d+)', termo):
+                repos = [r for r in repos if r[0] == int(m[1])]
+            elif m := re.fullmatch(r'created:(\S+)\.\.(\S+)', termo):
+                inicio, fim = date.fromisoformat(m[1]), date.fromisoformat(m[2])
+                repos = [r for r in repos if inicio <= r[1] <= fim]
+            else:
+                raise ValueError(termo)
+        return repos
+
+    def contar(self, consulta):
+        self.consultas.append(consulta)
+        return len(self.filtrar(consulta))
+
+
+def test_estrelas_minimas_desce_pela_metade_ate_ter_o_total():
+    busca = BuscaFalsa([(estrelas, date(2020, 1, 1)) for estrelas in range(1, 1001)])
+
+    assert encontrar_estrelas_minimas(busca.contar, 300, 1000) == 500
+    assert encontrar_estrelas_minimas(busca.contar, 600, 1000) == 250
+    assert busca.consultas == ['stars:>=500', 'stars:>=500', 'stars:>=250']
+
+
+def test_estrelas_minimas_para_em_1():
+    busca = BuscaFalsa([(5, date(2020, 1, 1))])
+    assert encontrar_estrelas_minimas(busca.contar, 10, 8) == 1
+
+
+def test_faixas_cortadas_na_media_geometrica():
+    busca = BuscaFalsa([(estrelas, date(2020, 1, 1)) for estrelas in range(1, 101)])
+
+    planejar_faixas(busca.contar, 1, 100, limite=50)
+
+    # sqrt(1 * 100) = 10: a primeira divisão separa 1..10 de 11..100, e a faixa de cima vem antes.
+    # Depois 11..100 é cortada em sqrt(11 * 100) = 33.
+    assert busca.consultas[:3] == ['stars:1..100', 'stars:11..100', 'stars:34..100']
+
+
+def test_faixas_cobrem_tudo_sem_passar_do_limite_e_ordenadas():
+    # Muitos repositórios com poucas estrelas, como no GitHub; datas variadas para as faixas de data.
+    repos = [(estrelas, date(2008 + i % 15, 1 + i % 12, 1 + i % 28))
+             for estrelas in range(1, 500) for i in range(500 // estrelas + 1)]
+    busca = BuscaFalsa(repos)
+
+    faixas = planejar_faixas(busca.contar, 1, 499, limite=40)
+
+    assert all(0 < total <= 40 for _, total in faixas)
+    assert sum(total for _, total in faixas) == len(repos)
+    cobertos = [busca.filtrar(consulta) for consulta, _ in faixas]
+    assert sorted(r for faixa in cobertos for r in faixa) == sorted(repos)
+    # Da faixa com mais estrelas para a com menos.
+    maiores = [max(r[0] for r in faixa) for faixa in cobertos]
+    assert maiores == sorted(maiores, reverse=True)
+
+
+def test_uma_contagem_de_estrelas_acima_do_limite_vira_faixas_de_data():
+    repos = [(7, date(2010 + i % 10, 1 + i % 12, 1)) for i in range(120)] + [(9, date(2015, 1, 1))]
+    busca = BuscaFalsa(repos)
+
+    faixas = planejar_faixas(busca.contar, 7, 9, limite=25)
+
+    por_data = [consulta for consulta, _ in faixas if consulta.startswith('stars:7 ')]
+    assert por_data and all(' created:' in consulta for consulta in por_data)
+    assert all(total <= 25 for _, total in faixas)
+    assert sum(total for _, total in faixas) == len(repos)
+    assert faixas[0] == ('stars:8..9', 1)
+
+
+def test_data_sem_como_dividir_avisa_e_fica_com_o_limite(capsys):
+    repos = [(3, date(2020, 5, 5))] * 30
+    faixas = planejar_faixas(BuscaFalsa(repos).contar, 3, 3, limite=10)
+
+    assert faixas == [('stars:3 created:2020-05-05..2020-05-05', 30)]
+    assert 'apenas 10 serão coletados' in capsys.readouterr().out
+
+
+def _chave(repo):
+    return repo['nome']
+
+
+def _estrelas(repo):
+    return repo['estrelas']
+
+
+def test_percorrer_faixas_entrega_na_ordem_das_faixas_sem_repetir():
+    faixas = [('a', 3), ('b', 3), ('c', 2)]
+    resultados = {
+        'a': [{'nome': 'x', 'estrelas': 90}, {'nome': 'y', 'estrelas': 99}, {'nome': 'z', 'estrelas': 95}],
+        # 'z' ganhou estrelas entre as buscas e aparece de novo na faixa seguinte.
+        'b': [{'nome': 'w', 'estrelas': 50}, {'nome': 'z', 'estrelas': 60}, {'nome': 'v', 'estrelas': 70}],
+        'c': [{'nome': 'u', 'estrelas': 10}, {'nome': 't', 'estrelas': 20}],
+    }
+    # A primeira faixa é a mais lenta: as outras terminam antes, mas só são entregues depois dela.
+    atrasos = {'a': 0.2, 'b': 0.0, 'c': 0.0}
+
+    def buscar(consulta):
+        time.sleep(atrasos[consulta])
+        return resultados[consulta]
+
+    entregues = list(percorrer_faixas(faixas, buscar, _chave, _estrelas, max_paralelo=3))
+
+    assert [[repo['nome'] for repo in lista] for lista in entregues] == [['y', 'z', 'x'], ['v', 'w'], ['t', 'u']]
+
+
+def test_percorrer_faixas_para_no_total_sem_buscar_o_resto():
+    faixas = [(f'f{i}', 10) for i in range(20)]
+    buscadas = []
+    lock = threading.Lock()
+
+    def buscar(consulta):
+        with lock:
+            buscadas.append(consulta)
+        indice = int(consulta[1:])
+        return [{'nome': f'{consulta}-{j}', 'estrelas': 1000 - 10 * indice - j} for j in range(10)]
+
+    entregues = list(percorrer_faixas(faixas, buscar, _chave, _estrelas, total_desejado=15, max_paralelo=1))
+
+    assert [len(lista) for lista in entregues] == [10, 5]
+    assert [repo['estrelas'] for repo in entregues[1]] == [990, 989, 988, 987, 986]
+    # Janela de 2 * max_paralelo faixas: as demais nem chegam a ser pedidas.
+    assert len(buscadas) <= 4
+
+
+def test_executar_faixas_ordena_tudo_por_estrelas():
+    faixas = [('a', 2), ('b', 2)]
+    resultados = {'a': [{'nome': 'x', 'estrelas': 5}, {'nome': 'y', 'estrelas': 9}],
+                  'b': [{'nome': 'y', 'estrelas': 9}, {'nome': 'w', 'estrelas': 7}]}
+
+    repos = planejador_busca.executar_faixas(faixas, resultados.get, _chave, _estrelas, max_paralelo=2)
+
+    assert [repo['nome'] for repo in repos] == ['y', 'w', 'x']
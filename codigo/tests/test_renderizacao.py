@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+
+from renderizacao import Figura, assinatura, renderizar_figuras
+
+
+def _escrever(destino, valores, titulo):
+    with open(destino, 'w', encoding='utf-8') as f:
+        f.write(f"{titulo}: {list(valores)}")
+
+
+def _escrever_maiusculo(destino, valores, titulo):
+    with open(destino, 'w', encoding='utf-8') as f:
+        f.write(f"{titulo.upper()}: {list(valores)}")
+
+
+def figuras(valores, titulo='RQ'):
+    return [
+        Figura('a.txt', _escrever, dict(valores=pd.Series(valores, name='v'), titulo=titulo)),
+        Figura('b.txt', _escrever, dict(valores=pd.Series([1, 2], name='v'), titulo=titulo)),
+    ]
+
+
+def test_so_refaz_figuras_que_mudaram(tmp_path):
+    diretorio = str(tmp_path)
+    assert len(renderizar_figuras(figuras([1, 2, 3]), diretorio, processos=1)) == 2
+
+    # Mesmos dados e mesmo código: nada a desenhar.
+    assert renderizar_figuras(figuras([1, 2, 3]), diretorio, processos=1) == []
+
+    gerados = renderizar_figuras(figuras([1, 2, 4]), diretorio, processos=1)
+    assert gerados == [os.path.join(diretorio, 'a.txt')]
+    with open(gerados[0], encoding='utf-8') as f:
+        assert f.read() == 'RQ: [1, 2, 4]'
+
+    assert len(renderizar_figuras(figuras([1, 2, 4], titulo='RQ01'), diretorio, processos=1)) == 2
+    assert len(renderizar_figuras(figuras([1, 2, 4], titulo='RQ01'), diretorio, processos=1, refazer=True)) == 2
+
+
+def test_refaz_arquivo_apagado(tmp_path):
+    diretorio = str(tmp_path)
+    renderizar_figuras(figuras([1]), diretorio, processos=1)
+    os.remove(os.path.join(diretorio, 'b.txt'))
+    assert renderizar_figuras(figuras([1]), diretorio, processos=1) == [os.path.join(diretorio, 'b.txt')]
+
+
+def test_assinatura_depende_do_codigo_e_nao_da_posicao():
+    dados = dict(valores=pd.Series([1, 2], name='v'), titulo='RQ')
+    base = assinatura(Figura('a.txt', _escrever, dados))
+    assert assinatura(Figura('a.txt', _escrever_maiusculo, dados)) != base
+
+    # A mesma função definida em outra linha e em outro arquivo tem a mesma assinatura.
+    codigo = (
+        "\n\n\n"
+        "def _escrever(destino, valores, titulo):\n"
+        "    with open(destino, 'w', encoding='utf-8') as f:\n"
+        "        f.write(f\"{titulo}: {list(valores)}\")\n"
+    )
+    escopo = {}
+    exec(compile(codigo, 'outro_arquivo.py', 'exec'), escopo)
+    assert assinatura(Figura('a.txt', escopo['_escrever'], dados)) == base
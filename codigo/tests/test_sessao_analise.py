@@ -0,0 +1,34 @@
+import pandas as pd
+
+import sessao_analise
+from sessao_analise import SessaoAnalise
+
+
+def sessao():
+    return SessaoAnalise(pd.DataFrame({
+        'primary_language': pd.Categorical(['Go', 'Python', 'Python', 'Rust', 'Python', 'Go', 'C']),
+        'accepted_pull_requests': [5, 1, 2, 3, 4, 6, 0],
+        'total_issues': [10, 0, 4, 2, 8, 1, 5],
+        'closed_issues': [5, 0, 4, 1, 2, 1, 5],
+    }))
+
+
+def test_linguagens_comuns_sem_montar_o_cubo(monkeypatch):
+    def sem_cubo(*args, **kwargs):
+        raise AssertionError('o cubo não deveria ser montado')
+
+    analise = sessao()
+    monkeypatch.setattr(sessao_analise, 'CuboAgregados', sem_cubo)
+    comuns = analise.linguagens_comuns(2)
+    assert comuns.to_dict() == {'Python': 3, 'Go': 2}
+    assert list(analise.top_linguagens(2)['primary_language'].cat.categories) == ['Go', 'Python']
+
+
+def test_linguagens_comuns_na_ordem_do_cubo():
+    analise = sessao()
+    assert list(analise.linguagens_comuns(3).index) == list(analise.cubo().linguagens_comuns(3).index.astype(str))
+
+
+def test_medianas_por_linguagem_entre_as_comuns():
+    medianas = sessao().medianas_por_linguagem(['accepted_pull_requests'], n=2)
+    assert medianas['accepted_pull_requests'].to_dict() == {'Go': 5.5, 'Python': 2.0}
@@ -2,12 +2,29 @@ import requests
 import pandas as pd
 from datetime import datetime, timezone
 import os
-import time
 import random
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import sys
 from dotenv import load_dotenv
 
+# Módulos compartilhados com o coletor GraphQL ficam em codigo/src.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo', 'src'))
+from cliente_http import obter_sessao, requisitar
+from pool_tokens import obter_pool, carregar_tokens
+from cache_http import obter_cache
+from checkpoint import Checkpoint
+from planejador_busca import LIMITE_BUSCA, buscar_top_repositorios
+from escrita_incremental import EscritorIncremental
+from historico import HistoricoRepositorios
+from instrumentacao import imprimir_resumo, obter_instrumentacao
+from perfilamento import etapa, perfilar
+
 load_dotenv()
 
+# Vários tokens podem ser informados em GITHUB_TOKENS (separados por vírgula); ver pool_tokens.
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN') 
 
 headers = {
@@ -15,63 +32,86 @@ headers = {
     'Accept': 'application/vnd.github.v3+json',
     'User-Agent': 'Python-GitHub-Analytics/1.0'
 }
-SEARCH_URL = 'https://api.github.com/search/repositories'
-REPO_BASE_URL = 'https://api.github.com/repos'
+# GITHUB_API_URL aponta os coletores para outro servidor, como o simulador de codigo/benchmarks.
+API_BASE_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+SEARCH_URL = f'{API_BASE_URL}/search/repositories'
+SEARCH_ISSUES_URL = f'{API_BASE_URL}/search/issues'
+REPO_BASE_URL = f'{API_BASE_URL}/repos'
+GRAPHQL_URL = f'{API_BASE_URL}/graphql'
+RATE_LIMIT_URL = f'{API_BASE_URL}/rate_limit'
+
+# Número máximo de requisições em andamento ao mesmo tempo, somando todas as etapas.
+MAX_CONCORRENCIA = int(os.getenv('MAX_CONCORRENCIA', '16'))
+
+# Trabalhadores de cada etapa do pipeline: páginas da busca e repositórios com detalhes em andamento.
+TRABALHADORES_BUSCA = int(os.getenv('TRABALHADORES_BUSCA', '2'))
+TRABALHADORES_DETALHES = int(os.getenv('TRABALHADORES_DETALHES', '8'))
 
 def fazer_requisicao_com_retry(url, params=None, max_tentativas=5, delay_inicial=1):
+    """
+    Faz uma requisição REST com retry automático e devolve o JSON da resposta.
+    """
+    response = requisicao_com_retry(url, params, max_tentativas, delay_inicial)
+    if response is None:
+        return None
+    return response.json()
+
+def requisicao_com_retry(url, params=None, max_tentativas=5, delay_inicial=1):
     """
     Faz uma requisição REST com retry automático em caso de erros temporários.
+    Devolve o objeto de resposta, para quem precisa dos cabeçalhos.
+    Respostas já vistas são revalidadas com ETag e, se não mudaram (304), servidas do cache.
+    Cada tentativa e cada espera entre elas ficam na instrumentação (ver instrumentacao.py);
+    só as falhas definitivas são mostradas.
     """
+    cache = obter_cache()
+    instrumentacao = obter_instrumentacao()
+
     for tentativa in range(max_tentativas):
+        ultima = tentativa == max_tentativas - 1
         try:
-            print(f"   Tentativa {tentativa + 1}/{max_tentativas}...")
+            cabecalhos = dict(headers)
+            if cache:
+                cabecalhos.update(cache.cabecalhos_condicionais(url, params))
             
-            response = requests.get(
-                url, 
-                headers=headers,
+            # O ritmo das requisições é controlado pelo agendador de rate limit compartilhado.
+            response = requisitar(
+                'GET',
+                url,
+                tentativa=tentativa + 1,
+                headers=cabecalhos,
                 params=params,
                 timeout=30
             )
-        
-            rate_limit_remaining = response.headers.get('X-RateLimit-Remaining')
-            rate_limit_reset = response.headers.get('X-RateLimit-Reset')
-            
-            if rate_limit_remaining:
-                print(f"   Rate limit restante: {rate_limit_remaining}")
-                
-                if int(rate_limit_remaining) < 10:
-                    reset_time = datetime.fromtimestamp(int(rate_limit_reset))
-                    print(f"   Rate limit baixo. Reset em: {reset_time}")
-                    
-                
-                    if int(rate_limit_remaining) < 5:
-                        wait_time = int(rate_limit_reset) - int(time.time()) + 5
-                        if wait_time > 0:
-                            print(f"   Aguardando reset do rate limit ({wait_time} segundos)...")
-                            time.sleep(wait_time)
-            
-        
+
+            if response.status_code == 304 and cache:
+                em_cache = cache.resposta(url, params)
+                if em_cache is not None:
+                    return em_cache
+                # A entrada foi removida do cache entre as duas chamadas: repete sem condicional.
+                cache = None
+                continue
+
             if response.status_code == 200:
-                return response.json()
+                if cache:
+                    cache.salvar(url, params, response)
+                return response
             
-            elif response.status_code == 403 and 'rate limit' in response.text.lower():
-                print(f"   Rate limit excedido. Aguardando reset...")
-                if rate_limit_reset:
-                    wait_time = int(rate_limit_reset) - int(time.time()) + 5
-                    if wait_time > 0:
-                        time.sleep(wait_time)
+            elif response.status_code in (403, 429) and 'rate limit' in response.text.lower():
+                # Limite secundário: o GitHub informa quanto esperar. No limite primário a resposta
+                # traz restante=0 e o agendador segura a próxima tentativa até o reset.
+                retry_after = response.headers.get('Retry-After')
+                if retry_after:
+                    instrumentacao.dormir(int(retry_after), 'retry_after')
                 continue
             
         
             elif 500 <= response.status_code < 600:
-                print(f"   Erro do servidor ({response.status_code}): {response.reason}")
-                if tentativa < max_tentativas - 1:
-                    delay = delay_inicial * (2 ** tentativa) + random.uniform(0, 1)
-                    print(f"   Aguardando {delay:.1f} segundos antes de tentar novamente...")
-                    time.sleep(delay)
+                if not ultima:
+                    instrumentacao.dormir(delay_inicial * (2 ** tentativa) + random.uniform(0, 1), 'backoff')
                     continue
                 else:
-                    print("   Número máximo de tentativas excedido.")
+                    print(f"   Erro do servidor ({response.status_code}) após {max_tentativas} tentativas: {url}")
                     return None
         
             else:
@@ -80,175 +120,208 @@ def fazer_requisicao_com_retry(url, params=None, max_tentativas=5, delay_inicial
                     print(f"   Detalhes: {response.text}")
                 return None
                 
-        except requests.exceptions.Timeout:
-            print(f"   Timeout na tentativa {tentativa + 1}")
-            if tentativa < max_tentativas - 1:
-                time.sleep(delay_inicial * (2 ** tentativa))
-                continue
-            else:
-                print("   Timeout após múltiplas tentativas.")
-                return None
-                
-        except requests.exceptions.ConnectionError:
-            print(f"   Erro de conexão na tentativa {tentativa + 1}")
-            if tentativa < max_tentativas - 1:
-                time.sleep(delay_inicial * (2 ** tentativa))
-                continue
-            else:
-                print("   Erro de conexão após múltiplas tentativas.")
-                return None
-                
         except requests.exceptions.RequestException as e:
-            print(f"   Erro na requisição: {e}")
-            if tentativa < max_tentativas - 1:
-                time.sleep(delay_inicial * (2 ** tentativa))
+            # Timeout, erro de conexão ou outro erro de transporte.
+            if not ultima:
+                instrumentacao.dormir(delay_inicial * (2 ** tentativa), 'backoff')
                 continue
             else:
+                print(f"   {type(e).__name__} após {max_tentativas} tentativas: {e}")
                 return None
     
+    print(f"   Número máximo de tentativas excedido: {url}")
     return None
 
 def verificar_rate_limit():
     """
-    Verifica o status atual do rate limit usando a API REST.
+    Verifica o status atual do rate limit de cada token do pool usando a API REST
+    e inicializa os agendadores. Devolve o limite de busca somado de todos os tokens.
     """
-    try:
-        response = requests.get(
-            'https://api.github.com/rate_limit',
-            headers=headers,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('resources', {}).get('search', {})
-        else:
-            print(f"Erro ao verificar rate limit: {response.status_code}")
-            return None
+    pool = obter_pool()
+    busca = {'remaining': 0, 'limit': 0, 'reset': None}
+
+    for token in pool.tokens:
+        try:
+            cabecalhos = dict(headers)
+            if token:
+                cabecalhos['Authorization'] = f'token {token}'
+
+            # /rate_limit não consome orçamento; a resposta inicializa todos os recursos do agendador.
+            response = obter_sessao().get(
+                RATE_LIMIT_URL,
+                headers=cabecalhos,
+                timeout=10
+            )
             
-    except Exception as e:
-        print(f"Erro ao verificar rate limit: {e}")
+            if response.status_code == 200:
+                resources = response.json().get('resources', {})
+                pool.agendador(token).atualizar_recursos(resources)
+                search = resources.get('search', {})
+                busca['remaining'] += search.get('remaining', 0)
+                busca['limit'] += search.get('limit', 0)
+                busca['reset'] = min(filter(None, (busca['reset'], search.get('reset'))), default=None)
+            else:
+                print(f"Erro ao verificar rate limit: {response.status_code}")
+                
+        except Exception as e:
+            print(f"Erro ao verificar rate limit: {e}")
+
+    if not busca['limit']:
         return None
+    return busca
 
-def buscar_detalhes_repositorio(owner, repo_name):
+def contar_via_link(url, params=None):
     """
-    Busca detalhes específicos de um repositório, incluindo PRs, releases e issues.
+    Conta os itens de um endpoint paginado pedindo um item por página:
+    o número da página 'last' do cabeçalho Link é o total de itens.
     """
-    url = f"{REPO_BASE_URL}/{owner}/{repo_name}"
-    print(f"     Buscando detalhes adicionais...")
-    merged_pulls_count = 0
+    params = dict(params or {}, per_page=1)
+    response = requisicao_com_retry(url, params)
+    if response is None:
+        return None
 
-    try:
-    
-        pulls_url = f"{url}/pulls"
-        pulls_params = {'state': 'closed', 'per_page': 100, 'page': 1}
-        
-        pulls_response = fazer_requisicao_com_retry(pulls_url, pulls_params)
-        if pulls_response:
-        
-            merged_pulls_count = sum(1 for pr in pulls_response if pr.get('merged_at') is not None)
-            
-        
-            if len(pulls_response) == 100:
-                print(f"       PR: Mais de 100 PRs encontrados, contando páginas adicionais...")
-                page = 2
-                while page <= 3:
-                    pulls_params['page'] = page
-                    more_pulls = fazer_requisicao_com_retry(pulls_url, pulls_params)
-                    if more_pulls and len(more_pulls) > 0:
-                        merged_pulls_count += sum(1 for pr in more_pulls if pr.get('merged_at') is not None)
-                        if len(more_pulls) < 100:
-                            break
-                        page += 1
-                        time.sleep(0.5)
-                    else:
-                        break
-        
-        time.sleep(0.3)
-    except Exception as e:
-        print(f"       Erro ao buscar PRs: {e}")
-        merged_pulls_count = 0
-    
+    ultima = response.links.get('last')
+    if ultima:
+        return int(parse_qs(urlparse(ultima['url']).query)['page'][0])
 
-    releases_count = 0
+    # Sem cabeçalho Link: todos os itens cabem na primeira página.
+    return len(response.json())
+
+def contar_via_busca(consulta):
+    """
+    Conta os resultados de uma consulta da busca de issues/PRs pelo campo total_count.
+    """
+    data = fazer_requisicao_com_retry(SEARCH_ISSUES_URL, {'q': consulta, 'per_page': 1})
+    if not data or data.get('incomplete_results'):
+        return None
+    return data.get('total_count')
+
+query_contagens = """
+  query Contagens($owner: String!, $name: String!) {
+    repository(owner: $owner, name: $name) {
+      pullRequests(states: MERGED) { totalCount }
+      releases { totalCount }
+      issues_abertas: issues(states: OPEN) { totalCount }
+      issues_fechadas: issues(states: CLOSED) { totalCount }
+    }
+  }
+"""
+
+# Métrica -> campo da consulta query_contagens.
+CAMPOS_CONTAGENS = {
+    'pulls_mergeados': 'pullRequests',
+    'releases': 'releases',
+    'issues_abertas': 'issues_abertas',
+    'issues_fechadas': 'issues_fechadas',
+}
+
+def contar_via_graphql(owner, repo_name, max_tentativas=3, delay_inicial=1):
+    """
+    Conta PRs mergeados, releases e issues abertas e fechadas de um repositório em uma
+    única consulta GraphQL (cerca de 1 ponto do orçamento graphql). Erros 5xx e de conexão
+    são repetidos com backoff. Devolve
+    {'pulls_mergeados': n, 'releases': n, 'issues_abertas': n, 'issues_fechadas': n} ou None.
+    """
+    for tentativa in range(max_tentativas):
+        ultima = tentativa == max_tentativas - 1
+        try:
+            response = requisitar(
+                'POST',
+                GRAPHQL_URL,
+                tentativa=tentativa + 1,
+                json={'query': query_contagens, 'variables': {'owner': owner, 'name': repo_name}},
+                headers=headers,
+                timeout=30
+            )
+            if response.status_code >= 500 and not ultima:
+                obter_instrumentacao().dormir(delay_inicial * (2 ** tentativa) + random.uniform(0, 1), 'backoff')
+                continue
+            response.raise_for_status()
+            repo = (response.json().get('data') or {}).get('repository')
+            break
+        except requests.exceptions.HTTPError as e:
+            print(f"       [{owner}/{repo_name}] Erro na contagem via GraphQL: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            if not ultima:
+                obter_instrumentacao().dormir(delay_inicial * (2 ** tentativa), 'backoff')
+                continue
+            print(f"       [{owner}/{repo_name}] Erro na contagem via GraphQL: {e}")
+            return None
+
+    if not repo:
+        return None
     try:
-        releases_url = f"{url}/releases"
-        releases_params = {'per_page': 100}
-        releases_response = fazer_requisicao_com_retry(releases_url, releases_params)
-        if releases_response:
-            releases_count = len(releases_response)
-            
-        
-            if len(releases_response) == 100:
-                print(f"       Releases: Mais de 100 releases, fazendo contagem adicional...")
-                page = 2
-                while page <= 2:
-                    releases_params['page'] = page
-                    more_releases = fazer_requisicao_com_retry(releases_url, releases_params)
-                    if more_releases and len(more_releases) > 0:
-                        releases_count += len(more_releases)
-                        if len(more_releases) < 100:
-                            break
-                        page += 1
-                        time.sleep(0.5)
-                    else:
-                        break
-        
-        time.sleep(0.3)
-    except Exception as e:
-        print(f"       Erro ao buscar releases: {e}")
-        releases_count = 0
+        return {metrica: repo[campo]['totalCount'] for metrica, campo in CAMPOS_CONTAGENS.items()}
+    except (KeyError, TypeError):
+        # Resposta parcial (campo nulo por erro na API): as contagens vão pela API REST.
+        return None
+
+def contar_metrica(owner, repo_name, metrica):
+    """
+    Conta uma métrica exata de um repositório pela API REST, sem baixar os itens:
+    - 'pulls_mergeados', 'issues_abertas' e 'issues_fechadas' pelo total_count da busca;
+    - 'releases' pelo cabeçalho Link com per_page=1.
+    Só é usada quando a consulta GraphQL de contar_via_graphql falha: a busca de issues
+    tem orçamento de 30 requisições por minuto, e cada repositório gasta 3 delas.
+    """
+    repo = f"{owner}/{repo_name}"
+    if metrica == 'pulls_mergeados':
+        total = contar_via_busca(f"repo:{repo} is:pr is:merged")
+    elif metrica == 'releases':
+        total = contar_via_link(f"{REPO_BASE_URL}/{repo}/releases")
+    elif metrica == 'issues_abertas':
+        total = contar_via_busca(f"repo:{repo} is:issue is:open")
+    elif metrica == 'issues_fechadas':
+        total = contar_via_busca(f"repo:{repo} is:issue is:closed")
+    else:
+        raise ValueError(f"Métrica desconhecida: {metrica}")
+
+    if total is None:
+        raise RuntimeError(f"não foi possível contar {metrica}")
+    return total
+
+async def buscar_detalhes_repositorio_async(owner, repo_name, semaforo):
+    """
+    Busca PRs, releases, issues abertas e issues fechadas de um repositório em uma consulta
+    GraphQL e, se ela falhar, pela API REST, com as quatro contagens ao mesmo tempo.
+    O semáforo limita quantas requisições ficam em andamento no total, somando todos os repositórios.
+    """
+    async with semaforo:
+        contagens_graphql = await asyncio.to_thread(contar_via_graphql, owner, repo_name)
+
+    async def contar(metrica):
+        if contagens_graphql is not None:
+            return contagens_graphql[metrica]
+        async with semaforo:
+            return await asyncio.to_thread(contar_metrica, owner, repo_name, metrica)
+
+    resultados = await asyncio.gather(
+        contar('pulls_mergeados'),
+        contar('releases'),
+        contar('issues_abertas'),
+        contar('issues_fechadas'),
+        return_exceptions=True
+    )
+
+    nomes = ('PRs', 'releases', 'issues abertas', 'issues fechadas')
+    contagens = []
+    for nome, resultado in zip(nomes, resultados):
+        if isinstance(resultado, Exception):
+            print(f"       [{owner}/{repo_name}] Erro ao buscar {nome}: {resultado}")
+            contagens.append(0)
+        else:
+            contagens.append(resultado)
+
+    merged_pulls_count, releases_count, issues_abertas, issues_fechadas = contagens
 
-    issues_abertas = 0
-    issues_fechadas = 0
     razao_issues = 'N/A'
-    
-    try:
-        issues_url = f"{url}/issues"
-        
-    
-        issues_abertas_params = {'state': 'open', 'per_page': 100}
-        issues_abertas_response = fazer_requisicao_com_retry(issues_url, issues_abertas_params)
-        if issues_abertas_response:
-            issues_abertas = len(issues_abertas_response)
-        
-        time.sleep(0.3)
-        
-    
-        issues_fechadas_params = {'state': 'closed', 'per_page': 100}
-        issues_fechadas_response = fazer_requisicao_com_retry(issues_url, issues_fechadas_params)
-        if issues_fechadas_response:
-            issues_fechadas = len(issues_fechadas_response)
-            
-        
-            if len(issues_fechadas_response) == 100:
-                print(f"       Issues: Mais de 100 issues fechadas, fazendo estimativa...")
-            
-                page = 2
-                while page <= 3:
-                    issues_fechadas_params['page'] = page
-                    more_issues = fazer_requisicao_com_retry(issues_url, issues_fechadas_params)
-                    if more_issues and len(more_issues) > 0:
-                        issues_fechadas += len(more_issues)
-                        if len(more_issues) < 100:
-                            break
-                        page += 1
-                        time.sleep(0.5)
-                    else:
-                        break
-        
-    
-        total_issues = issues_abertas + issues_fechadas
-        if total_issues > 0:
-            razao_issues = round(issues_fechadas / total_issues, 3)
-        
-        time.sleep(0.3)
-        
-    except Exception as e:
-        print(f"       Erro ao buscar issues: {e}")
-    
-    print(f"       PRs mergeados: {merged_pulls_count}, Releases: {releases_count}, Razão issues fechadas: {razao_issues}")
-    
+    total_issues = issues_abertas + issues_fechadas
+    if total_issues > 0:
+        razao_issues = round(issues_fechadas / total_issues, 3)
+
+    print(f"       [{owner}/{repo_name}] PRs mergeados: {merged_pulls_count}, Releases: {releases_count}, Razão issues fechadas: {razao_issues}")
+
     return {
         'merged_pulls_count': merged_pulls_count,
         'releases_count': releases_count,
@@ -256,147 +329,336 @@ def buscar_detalhes_repositorio(owner, repo_name):
         'razao_issues_fechadas': razao_issues
     }
 
-def main():
-    """Função principal para buscar e processar os dados dos repositórios via API REST."""
-    if not GITHUB_TOKEN or GITHUB_TOKEN == 'SEU_TOKEN_AQUI':
-        print("ERRO: Token do GitHub não configurado no arquivo .env.")
-        return
+def buscar_detalhes_repositorio(owner, repo_name):
+    """
+    Busca detalhes específicos de um repositório, incluindo PRs, releases e issues.
+    Versão síncrona de `buscar_detalhes_repositorio_async`, para uso fora de um event loop.
+    """
+    return asyncio.run(buscar_detalhes_repositorio_async(owner, repo_name, asyncio.Semaphore(4)))
 
+# Campos dos itens da busca usados em montar_dados_repositorio; só eles vão para o checkpoint.
+CAMPOS_BUSCA = ('full_name', 'stargazers_count', 'language', 'created_at', 'pushed_at',
+                'updated_at', 'open_issues_count', 'forks_count', 'size')
 
-    print("Verificando rate limit...")
-    rate_limit_info = verificar_rate_limit()
-    if rate_limit_info:
-        print(f"Rate limit de busca: {rate_limit_info.get('remaining', 'N/A')}/{rate_limit_info.get('limit', 'N/A')}")
-        reset_time = rate_limit_info.get('reset')
-        if reset_time:
-            reset_datetime = datetime.fromtimestamp(reset_time)
-            print(f"Reset em: {reset_datetime}")
-    
-    all_repos = []
-    repos_por_pagina = 25
-    total_repos_desejados = 100
-    total_de_paginas = (total_repos_desejados + repos_por_pagina - 1) // repos_por_pagina
-    
-    print(f"\nBuscando os {total_repos_desejados} repositórios com mais estrelas...")
-    print(f"Usando {repos_por_pagina} repositórios por página em {total_de_paginas} páginas")
+def resumir_item_busca(repo):
+    """
+    Mantém apenas os campos do item da busca que são usados depois.
+    """
+    return {campo: repo[campo] for campo in CAMPOS_BUSCA if campo in repo}
 
-    for page_num in range(1, total_de_paginas + 1):
-        print(f"\n--- Página {page_num}/{total_de_paginas} ---")
+def montar_dados_repositorio(repo, detalhes):
+    """
+    Combina os dados da busca com os detalhes coletados em uma linha do CSV.
+    """
+    repo_name = repo['full_name']
 
-        params = {
-            'q': 'stars:>=1',
-            'sort': 'stars',
-            'order': 'desc',
-            'per_page': repos_por_pagina,
-            'page': page_num
-        }
+    pushed_at_str = repo.get('pushed_at', repo.get('updated_at', ''))
+    if pushed_at_str:
+        pushed_at = datetime.fromisoformat(pushed_at_str.replace('Z', '+00:00'))
+        time_since_update_days = (datetime.now(timezone.utc) - pushed_at).days
+    else:
+        time_since_update_days = -1
 
-    
-        data = fazer_requisicao_com_retry(SEARCH_URL, params)
-        
-        if data is None:
-            print(f"Falha ao obter dados da página {page_num}. Continuando...")
-            continue
+    return {
+        'Repositorio': repo_name,
+        'Estrelas': repo.get('stargazers_count', 0),
+        'Linguagem_Primaria': repo.get('language', 'N/A') or 'N/A',
+        'Data_de_Criacao': repo.get('created_at', '').split('T')[0] if repo.get('created_at') else 'N/A',
+        'Dias_desde_Ultima_Atualizacao': time_since_update_days,
+        'Pull_Requests_Aceitas': detalhes.get('merged_pulls_count', 0),
+        'Total_de_Releases': detalhes.get('releases_count', 0),
+        'Issues_Abertas': detalhes.get('issues_abertas', repo.get('open_issues_count', 0)),
+        'Forks': repo.get('forks_count', 0),
+        'Tamanho_KB': repo.get('size', 0),
+        'Razao_Issues_Fechadas_Total': detalhes.get('razao_issues_fechadas', 'N/A'),
+        # Usado pelo modo delta da próxima coleta para saber se houve push desde esta.
+        'Ultimo_Push': pushed_at_str or 'N/A'
+    }
 
-        repos_on_page = data.get('items', [])
-        total_count = data.get('total_count', 0)
+def coleta_mais_recente(output_dir):
+    """
+    Caminho do CSV mais recente em `output_dir` (os nomes são datas), ou None.
+    """
+    coletas = sorted(arq for arq in os.listdir(output_dir) if arq.endswith('.csv')) if os.path.isdir(output_dir) else []
+    return os.path.join(output_dir, coletas[-1]) if coletas else None
 
-        if repos_on_page:
-            all_repos.extend(repos_on_page)
-            print(f"   Coletados {len(repos_on_page)} repositórios desta página.")
-            print(f"   Total disponível no GitHub: {total_count:,}")
-        else:
-            print("   Nenhum repositório encontrado nesta página.")
-            break
+def carregar_anteriores(csv_filepath):
+    """
+    Lê os detalhes de uma coleta anterior para o modo delta: {nome: (último push, detalhes)}.
+    Coletas feitas antes da coluna Ultimo_Push não servem e devolvem um dicionário vazio.
+    """
+    if not csv_filepath or not os.path.exists(csv_filepath):
+        print("Modo delta: nenhuma coleta anterior encontrada; todos os repositórios serão coletados por completo.")
+        return {}
+    df = pd.read_csv(csv_filepath, keep_default_na=False)
+    if 'Ultimo_Push' not in df.columns:
+        print(f"Modo delta: '{csv_filepath}' não tem a coluna Ultimo_Push; todos os repositórios serão coletados por completo.")
+        return {}
+
+    # Depois da ordenação final, 'N/A' fica gravado como célula vazia.
+    anteriores = {}
+    for linha in df.to_dict('records'):
+        if linha['Ultimo_Push'] in ('', 'N/A'):
+            continue
+        razao = linha['Razao_Issues_Fechadas_Total']
+        razao = 'N/A' if razao in ('', 'N/A') else float(razao)
+        anteriores[linha['Repositorio']] = (linha['Ultimo_Push'], {
+            'merged_pulls_count': int(linha['Pull_Requests_Aceitas']),
+            'releases_count': int(linha['Total_de_Releases']),
+            'issues_abertas': int(linha['Issues_Abertas']),
+            'razao_issues_fechadas': razao
+        })
+    print(f"Modo delta: {len(anteriores)} repositórios da coleta anterior em '{csv_filepath}'.")
+    return anteriores
+
+async def executar_pipeline(paginas, repos_busca, processados, checkpoint, escritor, total_repos_desejados,
+                            repos_por_pagina=25, trabalhadores_busca=TRABALHADORES_BUSCA,
+                            trabalhadores_detalhes=TRABALHADORES_DETALHES, max_concorrencia=MAX_CONCORRENCIA,
+                            anteriores=None):
+    """
+    Executa busca, detalhes e escrita ao mesmo tempo, ligados por filas:
 
-    
-        if page_num < total_de_paginas:
-            delay = random.uniform(2, 4)
-            print(f"   Aguardando {delay:.1f} segundos...")
-            time.sleep(delay)
-        
-    
-        if len(all_repos) >= total_repos_desejados:
-            all_repos = all_repos[:total_repos_desejados]
-            break
+    - `trabalhadores_busca` buscam as `paginas` da busca e colocam cada repositório na fila de detalhes;
+    - `trabalhadores_detalhes` coletam os detalhes de um repositório cada e colocam a linha na fila de escrita;
+    - um escritor grava as linhas em `escritor` assim que chegam.
 
-    if not all_repos:
-        print("\nNenhum repositório foi coletado com sucesso.")
-        return
-    
+    `repos_busca` são repositórios já obtidos (checkpoint ou busca por faixas), que entram direto na
+    fila de detalhes. Repositórios em `processados` são ignorados. `max_concorrencia` limita o total
+    de requisições em andamento. Devolve quantas linhas novas foram escritas.
 
-    repo_data_list = []
-    print(f"\n--- Processando {len(all_repos)} repositórios ---")
-    print("Este processo pode demorar devido às requisições adicionais para obter dados completos.")
+    Com `anteriores` (ver carregar_anteriores), repositórios cujo pushed_at não mudou desde a
+    coleta anterior reaproveitam os detalhes dela em vez de buscá-los de novo.
+    """
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_concorrencia))
+    semaforo = asyncio.Semaphore(max_concorrencia)
+    fila_paginas = asyncio.Queue()
+    fila_repos = asyncio.Queue()
+    fila_escrita = asyncio.Queue()
+    anteriores = anteriores or {}
+    novos = 0
+    reaproveitados = 0
+
+    for page_num in paginas:
+        fila_paginas.put_nowait(page_num)
+    for repo in repos_busca:
+        fila_repos.put_nowait(repo)
+
+    async def buscar_paginas():
+        while not fila_paginas.empty():
+            page_num = fila_paginas.get_nowait()
+            params = {
+                'q': 'stars:>=1',
+                'sort': 'stars',
+                'order': 'desc',
+                'per_page': repos_por_pagina,
+                'page': page_num
+            }
+            async with semaforo:
+                data = await asyncio.to_thread(fazer_requisicao_com_retry, SEARCH_URL, params)
 
-    for i, repo in enumerate(all_repos):
-        if not repo: 
-            continue
+            if data is None:
+                print(f"Falha ao obter dados da página {page_num}. Continuando...")
+                continue
 
-        try:
+            # A última página pode passar do total pedido.
+            restantes = total_repos_desejados - (page_num - 1) * repos_por_pagina
+            repos = [resumir_item_busca(repo) for repo in data.get('items', [])[:restantes]]
+            checkpoint.registrar('busca', {'pagina': page_num, 'repos': repos})
+            print(f"--- Página {page_num}: {len(repos)} repositórios (total disponível no GitHub: {data.get('total_count', 0):,}) ---")
+
+            for repo in repos:
+                await fila_repos.put(repo)
+
+    async def buscar_detalhes():
+        nonlocal reaproveitados
+        while True:
+            repo = await fila_repos.get()
+            if repo is None:
+                return
             repo_name = repo['full_name']
-            owner, name = repo_name.split('/')
-            print(f"({i+1:3d}/{len(all_repos)}) {repo_name}")
+            if repo_name in processados:
+                continue
+            processados.add(repo_name)
 
-        
-            pushed_at_str = repo.get('pushed_at', repo.get('updated_at', ''))
-            if pushed_at_str:
-                pushed_at = datetime.fromisoformat(pushed_at_str.replace('Z', '+00:00'))
-                time_since_update_days = (datetime.now(timezone.utc) - pushed_at).days
-            else:
-                time_since_update_days = -1
-        
-            detalhes = buscar_detalhes_repositorio(owner, name)
-        
-            repo_data = {
-                'Repositorio': repo_name,
-                'Estrelas': repo.get('stargazers_count', 0),
-                'Linguagem_Primaria': repo.get('language', 'N/A') or 'N/A',
-                'Data_de_Criacao': repo.get('created_at', '').split('T')[0] if repo.get('created_at') else 'N/A',
-                'Dias_desde_Ultima_Atualizacao': time_since_update_days,
-                'Pull_Requests_Aceitas': detalhes.get('merged_pulls_count', 0),
-                'Total_de_Releases': detalhes.get('releases_count', 0),
-                'Issues_Abertas': detalhes.get('issues_abertas', repo.get('open_issues_count', 0)),
-                'Forks': repo.get('forks_count', 0),
-                'Tamanho_KB': repo.get('size', 0),
-                'Razao_Issues_Fechadas_Total': detalhes.get('razao_issues_fechadas', 'N/A')
-            }
-            
-            repo_data_list.append(repo_data)
-            time.sleep(random.uniform(1, 2))
-            
-        except Exception as e:
-            print(f"     Erro ao processar repositório: {e}")
-            continue
+            try:
+                push_anterior, detalhes = anteriores.get(repo_name, (None, None))
+                if push_anterior is not None and push_anterior == repo.get('pushed_at'):
+                    reaproveitados += 1
+                else:
+                    owner, name = repo_name.split('/')
+                    print(f"Detalhes: {repo_name}")
+                    detalhes = await buscar_detalhes_repositorio_async(owner, name, semaforo)
+                repo_data = montar_dados_repositorio(repo, detalhes)
+                checkpoint.registrar('detalhes', repo_data)
+                await fila_escrita.put(repo_data)
+            except Exception as e:
+                print(f"     Erro ao processar repositório {repo_name}: {e}")
+
+    async def escrever():
+        nonlocal novos
+        while True:
+            repo_data = await fila_escrita.get()
+            if repo_data is None:
+                return
+            await asyncio.to_thread(escritor.escrever, [repo_data])
+            novos += 1
+
+    tarefa_escrita = asyncio.create_task(escrever())
+    tarefas_detalhes = [asyncio.create_task(buscar_detalhes()) for _ in range(trabalhadores_detalhes)]
+
+    await asyncio.gather(*(buscar_paginas() for _ in range(trabalhadores_busca)))
+    for _ in tarefas_detalhes:
+        await fila_repos.put(None)
+    await asyncio.gather(*tarefas_detalhes)
+    await fila_escrita.put(None)
+    await tarefa_escrita
+
+    if anteriores:
+        print(f"Modo delta: {reaproveitados} repositórios sem push desde a coleta anterior reaproveitaram os detalhes.")
+    return novos
+
+def contar_busca_repositorios(consulta):
+    """
+    Total de repositórios encontrados por uma consulta da busca.
+    """
+    data = fazer_requisicao_com_retry(SEARCH_URL, {'q': consulta, 'per_page': 1})
+    if data is None:
+        raise RuntimeError(f"falha ao contar '{consulta}'")
+    return data.get('total_count', 0)
 
-    if not repo_data_list:
-        print("Nenhum dado foi processado com sucesso.")
+def buscar_faixa(consulta):
+    """
+    Busca todas as páginas de uma consulta (no máximo 1000 repositórios, em 10 páginas de 100).
+    """
+    repos = []
+    for page in range(1, 11):
+        params = {'q': consulta, 'sort': 'stars', 'order': 'desc', 'per_page': 100, 'page': page}
+        data = fazer_requisicao_com_retry(SEARCH_URL, params)
+        if data is None:
+            raise RuntimeError(f"falha ao buscar a página {page} de '{consulta}'")
+        items = data.get('items', [])
+        repos.extend(resumir_item_busca(repo) for repo in items)
+        if len(items) < 100:
+            break
+    return repos
+
+def buscar_em_faixas(total_repos_desejados, max_paralelo=4):
+    """
+    Busca mais repositórios do que o limite de 1000 resultados, dividindo a busca em faixas de estrelas.
+    """
+    data = fazer_requisicao_com_retry(SEARCH_URL, {'q': 'stars:>=1', 'sort': 'stars', 'order': 'desc', 'per_page': 1})
+    if not data or not data.get('items'):
+        return []
+    estrelas_max = data['items'][0]['stargazers_count']
+
+    return buscar_top_repositorios(contar_busca_repositorios, buscar_faixa, estrelas_max, total_repos_desejados,
+                                   chave=lambda repo: repo['full_name'],
+                                   estrelas=lambda repo: repo.get('stargazers_count', 0),
+                                   max_paralelo=max_paralelo)
+
+def main(retomar=False, total_repos_desejados=100, trabalhadores_busca=TRABALHADORES_BUSCA,
+         trabalhadores_detalhes=TRABALHADORES_DETALHES, delta=None, historico=None):
+    """
+    Função principal para buscar e processar os dados dos repositórios via API REST.
+    Com `delta` (CSV de uma coleta anterior, ou '' para a mais recente em result/), os detalhes
+    só são buscados para repositórios com push desde aquela coleta. Com `historico` (arquivo SQLite),
+    a coleta é gravada também como snapshot do dia (ver historico.py).
+    """
+    if not carregar_tokens() or GITHUB_TOKEN == 'SEU_TOKEN_AQUI':
+        print("ERRO: Token do GitHub não configurado no arquivo .env (GITHUB_TOKEN ou GITHUB_TOKENS).")
         return
 
-    print(f"\nProcessamento concluído! {len(repo_data_list)} repositórios processados.")
+    print(f"Usando {len(obter_pool().tokens)} token(s) do GitHub.")
 
-    df = pd.DataFrame(repo_data_list)
 
-    df = df.sort_values('Estrelas', ascending=False).reset_index(drop=True)
+    print("Verificando rate limit...")
+    with etapa('rate limit'):
+        rate_limit_info = verificar_rate_limit()
+    if rate_limit_info:
+        print(f"Rate limit de busca: {rate_limit_info.get('remaining', 'N/A')}/{rate_limit_info.get('limit', 'N/A')}")
+        reset_time = rate_limit_info.get('reset')
+        if reset_time:
+            reset_datetime = datetime.fromtimestamp(reset_time)
+            print(f"Reset em: {reset_datetime}")
     
     output_dir = 'result'
-    
     os.makedirs(output_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(output_dir, 'checkpoint'), retomar)
+    anteriores = None
+    if delta is not None:
+        anteriores = carregar_anteriores(delta or coleta_mais_recente(output_dir))
+
+    # Cada registro do diário 'busca' é uma página concluída: {'pagina': n, 'repos': [...]}.
+    paginas_concluidas = checkpoint.registros('busca')
+    repos_busca = [repo for registro in paginas_concluidas for repo in registro['repos']]
+    repos_por_pagina = 25
+    total_de_paginas = (total_repos_desejados + repos_por_pagina - 1) // repos_por_pagina
     
+    print(f"\nBuscando os {total_repos_desejados} repositórios com mais estrelas...")
+    if total_repos_desejados <= LIMITE_BUSCA:
+        print(f"Usando {repos_por_pagina} repositórios por página em {total_de_paginas} páginas")
+        paginas = [p for p in range(1, total_de_paginas + 1) if p not in {r['pagina'] for r in paginas_concluidas}]
+    else:
+        # A busca paginada para em 1000 resultados; acima disso a busca é feita por faixas de estrelas.
+        paginas = []
+        if not repos_busca:
+            try:
+                with etapa('busca'):
+                    repos_busca = buscar_em_faixas(total_repos_desejados)
+            except RuntimeError as e:
+                print(f"Erro na busca por faixas: {e}")
+                return
+            checkpoint.registrar('busca', {'pagina': 0, 'repos': repos_busca})
+
+    detalhes_anteriores = checkpoint.registros('detalhes')
+    processados = {repo_data['Repositorio'] for repo_data in detalhes_anteriores}
+    if paginas_concluidas:
+        print(f"Retomando: {len(repos_busca)} repositórios da busca e {len(processados)} com detalhes já coletados.")
+
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     csv_filename = f'{timestamp}.csv'
     
     csv_filepath = os.path.join(output_dir, csv_filename)
-    
+
+    print(f"\nBusca com {trabalhadores_busca} trabalhador(es), detalhes com {trabalhadores_detalhes}, "
+          f"até {MAX_CONCORRENCIA} requisições simultâneas.")
+
+    # Linhas prontas vão para o disco em lotes pequenos enquanto a coleta continua.
+    escritor = EscritorIncremental(csv_filepath, tamanho_lote=25)
+    escritor.escrever(detalhes_anteriores)
+    # Busca e detalhes andam juntos no pipeline; no perfil, as pilhas de cada um ficam sob esta etapa.
+    with etapa('busca e detalhes'):
+        novos = asyncio.run(executar_pipeline(
+            paginas, repos_busca, processados, checkpoint, escritor, total_repos_desejados,
+            repos_por_pagina, trabalhadores_busca, trabalhadores_detalhes, anteriores=anteriores
+        ))
+    total_salvo = escritor.finalizar()
+
+    if not total_salvo:
+        print("Nenhum dado foi processado com sucesso.")
+        return
+
+    print(f"\nProcessamento concluído! {novos} repositórios processados nesta execução.")
+
     try:
-        df.to_csv(csv_filepath, index=False, encoding='utf-8')
+        with etapa('DataFrame'):
+            df = pd.read_csv(csv_filepath)
+            df = df.sort_values('Estrelas', ascending=False).reset_index(drop=True)
+        with etapa('escrita do CSV'):
+            df.to_csv(csv_filepath, index=False, encoding='utf-8')
         print(f"\n Dados exportados com sucesso para: '{csv_filepath}'")
         print(f"   Total de repositórios: {len(df)}")
         print(f"   Arquivo salvo em: {os.path.abspath(csv_filepath)}")
+        checkpoint.finalizar()
     except Exception as e:
         print(f"\n Erro ao salvar arquivo CSV: {e}")
         return
 
+    if historico:
+        with etapa('historico'), HistoricoRepositorios(historico) as banco:
+            gravados = banco.ingerir(df, fonte='rest')
+        print(f"   {gravados} repositórios gravados no histórico '{historico}'.")
+
 
     print("\n--- Estatísticas dos Dados ---")
     if len(df) > 0:
@@ -421,4 +683,37 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Coleta dados dos repositórios mais populares do GitHub via API REST.')
+    parser.add_argument('--retomar', action='store_true',
+                        help='Continua uma coleta interrompida a partir do último checkpoint.')
+    parser.add_argument('--total', type=int, default=100,
+                        help='Quantidade de repositórios. Acima de 1000 a busca é dividida em faixas de estrelas.')
+    parser.add_argument('--trabalhadores-busca', type=int, default=TRABALHADORES_BUSCA,
+                        help='Páginas da busca buscadas ao mesmo tempo.')
+    parser.add_argument('--trabalhadores-detalhes', type=int, default=TRABALHADORES_DETALHES,
+                        help='Repositórios com detalhes sendo coletados ao mesmo tempo.')
+    parser.add_argument('--delta', nargs='?', const='', metavar='ARQ_CSV',
+                        help='Só busca os detalhes dos repositórios com push desde a coleta anterior em ARQ_CSV '
+                             '(padrão: o CSV mais recente em result/).')
+    parser.add_argument('--historico', nargs='?', const=os.path.join('result', 'historico.sqlite3'), metavar='ARQ_DB',
+                        help='Grava a coleta como snapshot do dia no histórico SQLite (padrão: result/historico.sqlite3).')
+    parser.add_argument('--metricas-execucao', nargs='?', const=os.path.join('result', 'metricas_execucao'),
+                        metavar='PREFIXO',
+                        help='Grava PREFIXO.prom (Prometheus) e PREFIXO.json com latência, status, repetições, bytes '
+                             'e esperas por endpoint (padrão: result/metricas_execucao).')
+    parser.add_argument('--perfil', '--profile', nargs='?', const=os.path.join('result', 'perfil'), metavar='PREFIXO',
+                        help='Mede tempo, CPU e pico de memória por etapa (busca, detalhes, DataFrame, escrita do CSV) '
+                             'e grava as pilhas amostradas em PREFIXO.folded (padrão: result/perfil).')
+    args = parser.parse_args()
+
+    try:
+        with perfilar(args.perfil):
+            main(retomar=args.retomar, total_repos_desejados=args.total,
+                 trabalhadores_busca=args.trabalhadores_busca, trabalhadores_detalhes=args.trabalhadores_detalhes,
+                 delta=args.delta, historico=args.historico)
+    finally:
+        # Também ao interromper a coleta: as métricas ajudam a entender onde ela parou.
+        if args.metricas_execucao:
+            os.makedirs(os.path.dirname(args.metricas_execucao) or '.', exist_ok=True)
+            imprimir_resumo(obter_instrumentacao().exportar(args.metricas_execucao, {'coletor': 'rest'}))
+            print(f"Métricas da execução em '{args.metricas_execucao}.prom' e '{args.metricas_execucao}.json'.")